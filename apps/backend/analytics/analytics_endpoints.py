@@ -1,12 +1,15 @@
 # analytics/analytics_endpoints.py
+from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import text
+from sqlalchemy import func, text
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from db.base import get_db
-from db.models import User
+from db.models import PlatformDailyRollup, Post, User
 from auth_unified.auth_endpoints import get_current_user
-from .schemas import TrendingPostResponse, HashtagStatsResponse
+from services.metric_snapshots import COUNTER_COLUMNS, metric_series
+from services.post_utils import get_platform_id
+from .schemas import HashtagStatsResponse, MetricPointResponse, PostGrowthResponse, TrendingPostResponse
 
 analytics_router = APIRouter(prefix="/api/v1/analytics", tags=["analytics"])
 
@@ -17,7 +20,7 @@ def get_trending_posts(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Récupérer les posts les plus tendance"""
+    """Récupérer les posts les plus tendance (fonction SQL bornée par les rollups, migration analytics_rollups)"""
     if platform:
         # Utiliser la fonction PostgreSQL avec paramètres sécurisés
         result = db.execute(
@@ -49,7 +52,7 @@ def get_hashtags_stats(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Récupérer les statistiques des hashtags"""
+    """Récupérer les statistiques des hashtags (vue sur les rollups quotidiens, migration analytics_rollups)"""
     if platform:
         result = db.execute(
             text("SELECT * FROM hashtags_with_stats WHERE platform = :platform ORDER BY total_posts DESC LIMIT :limit"),
@@ -81,46 +84,66 @@ def get_engagement_stats(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Récupérer les statistiques d'engagement des posts"""
+    """
+    Statistiques d'engagement des posts des `days` derniers jours (jour courant compris),
+    lues dans les rollups quotidiens : au plus days × plateformes lignes.
+    """
+    since = datetime.utcnow().date() - timedelta(days=days)
+    query = db.query(
+        func.sum(PlatformDailyRollup.post_count),
+        func.sum(PlatformDailyRollup.score_sum),
+        func.sum(PlatformDailyRollup.score_trend_sum),
+        func.max(PlatformDailyRollup.score_max),
+        func.max(PlatformDailyRollup.score_trend_max),
+        func.sum(PlatformDailyRollup.like_sum),
+        func.sum(PlatformDailyRollup.comment_sum),
+        func.sum(PlatformDailyRollup.share_sum),
+        func.sum(PlatformDailyRollup.view_sum),
+    ).filter(PlatformDailyRollup.day >= since)
     if platform:
-        result = db.execute(
-            text("""
-                SELECT 
-                    COUNT(*) as total_posts,
-                    AVG(score) as avg_score,
-                    AVG(score_trend) as avg_trend_score,
-                    MAX(score) as max_score,
-                    MAX(score_trend) as max_trend_score
-                FROM posts p
-                JOIN platforms pl ON p.platform_id = pl.id
-                WHERE p.posted_at > NOW() - INTERVAL '1 day' * :days
-                AND pl.name = :platform
-            """),
-            {"days": days, "platform": platform}
-        )
-    else:
-        result = db.execute(
-            text("""
-                SELECT 
-                    COUNT(*) as total_posts,
-                    AVG(score) as avg_score,
-                    AVG(score_trend) as avg_trend_score,
-                    MAX(score) as max_score,
-                    MAX(score_trend) as max_trend_score
-                FROM posts p
-                JOIN platforms pl ON p.platform_id = pl.id
-                WHERE p.posted_at > NOW() - INTERVAL '1 day' * :days
-            """),
-            {"days": days}
-        )
-    stats = result.fetchone()
+        platform_id = get_platform_id(db, platform)
+        query = query.filter(PlatformDailyRollup.platform_id == platform_id)
+    total_posts, score_sum, trend_sum, max_score, max_trend, likes, comments, shares, views = query.one()
+    total_posts = int(total_posts or 0)
     
     return {
-        "total_posts": stats[0],
-        "avg_score": float(stats[1]) if stats[1] else 0,
-        "avg_trend_score": float(stats[2]) if stats[2] else 0,
-        "max_score": float(stats[3]) if stats[3] else 0,
-        "max_trend_score": float(stats[4]) if stats[4] else 0,
+        "total_posts": total_posts,
+        "avg_score": float(score_sum) / total_posts if total_posts and score_sum else 0,
+        "avg_trend_score": float(trend_sum) / total_posts if total_posts and trend_sum else 0,
+        "max_score": float(max_score) if max_score else 0,
+        "max_trend_score": float(max_trend) if max_trend else 0,
+        "total_likes": int(likes or 0),
+        "total_comments": int(comments or 0),
+        "total_shares": int(shares or 0),
+        "total_views": int(views or 0),
         "period_days": days,
         "platform": platform or "all"
     }
+
+@analytics_router.get("/posts/{post_id}/growth", response_model=PostGrowthResponse)
+def get_post_growth(
+    post_id: str,
+    days: int = Query(7, ge=1, le=365),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Évolution des compteurs d'un post (relevés horaires récents, quotidiens au-delà)"""
+    if db.query(Post.id).filter(Post.id == post_id).first() is None:
+        raise HTTPException(status_code=404, detail="Post non trouvé")
+
+    points = metric_series(db, post_id, since=datetime.utcnow() - timedelta(days=days))
+    growth, velocity = {}, {}
+    if len(points) >= 2:
+        first, last = points[0], points[-1]
+        hours = (last.captured_at - first.captured_at).total_seconds() / 3600
+        for column in COUNTER_COLUMNS:
+            delta = (getattr(last, column) or 0) - (getattr(first, column) or 0)
+            growth[column] = delta
+            velocity[column] = round(delta / hours, 3) if hours > 0 else 0.0
+
+    return PostGrowthResponse(
+        post_id=post_id,
+        points=[MetricPointResponse.model_validate(point) for point in points],
+        growth=growth,
+        velocity_per_hour=velocity,
+    )
@@ -1,6 +1,6 @@
 # analytics/schemas.py
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 class TrendingPostResponse(BaseModel):
@@ -19,3 +19,19 @@ class HashtagStatsResponse(BaseModel):
     avg_engagement: Optional[float] = None
     last_scraped: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+
+class MetricPointResponse(BaseModel):
+    captured_at: datetime
+    like_count: Optional[int] = None
+    comment_count: Optional[int] = None
+    share_count: Optional[int] = None
+    view_count: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+class PostGrowthResponse(BaseModel):
+    post_id: str
+    points: List[MetricPointResponse]
+    growth: Dict[str, int] = Field(default_factory=dict)  # dernier relevé - premier relevé
+    velocity_per_hour: Dict[str, float] = Field(default_factory=dict)
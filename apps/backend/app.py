@@ -1,6 +1,7 @@
 # app.py
 from fastapi import FastAPI  # type: ignore
 from fastapi.middleware.cors import CORSMiddleware  # type: ignore
+from fastapi.middleware.gzip import GZipMiddleware  # type: ignore
 from fastapi.openapi.utils import get_openapi  # type: ignore
 import time
 import logging
@@ -27,10 +28,12 @@ from projects.projects_endpoints import projects_router
 from meta.meta_endpoints import router as meta_router
 from tiktok.tiktok_endpoints import router as tiktok_router
 from webhooks.webhooks_endpoints import webhooks_router
+from internal.internal_endpoints import internal_router
 
 # Import rate limiting
 from core.ratelimit import setup_rate_limit
-from core.middleware import RequestIDMiddleware, ErrorHandlerMiddleware
+from core.config import settings
+from core.middleware import RequestContextMiddleware
 
 app = FastAPI(
     title="Insider Trends API",
@@ -75,51 +78,16 @@ def custom_openapi():
 
 app.openapi = custom_openapi
 
-# Middleware de tracing (Request ID) - doit être avant les autres
-app.add_middleware(RequestIDMiddleware)
+# Middleware ASGI unique : Request ID, statistiques SQL, erreurs non gérées, headers de sécurité
+app.add_middleware(RequestContextMiddleware)
 
-# Middleware de gestion d'erreurs standardisé
-app.add_middleware(ErrorHandlerMiddleware)
+# Compression des grandes réponses (listes de posts / hashtags)
+if settings.GZIP_MIN_SIZE > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MIN_SIZE, compresslevel=settings.GZIP_COMPRESSLEVEL)
 
 # Configuration du rate limiting
 setup_rate_limit(app)
 
-# Middleware pour gérer les headers Railway et éviter les redirections 307
-@app.middleware("http")
-async def railway_proxy_middleware(request, call_next):
-    """
-    Middleware pour gérer correctement les requêtes Railway.
-    
-    Railway gère HTTPS via son proxy, mais route les requêtes en HTTP vers le conteneur.
-    Ce middleware :
-    1. Détecte HTTPS via X-Forwarded-Proto (Railway l'ajoute automatiquement)
-    2. NE FORCE PAS de redirection HTTPS (Railway le gère déjà)
-    3. Ajoute les headers de sécurité appropriés
-    """
-    # Détecter HTTPS via X-Forwarded-Proto (Railway ajoute ce header automatiquement)
-    forwarded_proto = request.headers.get("X-Forwarded-Proto", "").lower()
-    is_https_request = forwarded_proto == "https"
-    
-    # Logger pour debugging (seulement en cas de problème)
-    if forwarded_proto and forwarded_proto != "https" and forwarded_proto != "http":
-        logger.warning(f"X-Forwarded-Proto inattendu: {forwarded_proto} pour {request.url.path}")
-    
-    # IMPORTANT: Ne pas forcer de redirection HTTPS car Railway le gère déjà
-    # Juste traiter la requête normalement
-    
-    response = await call_next(request)
-    
-    # Headers de sécurité
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    
-    # Si la requête venait de HTTPS (via Railway proxy), ajouter HSTS
-    if is_https_request:
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-    
-    return response
-
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -143,7 +111,7 @@ app.add_middleware(
         "X-Forwarded-Proto",  # Pour Railway/proxy
         "X-Forwarded-For",    # Pour Railway/proxy
     ],
-    expose_headers=["X-Total-Count"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor", "X-Request-ID", "X-DB-Queries", "X-DB-Time"],
     max_age=3600,  # Cache preflight requests
 )
 
@@ -159,6 +127,7 @@ app.include_router(projects_router)
 app.include_router(meta_router)
 app.include_router(tiktok_router)
 app.include_router(webhooks_router)
+app.include_router(internal_router)
 
 # =====================================================
 # ENDPOINTS DE BASE - SIMPLES ET PROPRES
@@ -331,7 +300,7 @@ async def startup_event():
     try:
         from db.base import Base, engine
         # Importer tous les modèles pour qu'ils soient enregistrés dans Base.metadata
-        from db.models import User, OAuthAccount, Platform, Hashtag, Post, PostHashtag, Subscription, Project, ProjectHashtag, ProjectCreator
+        from db.models import User, OAuthAccount, Platform, Hashtag, MetaHashtagId, MetaHashtagSearch, Post, PostReadModel, PostHashtag, ContentVersion, PostMetricSnapshot, PlatformDailyRollup, HashtagDailyRollup, Subscription, Project, ProjectHashtag, ProjectCreator, ProjectRead, IngestionCall
         Base.metadata.create_all(bind=engine)
         logger.info("Tables de base de données créées/vérifiées")
     except Exception as e:
@@ -339,3 +308,54 @@ async def startup_event():
         import traceback
         traceback.print_exc()
         raise  # Propager l'erreur pour arrêter le démarrage si problème
+
+    # Cache des données de référence (plateformes, hashtags)
+    try:
+        from db.base import SessionLocal
+        from services.reference_cache import reference_cache
+        db = SessionLocal()
+        try:
+            reference_cache.load(db)
+        finally:
+            db.close()
+    except Exception as e:
+        # Non bloquant : le cache se remplit à la demande
+        logger.warning(f"Chargement du cache de référence impossible: {e}")
+
+    # Pools HTTP partagés vers Meta / TikTok (keep-alive entre les requêtes)
+    from services.http_client import http_clients
+    await http_clients.startup()
+
+    # Recalcul périodique de Post.score_trend
+    from core.config import settings
+    if settings.TREND_SCORING_INTERVAL_MINUTES > 0:
+        import asyncio
+        from services.trend_scoring import trend_scoring_loop
+        app.state.trend_scoring_task = asyncio.create_task(trend_scoring_loop())
+
+    # Sous-échantillonnage / rétention des relevés de métriques (et partitions à venir)
+    if settings.METRICS_MAINTENANCE_INTERVAL_MINUTES > 0:
+        import asyncio
+        from services.metric_snapshots import metrics_maintenance_loop
+        app.state.metrics_maintenance_task = asyncio.create_task(metrics_maintenance_loop())
+
+    # Ingestion des hashtags / créateurs des projets actifs, sous budgets par plateforme
+    if settings.INGESTION_INTERVAL_MINUTES > 0:
+        import asyncio
+        from services.ingestion_scheduler import ingestion_scheduler_loop
+        app.state.ingestion_scheduler_task = asyncio.create_task(ingestion_scheduler_loop())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Arrêt de l'application - Tâches de fond, pools HTTP et moteur DB async"""
+    for name in ("trend_scoring_task", "metrics_maintenance_task", "ingestion_scheduler_task"):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
+
+    from services.http_client import http_clients
+    await http_clients.shutdown()
+
+    from db.base import async_engine
+    await async_engine.dispose()
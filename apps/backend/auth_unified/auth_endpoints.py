@@ -1,12 +1,16 @@
 # auth/auth_endpoints.py
 import logging
 from typing import Optional
+from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import Response
+from jose import JWTError, jwt
 from sqlalchemy.orm import Session
+from core.config import settings
 from db.base import get_db
 from db.models import User
+from services.user_cache import user_cache
 from .schemas import UserCreate, UserResponse, TokenResponse, LoginRequest
 from .auth_service import AuthService
 
@@ -22,24 +26,25 @@ def options_handler():
     return Response(status_code=200)
 
 def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
-    """Obtenir l'utilisateur actuel depuis le token JWT"""
-    from jose import JWTError, jwt
-    from core.config import settings
-    
+    """Obtenir l'utilisateur actuel depuis le token JWT (snapshot mis en cache par token, rattaché à db)"""
+    # Récupérer le token depuis l'header Authorization
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Token manquant")
+    token = auth_header.split(" ")[1]
+
+    if user_cache.enabled:
+        cached = user_cache.get(db, token)
+        if cached is not None:
+            return cached
+
     try:
-        # Récupérer le token depuis l'header Authorization
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            raise HTTPException(status_code=401, detail="Token manquant")
-        
-        token = auth_header.split(" ")[1]
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id_str = payload.get("sub")
         if user_id_str is None:
             raise HTTPException(status_code=401, detail="Token invalide")
         
         # Supporter les UUID (utilisés depuis la correction de la BDD)
-        from uuid import UUID
         try:
             user_id = UUID(user_id_str)
         except (ValueError, TypeError):
@@ -47,12 +52,15 @@ def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
     except JWTError:
         raise HTTPException(status_code=401, detail="Token invalide")
     
+    generation = user_cache.generation(user_id)
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise HTTPException(status_code=401, detail="Utilisateur introuvable")
+    if user_cache.enabled:
+        expires_at = payload.get("exp")
+        user_cache.set(token, user, generation, float(expires_at) if isinstance(expires_at, (int, float)) else None)
     return user
 
-
 def get_optional_user(
     request: Request,
     db: Session = Depends(get_db),
@@ -62,5 +62,110 @@ class Settings:
         self.TIKTOK_CLIENT_SECRET: Optional[str] = os.getenv("TIKTOK_CLIENT_SECRET")
         self.TIKTOK_REDIRECT_URI: str = os.getenv("TIKTOK_REDIRECT_URI", "https://veyl.io/api/v1/auth/tiktok/callback")
 
+        # Clients HTTP upstream (Meta / TikTok) - pools keep-alive partagés
+        self.HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+        self.HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+        self.HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+        self.HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+        self.HTTP_TIMEOUT: float = float(os.getenv("HTTP_TIMEOUT", "20"))
+        self.HTTP_CONNECT_TIMEOUT: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+        self.HTTP_POOL_TIMEOUT: float = float(os.getenv("HTTP_POOL_TIMEOUT", "5"))
+
+        # Régulation des appels Meta d'après X-App-Usage / X-Business-Use-Case-Usage (en %)
+        self.META_THROTTLE_ENABLED: bool = os.getenv("META_THROTTLE_ENABLED", "true").lower() == "true"
+        self.META_THROTTLE_SLOW_PERCENT: float = float(os.getenv("META_THROTTLE_SLOW_PERCENT", "75"))
+        self.META_THROTTLE_STOP_PERCENT: float = float(os.getenv("META_THROTTLE_STOP_PERCENT", "95"))
+        self.META_THROTTLE_MAX_INTERVAL: float = float(os.getenv("META_THROTTLE_MAX_INTERVAL", "10"))
+        self.META_THROTTLE_MAX_WAIT: float = float(os.getenv("META_THROTTLE_MAX_WAIT", "30"))
+        self.META_THROTTLE_COOLDOWN: float = float(os.getenv("META_THROTTLE_COOLDOWN", "300"))
+
+        # Compte IG Business résolu par compte OAuth (secondes) - les échecs sont retentés plus tôt
+        self.IG_BUSINESS_ACCOUNT_TTL: float = float(os.getenv("IG_BUSINESS_ACCOUNT_TTL", "86400"))
+        self.IG_BUSINESS_ACCOUNT_NEGATIVE_TTL: float = float(os.getenv("IG_BUSINESS_ACCOUNT_NEGATIVE_TTL", "300"))
+
+        # Annuaire hashtag -> id Meta et quota ig_hashtag_search (hashtags uniques par utilisateur IG)
+        self.META_HASHTAG_SEARCH_QUOTA: int = int(os.getenv("META_HASHTAG_SEARCH_QUOTA", "30"))
+        self.META_HASHTAG_SEARCH_WINDOW_DAYS: float = float(os.getenv("META_HASHTAG_SEARCH_WINDOW_DAYS", "7"))
+        self.META_HASHTAG_NEGATIVE_DAYS: float = float(os.getenv("META_HASHTAG_NEGATIVE_DAYS", "7"))
+
+        # Cache oEmbed (secondes) - les échecs permanents sont gardés moins longtemps
+        self.OEMBED_CACHE_TTL: float = float(os.getenv("OEMBED_CACHE_TTL", "3600"))
+        self.OEMBED_NEGATIVE_TTL: float = float(os.getenv("OEMBED_NEGATIVE_TTL", "300"))
+        self.OEMBED_CACHE_MAX_ENTRIES: int = int(os.getenv("OEMBED_CACHE_MAX_ENTRIES", "5000"))
+
+        # Stratégie multi-tokens oEmbed : 'sequential' (défaut), 'hedged' (token suivant après
+        # OEMBED_HEDGE_DELAY secondes sans réponse) ou 'race' (tous les tokens en parallèle)
+        self.OEMBED_TOKEN_STRATEGY: str = os.getenv("OEMBED_TOKEN_STRATEGY", "sequential").lower()
+        self.OEMBED_HEDGE_DELAY: float = float(os.getenv("OEMBED_HEDGE_DELAY", "0.3"))
+
+        # Recherche plein texte : poids du score_trend dans le classement (0 = pertinence seule)
+        self.SEARCH_TREND_WEIGHT: float = float(os.getenv("SEARCH_TREND_WEIGHT", "0.2"))
+
+        # Scoring des tendances (services/trend_scoring.py) - intervalle 0 = tâche planifiée désactivée
+        self.TREND_WINDOW_DAYS: int = int(os.getenv("TREND_WINDOW_DAYS", "7"))
+        self.TREND_HALF_LIFE_HOURS: float = float(os.getenv("TREND_HALF_LIFE_HOURS", "48"))
+        self.TREND_BATCH_SIZE: int = int(os.getenv("TREND_BATCH_SIZE", "5000"))
+        self.TREND_SCORING_INTERVAL_MINUTES: float = float(os.getenv("TREND_SCORING_INTERVAL_MINUTES", "30"))
+
+        # Rollups analytics quotidiens recalculés à l'ingestion (sinon : passe de scoring / CLI)
+        self.ANALYTICS_ROLLUPS_ON_INGEST: bool = os.getenv("ANALYTICS_ROLLUPS_ON_INGEST", "true").lower() == "true"
+
+        # Relevés des compteurs des posts (série temporelle) - horaire puis quotidien, puis supprimés
+        self.METRICS_SNAPSHOTS_ENABLED: bool = os.getenv("METRICS_SNAPSHOTS_ENABLED", "true").lower() == "true"
+        self.METRICS_HOURLY_RETENTION_DAYS: int = int(os.getenv("METRICS_HOURLY_RETENTION_DAYS", "7"))
+        self.METRICS_RETENTION_DAYS: int = int(os.getenv("METRICS_RETENTION_DAYS", "365"))
+        self.METRICS_DOWNSAMPLE_LOOKBACK_DAYS: int = int(os.getenv("METRICS_DOWNSAMPLE_LOOKBACK_DAYS", "3"))
+        self.METRICS_MAINTENANCE_INTERVAL_MINUTES: float = float(os.getenv("METRICS_MAINTENANCE_INTERVAL_MINUTES", "60"))
+        # Vélocité du scoring : delta depuis le dernier relevé vieux d'au moins N heures (0 = engagement / âge)
+        self.TREND_VELOCITY_LOOKBACK_HOURS: float = float(os.getenv("TREND_VELOCITY_LOOKBACK_HOURS", "6"))
+
+        # Ingestion planifiée des projets actifs (hashtags, créateurs) - intervalle 0 = désactivée
+        self.INGESTION_INTERVAL_MINUTES: float = float(os.getenv("INGESTION_INTERVAL_MINUTES", "10"))
+        self.INGESTION_PROJECT_REFRESH_MINUTES: float = float(os.getenv("INGESTION_PROJECT_REFRESH_MINUTES", "60"))
+        self.INGESTION_MAX_JOBS_PER_ROUND: int = int(os.getenv("INGESTION_MAX_JOBS_PER_ROUND", "100"))
+        self.INGESTION_POSTS_PER_JOB: int = int(os.getenv("INGESTION_POSTS_PER_JOB", "25"))
+        # Budgets par plateforme : appels simultanés et appels upstream par heure glissante
+        self.INGESTION_INSTAGRAM_CONCURRENCY: int = int(os.getenv("INGESTION_INSTAGRAM_CONCURRENCY", "2"))
+        self.INGESTION_INSTAGRAM_CALLS_PER_HOUR: int = int(os.getenv("INGESTION_INSTAGRAM_CALLS_PER_HOUR", "120"))
+        self.INGESTION_TIKTOK_CONCURRENCY: int = int(os.getenv("INGESTION_TIKTOK_CONCURRENCY", "1"))
+        self.INGESTION_TIKTOK_CALLS_PER_HOUR: int = int(os.getenv("INGESTION_TIKTOK_CALLS_PER_HOUR", "60"))
+
+        # Endpoints "API d'abord, base en secours" (ig-public, tiktok/*) : mode api_first | swr
+        # swr : base servie si relevée il y a moins de API_SWR_MAX_STALE_SECONDS, rafraîchie en fond
+        # au-delà de API_SWR_REVALIDATE_AFTER_SECONDS ; appel live attendu au plus API_SWR_WAIT_SECONDS
+        # quand la base a une réponse (plus ancienne)
+        self.API_FALLBACK_MODE: str = os.getenv("API_FALLBACK_MODE", "api_first").lower()
+        if self.API_FALLBACK_MODE not in ("api_first", "swr"):
+            raise ValueError("API_FALLBACK_MODE must be 'api_first' or 'swr'")
+        self.API_SWR_REVALIDATE_AFTER_SECONDS: float = float(os.getenv("API_SWR_REVALIDATE_AFTER_SECONDS", "300"))
+        self.API_SWR_MAX_STALE_SECONDS: float = float(os.getenv("API_SWR_MAX_STALE_SECONDS", "86400"))
+        self.API_SWR_WAIT_SECONDS: float = float(os.getenv("API_SWR_WAIT_SECONDS", "2"))
+        # Disjoncteur par endpoint : ouvert après N échecs upstream consécutifs (5xx, réseau)
+        self.API_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("API_BREAKER_FAILURE_THRESHOLD", "5"))
+        self.API_BREAKER_RESET_SECONDS: float = float(os.getenv("API_BREAKER_RESET_SECONDS", "60"))
+
+        # Cache des utilisateurs authentifiés (token -> user) - TTL 0 = désactivé
+        self.AUTH_USER_CACHE_TTL: float = float(os.getenv("AUTH_USER_CACHE_TTL", "30"))
+        self.AUTH_USER_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_USER_CACHE_MAX_ENTRIES", "10000"))
+        # Version partagée des utilisateurs relue au plus toutes les N secondes (0 = à chaque requête)
+        self.AUTH_USER_CACHE_CHECK_SECONDS: float = float(os.getenv("AUTH_USER_CACHE_CHECK_SECONDS", "5"))
+
+        # Cache de référence (nom -> id des plateformes / hashtags) : version partagée relue au plus
+        # toutes les REFERENCE_CACHE_CHECK_SECONDS (0 = à chaque lookup)
+        self.REFERENCE_CACHE_CHECK_SECONDS: float = float(os.getenv("REFERENCE_CACHE_CHECK_SECONDS", "5"))
+
+        # Cache des réponses des dashboards (ETag / 304) - 0 entrée = pas de LRU des corps sérialisés
+        self.RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+        self.RESPONSE_CACHE_TTL: float = float(os.getenv("RESPONSE_CACHE_TTL", "600"))
+
+        # Compression GZip des réponses au-delà de GZIP_MIN_SIZE octets (0 = désactivée)
+        self.GZIP_MIN_SIZE: int = int(os.getenv("GZIP_MIN_SIZE", "1024"))
+        self.GZIP_COMPRESSLEVEL: int = int(os.getenv("GZIP_COMPRESSLEVEL", "6"))
+
+        # Statistiques SQL par requête - headers X-DB-Queries / X-DB-Time hors production
+        self.ENVIRONMENT: str = os.getenv("ENVIRONMENT", "production")
+        self.SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", "500"))
+        self.N_PLUS_ONE_THRESHOLD: int = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+
 # Instance globale
 settings = Settings()
\ No newline at end of file
@@ -1,60 +1,89 @@
 # core/middleware.py
-# Middleware pour le tracing et la gestion des erreurs
+# Middleware ASGI unique : tracing (Request ID), erreurs non gérées, headers de sécurité
 
 import uuid
 import logging
-from fastapi import Request, Response
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core import query_stats
+from core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Headers de sécurité posés sur toutes les réponses HTTP
+SECURITY_HEADERS = (
+    ("X-Content-Type-Options", "nosniff"),
+    ("X-Frame-Options", "DENY"),
+    ("X-XSS-Protection", "1; mode=block"),
+)
+HSTS_HEADER = ("Strict-Transport-Security", "max-age=31536000; includeSubDomains")
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    """Middleware pour ajouter un Request ID à chaque requête pour le tracing"""
-    
-    async def dispatch(self, request: Request, call_next):
-        # Générer ou récupérer le Request ID
-        request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
-        
-        # Ajouter le Request ID au contexte de la requête
-        request.state.request_id = request_id
-        
-        # Logger avec le Request ID
-        logger.info(f"[{request_id}] {request.method} {request.url.path}")
-        
-        try:
-            response = await call_next(request)
-            
-            # Ajouter le Request ID dans les headers de réponse
-            response.headers["X-Request-ID"] = request_id
-            
-            return response
-        except Exception as exc:
-            # Logger l'erreur avec le Request ID
-            logger.error(f"[{request_id}] Error: {exc}", exc_info=True)
-            raise
 
+class RequestContextMiddleware:
+    """
+    Middleware ASGI pur (pas de BaseHTTPMiddleware : ni tâche ni stream intermédiaire
+    par requête, le streaming des réponses est préservé). En une seule passe :
+
+    1. Request ID : repris de X-Request-ID ou généré, exposé dans request.state.request_id
+       et renvoyé dans le header X-Request-ID
+    2. Statistiques SQL de la requête (core.query_stats), headers X-DB-* hors production
+    3. Erreurs non gérées : loguées avec le Request ID, réponse 500 JSON standardisée
+       (les HTTPException sont déjà converties par FastAPI en amont)
+    4. Headers de sécurité ; HSTS si la requête est arrivée en HTTPS via le proxy Railway
+       (X-Forwarded-Proto). Pas de redirection HTTPS : Railway la gère déjà.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        request_id = request_headers.get("x-request-id") or str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = request_id
+        method, path = scope["method"], scope["path"]
+
+        # Railway termine le TLS et route en HTTP vers le conteneur
+        forwarded_proto = request_headers.get("x-forwarded-proto", "").lower()
+        if forwarded_proto and forwarded_proto not in ("https", "http"):
+            logger.warning(f"X-Forwarded-Proto inattendu: {forwarded_proto} pour {path}")
+        is_https_request = forwarded_proto == "https"
+        expose_db_stats = settings.ENVIRONMENT != "production"
+
+        logger.info(f"[{request_id}] {method} {path}")
+
+        # Comptage des requêtes SQL exécutées pour cette requête (threadpool compris)
+        stats, token = query_stats.start_request(request_id)
+        status_code = None
+
+        async def send_with_headers(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-ID"] = request_id
+                if expose_db_stats:
+                    headers["X-DB-Queries"] = str(stats.count)
+                    headers["X-DB-Time"] = f"{stats.milliseconds:.2f}"
+                for name, value in SECURITY_HEADERS:
+                    headers[name] = value
+                if is_https_request:
+                    headers[HSTS_HEADER[0]] = HSTS_HEADER[1]
+            await send(message)
 
-class ErrorHandlerMiddleware(BaseHTTPMiddleware):
-    """Middleware pour standardiser les réponses d'erreur non gérées"""
-    
-    async def dispatch(self, request: Request, call_next):
         try:
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send_with_headers)
         except Exception as exc:
-            request_id = getattr(request.state, "request_id", "unknown")
-            
-            # FastAPI gère déjà les HTTPException, on ne les intercepte pas
-            from fastapi import HTTPException
-            if isinstance(exc, HTTPException):
-                raise  # Laisser FastAPI gérer
-            
-            # Erreur inattendue - logger et retourner 500
             logger.error(f"[{request_id}] Unhandled error: {exc}", exc_info=True)
-            return JSONResponse(
+            if status_code is not None:
+                # Réponse déjà commencée : impossible d'envoyer une 500 propre
+                raise
+            response = JSONResponse(
                 status_code=500,
                 content={
                     "error": {
@@ -63,6 +92,7 @@ class ErrorHandlerMiddleware(BaseHTTPMiddleware):
                         "request_id": request_id,
                     }
                 },
-                headers={"X-Request-ID": request_id}
             )
-
+            await response(scope, receive, send_with_headers)
+        finally:
+            query_stats.end_request(stats, token, method, path, status_code)
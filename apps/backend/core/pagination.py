@@ -0,0 +1,122 @@
+# core/pagination.py
+# Pagination par clé (keyset) : curseurs opaques sur (clé de tri, id)
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, tuple_
+from sqlalchemy.orm import Query
+
+# Header de réponse portant le curseur de la page suivante (absent sur la dernière page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort: str, value: Any, row_id: Any) -> str:
+    """Curseur opaque (base64url) : nom du tri, valeur de la clé et id de la dernière ligne"""
+    payload = {"s": sort, "id": row_id}
+    if isinstance(value, datetime):
+        payload["dt"] = value.isoformat()
+    else:
+        payload["v"] = value
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, Any]:
+    """Retourne (valeur, id) ; 400 si le curseur est invalide ou émis pour un autre tri"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        value = datetime.fromisoformat(payload["dt"]) if "dt" in payload else payload.get("v")
+        row_id = payload["id"]
+        cursor_sort = payload["s"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Curseur invalide")
+    if cursor_sort != sort:
+        raise HTTPException(status_code=400, detail=f"Curseur émis pour le tri '{cursor_sort}', pas '{sort}'")
+    return value, row_id
+
+
+def keyset_order(column, id_column) -> List[Any]:
+    """Ordre stable (clé DESC NULLS LAST, id DESC), aligné sur les index composites"""
+    if column is id_column:
+        return [id_column.desc()]
+    return [column.desc().nullslast(), id_column.desc()]
+
+
+def keyset_sections(column, id_column, value: Any, row_id: Any) -> List[Any]:
+    """
+    Filtres successifs "strictement après (value, row_id)" pour keyset_order. Chacun est une
+    borne de parcours d'index sans OR : (clé, id) < (value, row_id) tant qu'il reste des clés
+    non nulles, puis la section clé IS NULL depuis le début. Un OR des deux empêcherait
+    PostgreSQL d'utiliser l'index (clé DESC NULLS LAST, id DESC) comme borne de départ.
+    """
+    if column is id_column:
+        return [id_column < row_id]
+    if value is None:
+        return [and_(column.is_(None), id_column < row_id)]
+    return [tuple_(column, id_column) < tuple_(value, row_id), column.is_(None)]
+
+
+def keyset_fetch(
+    query: Query,
+    column,
+    id_column,
+    limit: Optional[int],
+    after: Optional[Tuple[Any, Any]] = None,
+) -> List[Any]:
+    """
+    Lignes de `query` dans l'ordre keyset_order, après le curseur `after` (valeur, id).
+    Une requête par section de keyset_sections, arrêtée dès que `limit` lignes sont lues.
+    """
+    query = query.order_by(*keyset_order(column, id_column))
+    if after is None:
+        return (query.limit(limit) if limit else query).all()
+    rows: List[Any] = []
+    for section in keyset_sections(column, id_column, *after):
+        section_query = query.filter(section)
+        if limit:
+            section_query = section_query.limit(limit - len(rows))
+        rows.extend(section_query.all())
+        if limit and len(rows) >= limit:
+            break
+    return rows
+
+
+def paginate(
+    query: Query,
+    sort: str,
+    column,
+    id_column,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Applique l'ordre keyset et retourne (lignes, next_cursor).
+
+    Avec `cursor`, la page démarre après la dernière ligne de la page précédente
+    (coût constant, quelle que soit la profondeur). Sans curseur, le mode offset
+    (`skip`) est conservé pour compatibilité ; le curseur suivant est aussi renvoyé.
+    """
+    if cursor:
+        rows = keyset_fetch(query, column, id_column, limit + 1, decode_cursor(cursor, sort))
+    else:
+        query = query.order_by(*keyset_order(column, id_column))
+        if skip:
+            query = query.offset(skip)
+        rows = query.limit(limit + 1).all()
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(sort, getattr(last, column.key), getattr(last, id_column.key))
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,116 @@
+# core/query_stats.py
+# Compteur de requêtes SQL par requête HTTP, détection N+1 et log des requêtes lentes
+#
+# Les hooks sont posés sur la classe Engine : moteur sync et moteur async (sync_engine) compris.
+
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_START_KEY = "query_stats_start"
+_MAX_LOGGED_SQL = 500
+
+
+class RequestQueryStats:
+    """Requêtes exécutées pendant une requête HTTP (nombre, temps DB, formes répétées)"""
+
+    __slots__ = ("request_id", "count", "seconds", "shapes")
+
+    def __init__(self, request_id: str) -> None:
+        self.request_id = request_id
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+
+    @property
+    def milliseconds(self) -> float:
+        return round(self.seconds * 1000, 2)
+
+    def repeated_shapes(self, threshold: int):
+        """Formes de requête exécutées au moins `threshold` fois (N+1 probable)"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def start_request(request_id: str):
+    """Active le comptage pour la requête courante ; retourne (stats, token pour end_request)"""
+    stats = RequestQueryStats(request_id)
+    return stats, _current.set(stats)
+
+
+def end_request(stats: RequestQueryStats, token, method: str, path: str, status_code: Optional[int] = None) -> None:
+    """Désactive le comptage et journalise le bilan (et les N+1 probables)"""
+    _current.reset(token)
+    if not stats.count:
+        return
+    logger.info(
+        f"[{stats.request_id}] {method} {path} -> {status_code}: "
+        f"{stats.count} queries, {stats.milliseconds} ms DB"
+    )
+    for shape, count in stats.repeated_shapes(settings.N_PLUS_ONE_THRESHOLD):
+        logger.warning(f"[{stats.request_id}] Possible N+1 on {method} {path}: {count}x {_truncate(shape)}")
+
+
+def _truncate(statement: str) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= _MAX_LOGGED_SQL else statement[:_MAX_LOGGED_SQL] + "..."
+
+
+def _redact(parameters: Any) -> Any:
+    """Remplace les valeurs par leur type : les logs ne contiennent ni tokens ni données utilisateur"""
+    if isinstance(parameters, dict):
+        return {key: _redact(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if len(parameters) > 10:
+            return f"<{len(parameters)} values>"
+        return [_redact(value) for value in parameters]
+    if parameters is None:
+        return None
+    return f"<{type(parameters).__name__}>"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    starts = conn.info.get(_START_KEY)
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+        stats.shapes[statement] += 1
+
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        request_id = stats.request_id if stats is not None else "-"
+        logger.warning(
+            f"[{request_id}] Slow query ({elapsed * 1000:.1f} ms{', executemany' if executemany else ''}): "
+            f"{_truncate(statement)} params={_redact(parameters)}"
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context) -> None:
+    # after_cursor_execute n'est pas appelé en cas d'erreur : dépiler le chrono
+    connection = exception_context.connection
+    if connection is not None:
+        starts = connection.info.get(_START_KEY)
+        if starts:
+            starts.pop()
@@ -0,0 +1,91 @@
+# core/responses.py
+# Sérialisation JSON rapide (orjson) des grandes listes : lignes projetées sur les champs
+# d'un schéma de réponse, sans instancier ni re-valider les modèles Pydantic
+
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, Tuple, Type
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+# UTC en "Z" et naïfs sans offset, comme la sérialisation JSON de Pydantic
+_ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", by_alias=True)
+    raise TypeError(f"Type non sérialisable en JSON: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Réponse JSON sérialisée par orjson (opt-in). Le contenu est supposé déjà conforme
+    au schéma (lignes typées par la DB, cf. SchemaRows) : aucune validation ici.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _decode_json(value: Any) -> Any:
+    """Colonne Text contenant du JSON (JSONType / ArrayType) -> valeur décodée, None si illisible"""
+    if not isinstance(value, (str, bytes)):
+        return value
+    try:
+        return orjson.loads(value)
+    except orjson.JSONDecodeError:
+        return None
+
+
+class SchemaRows:
+    """
+    Projection de lignes (instances ORM, Row SQLAlchemy ou dicts) sur les champs d'un
+    schéma de réponse : même ordre de clés, alias et valeurs par défaut que le modèle,
+    sans construire d'instance. Réservé aux schémas plats dont les types correspondent
+    aux colonnes lues ; `json_fields` : champs stockés en texte JSON, décodés à la projection.
+    """
+
+    def __init__(self, schema: Type[BaseModel], json_fields: Iterable[str] = ()) -> None:
+        self.schema = schema
+        json_fields = set(json_fields)
+        self._fields: List[Tuple[str, str, Any, bool]] = [
+            (
+                name,
+                field.serialization_alias or field.alias or name,
+                field.get_default(call_default_factory=True),
+                name in json_fields,
+            )
+            for name, field in schema.model_fields.items()
+        ]
+
+    def from_attributes(self, obj: Any) -> Dict[str, Any]:
+        return {
+            key: _decode_json(getattr(obj, name, default)) if decode else getattr(obj, name, default)
+            for name, key, default, decode in self._fields
+        }
+
+    def from_values(self, values: Mapping[str, Any]) -> Dict[str, Any]:
+        return {
+            key: _decode_json(values.get(name, default)) if decode else values.get(name, default)
+            for name, key, default, decode in self._fields
+        }
+
+    def many(self, rows: List[Any]) -> List[Dict[str, Any]]:
+        project = self.from_values if rows and isinstance(rows[0], Mapping) else self.from_attributes
+        return [project(row) for row in rows]
+
+
+@lru_cache(maxsize=None)
+def schema_rows(schema: Type[BaseModel], json_fields: Tuple[str, ...] = ()) -> SchemaRows:
+    return SchemaRows(schema, json_fields)
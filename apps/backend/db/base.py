@@ -1,19 +1,62 @@
 # db/base.py
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
+from db.pool import PoolMetrics, engine_options, install_statement_timeout, pool_stats
+
 # PRODUCTION: Utiliser DATABASE_URL ou échouer
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable must be set!")
 
+# Pools configurés par variables DB_* (db/pool.py)
+sync_pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+
 engine = create_engine(
     DATABASE_URL,
-    echo=False  # Mettre à True pour voir les requêtes SQL
+    echo=False,  # Mettre à True pour voir les requêtes SQL
+    **engine_options(make_url(DATABASE_URL), sync_pool_metrics),
 )
+install_statement_timeout(engine)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+
+def _async_engine_args(url: str):
+    """URL et connect_args du moteur async (asyncpg / aiosqlite) dérivés de DATABASE_URL"""
+    async_url = make_url(url)
+    connect_args = {}
+    if async_url.get_backend_name() in ("postgres", "postgresql"):
+        async_url = async_url.set(drivername="postgresql+asyncpg")
+        # asyncpg ne connaît pas sslmode (libpq) : traduit en argument ssl
+        sslmode = async_url.query.get("sslmode")
+        if sslmode:
+            async_url = async_url.difference_update_query(["sslmode"])
+            connect_args["ssl"] = sslmode
+    elif async_url.get_backend_name() == "sqlite":
+        async_url = async_url.set(drivername="sqlite+aiosqlite")
+    return async_url, connect_args
+
+
+# Moteur async pour les routers async (Meta, TikTok) : les requêtes n'occupent plus
+# la boucle d'événements. ASYNC_DATABASE_URL permet de forcer l'URL telle quelle (autre driver).
+if os.getenv("ASYNC_DATABASE_URL"):
+    ASYNC_DATABASE_URL, _async_connect_args = make_url(os.environ["ASYNC_DATABASE_URL"]), {}
+else:
+    ASYNC_DATABASE_URL, _async_connect_args = _async_engine_args(DATABASE_URL)
+_async_options = engine_options(ASYNC_DATABASE_URL, async_pool_metrics, is_async=True)
+_async_options["connect_args"] = {**_async_options.get("connect_args", {}), **_async_connect_args}
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=False,
+    **_async_options,
+)
+install_statement_timeout(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Dependency pour FastAPI
@@ -24,3 +67,17 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def db_pool_stats() -> dict:
+    """Occupation et attente des pools sync et async (exposé par /api/v1/internal/metrics/db)"""
+    return {
+        "sync": pool_stats(engine, sync_pool_metrics),
+        "async": pool_stats(async_engine.sync_engine, async_pool_metrics),
+    }
+
+
+async def get_async_db():
+    """Dependency pour les endpoints async : session AsyncSession (aucun appel bloquant sur la boucle)"""
+    async with AsyncSessionLocal() as db:
+        yield db
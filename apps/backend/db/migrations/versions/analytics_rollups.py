@@ -0,0 +1,117 @@
+"""Rollups analytics quotidiens + vue hashtags_with_stats et fonction get_trending_posts
+
+Revision ID: analytics_rollups
+Revises: content_versions
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'analytics_rollups'
+down_revision: Union[str, None] = 'content_versions'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _aggregate_columns():
+    return [
+        sa.Column("post_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("score_sum", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("score_max", sa.Float()),
+        sa.Column("score_trend_sum", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("score_trend_max", sa.Float()),
+        sa.Column("like_sum", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("comment_sum", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("share_sum", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("view_sum", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime()),
+    ]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    # Les tables peuvent déjà exister si l'app a démarré avant la migration (create_all)
+    if not inspector.has_table("platform_daily_rollups"):
+        op.create_table(
+            "platform_daily_rollups",
+            sa.Column("platform_id", sa.Integer(), sa.ForeignKey("platforms.id"), primary_key=True),
+            sa.Column("day", sa.Date(), primary_key=True),
+            *_aggregate_columns(),
+        )
+        op.create_index("ix_platform_daily_rollups_day", "platform_daily_rollups", ["day"])
+    if not inspector.has_table("hashtag_daily_rollups"):
+        op.create_table(
+            "hashtag_daily_rollups",
+            sa.Column("hashtag_id", sa.Integer(), sa.ForeignKey("hashtags.id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("day", sa.Date(), primary_key=True),
+            *_aggregate_columns(),
+        )
+        op.create_index("ix_hashtag_daily_rollups_day", "hashtag_daily_rollups", ["day"])
+
+    # Vue et fonction SQL : PostgreSQL uniquement
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    # Colonnes dans l'ordre lu par analytics_endpoints (id, name, platform, total_posts, ...)
+    op.execute("DROP VIEW IF EXISTS hashtags_with_stats")
+    op.execute("""
+        CREATE VIEW hashtags_with_stats AS
+        SELECT
+            h.id,
+            h.name,
+            pl.name AS platform,
+            COALESCE(SUM(r.post_count), 0) AS total_posts,
+            SUM(r.like_sum + r.comment_sum + r.share_sum)::float / NULLIF(SUM(r.post_count), 0) AS avg_engagement,
+            h.last_scraped,
+            h.updated_at
+        FROM hashtags h
+        JOIN platforms pl ON pl.id = h.platform_id
+        LEFT JOIN hashtag_daily_rollups r ON r.hashtag_id = h.id
+        GROUP BY h.id, h.name, pl.name, h.last_scraped, h.updated_at
+    """)
+
+    # Les rollups bornent la plage de posted_at lue : seuls les jours ayant des posts
+    # tendance (score_trend_max > 0) ; l'ordre vient de l'index ix_posts_score_trend_id
+    op.execute("DROP FUNCTION IF EXISTS get_trending_posts(text, integer)")
+    op.execute("""
+        CREATE FUNCTION get_trending_posts(platform_name text, result_limit integer)
+        RETURNS TABLE (
+            post_id text,
+            author varchar,
+            caption text,
+            score double precision,
+            score_trend double precision,
+            posted_at timestamp
+        ) AS $$
+            WITH trending_days AS (
+                SELECT MIN(r.day) AS first_day
+                FROM platform_daily_rollups r
+                JOIN platforms rp ON rp.id = r.platform_id
+                WHERE r.score_trend_max > 0
+                  AND (platform_name IS NULL OR rp.name = platform_name)
+            )
+            SELECT p.id, p.author, p.caption, p.score, p.score_trend, p.posted_at
+            FROM posts p
+            JOIN platforms pl ON pl.id = p.platform_id
+            CROSS JOIN trending_days d
+            WHERE p.score_trend > 0
+              AND (platform_name IS NULL OR pl.name = platform_name)
+              AND p.posted_at >= COALESCE(d.first_day, '-infinity'::date)
+            ORDER BY p.score_trend DESC, p.id DESC
+            LIMIT result_limit
+        $$ LANGUAGE sql STABLE
+    """)
+
+    # Remplissage initial : python -m services.analytics_rollups --full --if-empty (lancé par start.sh)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP FUNCTION IF EXISTS get_trending_posts(text, integer)")
+        op.execute("DROP VIEW IF EXISTS hashtags_with_stats")
+    op.drop_table("hashtag_daily_rollups")
+    op.drop_table("platform_daily_rollups")
@@ -0,0 +1,32 @@
+"""Versions de contenu (ETags des dashboards)
+
+Revision ID: content_versions
+Revises: post_read_models
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'content_versions'
+down_revision: Union[str, None] = 'post_read_models'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # La table peut déjà exister si l'app a démarré avant la migration (create_all)
+    if sa.inspect(op.get_bind()).has_table("content_versions"):
+        return
+    op.create_table(
+        "content_versions",
+        sa.Column("scope", sa.String(100), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("content_versions")
@@ -0,0 +1,47 @@
+"""Budget horaire et lectures de projets de l'ingestion planifiée partagés entre workers
+
+Revision ID: ingestion_shared_state
+Revises: trending_posts_index_scan
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'ingestion_shared_state'
+down_revision: Union[str, None] = 'trending_posts_index_scan'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    # Les tables peuvent déjà exister si l'app a démarré avant la migration (create_all) ;
+    # projects n'est créée que par create_all : project_reads le sera avec elle sinon
+    if inspector.has_table("projects") and not inspector.has_table("project_reads"):
+        op.create_table(
+            "project_reads",
+            sa.Column(
+                "project_id", postgresql.UUID(as_uuid=True),
+                sa.ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True,
+            ),
+            sa.Column("read_count", sa.Integer(), nullable=False, server_default="0"),
+        )
+    if not inspector.has_table("ingestion_calls"):
+        op.create_table(
+            "ingestion_calls",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("platform", sa.String(50), nullable=False),
+            sa.Column("called_at", sa.DateTime(), nullable=False),
+            sa.Column("calls", sa.Integer(), nullable=False),
+        )
+        op.create_index("ix_ingestion_calls_platform_called_at", "ingestion_calls", ["platform", "called_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("ingestion_calls")
+    op.execute("DROP TABLE IF EXISTS project_reads")
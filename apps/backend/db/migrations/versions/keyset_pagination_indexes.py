@@ -0,0 +1,39 @@
+"""Index composites pour la pagination par clé des posts
+
+Revision ID: keyset_pagination_indexes
+Revises: posts_search
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'keyset_pagination_indexes'
+down_revision: Union[str, None] = 'posts_search'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Même ordre que core.pagination.keyset_order : (clé DESC NULLS LAST, id DESC)
+INDEXES = {
+    "ix_posts_posted_at_id": "posts (posted_at DESC NULLS LAST, id DESC)",
+    "ix_posts_score_trend_id": "posts (score_trend DESC NULLS LAST, id DESC)",
+    "ix_posts_platform_posted_at_id": "posts (platform_id, posted_at DESC NULLS LAST, id DESC)",
+}
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY : PostgreSQL uniquement
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES.items():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
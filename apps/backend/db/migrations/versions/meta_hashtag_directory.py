@@ -0,0 +1,44 @@
+"""Annuaire hashtag -> id Meta et quota ig_hashtag_search par utilisateur IG
+
+Revision ID: meta_hashtag_directory
+Revises: oauth_ig_business_accounts
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'meta_hashtag_directory'
+down_revision: Union[str, None] = 'oauth_ig_business_accounts'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    # Les tables peuvent déjà exister si l'app a démarré avant la migration (create_all)
+    if not inspector.has_table("meta_hashtag_ids"):
+        op.create_table(
+            "meta_hashtag_ids",
+            sa.Column("name", sa.String(255), primary_key=True),
+            sa.Column("meta_hashtag_id", sa.String(64)),
+            sa.Column("resolved_at", sa.DateTime(), nullable=False),
+        )
+    if not inspector.has_table("meta_hashtag_searches"):
+        op.create_table(
+            "meta_hashtag_searches",
+            sa.Column("ig_user_id", sa.String(64), primary_key=True),
+            sa.Column("name", sa.String(255), primary_key=True),
+            sa.Column("searched_at", sa.DateTime(), nullable=False),
+        )
+        op.create_index(
+            "ix_meta_hashtag_searches_user_searched_at", "meta_hashtag_searches", ["ig_user_id", "searched_at"],
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("meta_hashtag_searches")
+    op.drop_table("meta_hashtag_ids")
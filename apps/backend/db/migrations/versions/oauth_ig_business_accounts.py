@@ -0,0 +1,29 @@
+"""Compte Instagram Business résolu par compte OAuth (oauth_accounts)
+
+Revision ID: oauth_ig_business_accounts
+Revises: post_metric_snapshots
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'oauth_ig_business_accounts'
+down_revision: Union[str, None] = 'post_metric_snapshots'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("oauth_accounts")}
+    if "ig_business_account_id" not in columns:
+        op.add_column("oauth_accounts", sa.Column("ig_business_account_id", sa.Text()))
+    if "ig_business_account_checked_at" not in columns:
+        op.add_column("oauth_accounts", sa.Column("ig_business_account_checked_at", sa.DateTime()))
+
+
+def downgrade() -> None:
+    op.drop_column("oauth_accounts", "ig_business_account_checked_at")
+    op.drop_column("oauth_accounts", "ig_business_account_id")
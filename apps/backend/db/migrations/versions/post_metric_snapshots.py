@@ -0,0 +1,83 @@
+"""Relevés des métriques des posts - table partitionnée par mois (captured_at)
+
+Revision ID: post_metric_snapshots
+Revises: analytics_rollups
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'post_metric_snapshots'
+down_revision: Union[str, None] = 'analytics_rollups'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partitions créées d'avance ; les suivantes par services.metric_snapshots.ensure_partitions
+MONTHS_AHEAD = 2
+
+
+def _next_month(month: datetime) -> datetime:
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # Partitionnement déclaratif : PostgreSQL uniquement (ailleurs, table simple via create_all)
+    if bind.dialect.name != "postgresql":
+        return
+    # create_all (démarrage de l'app) a pu créer une table non partitionnée : elle est reprise
+    legacy = sa.inspect(bind).has_table("post_metric_snapshots")
+    if legacy:
+        partitioned = bind.execute(sa.text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('post_metric_snapshots'))"
+        )).scalar()
+        if partitioned:
+            return
+        op.rename_table("post_metric_snapshots", "post_metric_snapshots_legacy")
+        op.execute("ALTER TABLE post_metric_snapshots_legacy RENAME CONSTRAINT post_metric_snapshots_pkey TO post_metric_snapshots_legacy_pkey")
+
+    op.execute("""
+        CREATE TABLE post_metric_snapshots (
+            post_id text NOT NULL,
+            captured_at timestamp NOT NULL,
+            like_count bigint,
+            comment_count bigint,
+            share_count bigint,
+            view_count bigint,
+            PRIMARY KEY (post_id, captured_at)
+        ) PARTITION BY RANGE (captured_at)
+    """)
+
+    now = datetime.utcnow()
+    first_month = datetime(now.year, now.month, 1)
+    if legacy:
+        oldest = bind.execute(sa.text("SELECT MIN(captured_at) FROM post_metric_snapshots_legacy")).scalar()
+        if oldest is not None:
+            first_month = min(first_month, datetime(oldest.year, oldest.month, 1))
+
+    month = first_month
+    last_month = datetime(now.year, now.month, 1)
+    for _ in range(MONTHS_AHEAD):
+        last_month = _next_month(last_month)
+    while month <= last_month:
+        op.execute(
+            f"CREATE TABLE post_metric_snapshots_{month:%Y_%m} PARTITION OF post_metric_snapshots "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_next_month(month):%Y-%m-%d}')"
+        )
+        month = _next_month(month)
+    # Filet de sécurité si la maintenance n'a pas créé la partition du mois
+    op.execute("CREATE TABLE post_metric_snapshots_default PARTITION OF post_metric_snapshots DEFAULT")
+
+    if legacy:
+        op.execute("INSERT INTO post_metric_snapshots SELECT post_id, captured_at, like_count, comment_count, share_count, view_count FROM post_metric_snapshots_legacy")
+        op.drop_table("post_metric_snapshots_legacy")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP TABLE IF EXISTS post_metric_snapshots CASCADE")
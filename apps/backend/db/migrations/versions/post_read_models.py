@@ -0,0 +1,42 @@
+"""Read model des posts (champs dérivés calculés à l'ingestion)
+
+Revision ID: post_read_models
+Revises: keyset_pagination_indexes
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'post_read_models'
+down_revision: Union[str, None] = 'keyset_pagination_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # La table peut déjà exister si l'app a démarré avant la migration (create_all)
+    if sa.inspect(op.get_bind()).has_table("post_read_models"):
+        return
+    op.create_table(
+        "post_read_models",
+        sa.Column("post_id", sa.Text(), sa.ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("author", sa.String(255)),
+        sa.Column("permalink", sa.Text()),
+        sa.Column("media_url", sa.Text()),
+        sa.Column("thumbnail_url", sa.Text()),
+        sa.Column("media_type", sa.String(50)),
+        sa.Column("like_count", sa.BigInteger()),
+        sa.Column("comment_count", sa.BigInteger()),
+        sa.Column("share_count", sa.BigInteger()),
+        sa.Column("view_count", sa.BigInteger()),
+        sa.Column("hashtags", sa.Text()),
+        sa.Column("mentions", sa.Text()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("post_read_models")
@@ -0,0 +1,39 @@
+"""Compte connecté propriétaire d'un post (posts.owner_id) pour les réponses servies depuis la base
+
+Revision ID: posts_owner_id
+Revises: meta_hashtag_directory
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'posts_owner_id'
+down_revision: Union[str, None] = 'meta_hashtag_directory'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = "ix_posts_platform_owner_fetched_at"
+
+
+def upgrade() -> None:
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("posts")}
+    if "owner_id" not in columns:
+        op.add_column("posts", sa.Column("owner_id", sa.Text()))
+    # CREATE INDEX CONCURRENTLY : PostgreSQL uniquement
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} "
+            "ON posts (platform_id, owner_id, fetched_at DESC NULLS LAST)"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}")
+    op.drop_column("posts", "owner_id")
@@ -0,0 +1,78 @@
+"""Posts full-text search - tsvector maintenu par trigger + index GIN / pg_trgm
+
+Revision ID: posts_search
+Revises: initial_schema
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'posts_search'
+down_revision: Union[str, None] = 'initial_schema'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Config 'simple' : captions multilingues, pas de stemming (les hashtags restent exacts)
+SEARCH_VECTOR_EXPRESSION = """
+    setweight(to_tsvector('simple', coalesce({row}caption, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce({row}hashtags::text, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce({row}author, '')), 'C')
+"""
+
+
+def upgrade() -> None:
+    # Extensions, tsvector, triggers et index GIN : PostgreSQL uniquement (SQLite en dev : create_all)
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.execute("ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector")
+
+    # Trigger plutôt qu'une colonne GENERATED : le cast hashtags::text n'est pas IMMUTABLE
+    # quand la colonne est un tableau
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION posts_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {SEARCH_VECTOR_EXPRESSION.format(row='NEW.')};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP TRIGGER IF EXISTS posts_search_vector_trigger ON posts")
+    op.execute("""
+        CREATE TRIGGER posts_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF caption, hashtags, author ON posts
+        FOR EACH ROW EXECUTE FUNCTION posts_search_vector_update()
+    """)
+
+    # Backfill des posts existants
+    op.execute(f"UPDATE posts SET search_vector = {SEARCH_VECTOR_EXPRESSION.format(row='')}")
+
+    # Index construits sans bloquer les écritures (hors transaction)
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_posts_search_vector "
+            "ON posts USING gin (search_vector)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_posts_caption_trgm "
+            "ON posts USING gin (caption gin_trgm_ops)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_hashtags_name_trgm "
+            "ON hashtags USING gin (name gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_hashtags_name_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_posts_caption_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_posts_search_vector")
+    op.execute("DROP TRIGGER IF EXISTS posts_search_vector_trigger ON posts")
+    op.execute("DROP FUNCTION IF EXISTS posts_search_vector_update()")
+    op.execute("ALTER TABLE posts DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,78 @@
+"""get_trending_posts sans borne posted_at issue des rollups : lecture de ix_posts_score_trend_id
+
+Revision ID: trending_posts_index_scan
+Revises: posts_owner_id
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'trending_posts_index_scan'
+down_revision: Union[str, None] = 'posts_owner_id'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Fonction SQL PostgreSQL : rien à faire sur une autre base
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    # MIN(day) des rollups ayant score_trend_max > 0 ne bornait rien (un seul vieux jour tendance
+    # suffit à tout relire) et écartait les posts sans posted_at. Le tri suit l'index
+    # ix_posts_score_trend_id (NULLS LAST compris) : le parcours s'arrête après result_limit lignes.
+    op.execute("DROP FUNCTION IF EXISTS get_trending_posts(text, integer)")
+    op.execute("""
+        CREATE FUNCTION get_trending_posts(platform_name text, result_limit integer)
+        RETURNS TABLE (
+            post_id text,
+            author varchar,
+            caption text,
+            score double precision,
+            score_trend double precision,
+            posted_at timestamp
+        ) AS $$
+            SELECT p.id, p.author, p.caption, p.score, p.score_trend, p.posted_at
+            FROM posts p
+            JOIN platforms pl ON pl.id = p.platform_id
+            WHERE p.score_trend > 0
+              AND (platform_name IS NULL OR pl.name = platform_name)
+            ORDER BY p.score_trend DESC NULLS LAST, p.id DESC
+            LIMIT result_limit
+        $$ LANGUAGE sql STABLE
+    """)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP FUNCTION IF EXISTS get_trending_posts(text, integer)")
+    op.execute("""
+        CREATE FUNCTION get_trending_posts(platform_name text, result_limit integer)
+        RETURNS TABLE (
+            post_id text,
+            author varchar,
+            caption text,
+            score double precision,
+            score_trend double precision,
+            posted_at timestamp
+        ) AS $$
+            WITH trending_days AS (
+                SELECT MIN(r.day) AS first_day
+                FROM platform_daily_rollups r
+                JOIN platforms rp ON rp.id = r.platform_id
+                WHERE r.score_trend_max > 0
+                  AND (platform_name IS NULL OR rp.name = platform_name)
+            )
+            SELECT p.id, p.author, p.caption, p.score, p.score_trend, p.posted_at
+            FROM posts p
+            JOIN platforms pl ON pl.id = p.platform_id
+            CROSS JOIN trending_days d
+            WHERE p.score_trend > 0
+              AND (platform_name IS NULL OR pl.name = platform_name)
+              AND p.posted_at >= COALESCE(d.first_day, '-infinity'::date)
+            ORDER BY p.score_trend DESC, p.id DESC
+            LIMIT result_limit
+        $$ LANGUAGE sql STABLE
+    """)
@@ -4,7 +4,7 @@
 
 import uuid
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, UniqueConstraint, Float
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Date, DateTime, Boolean, ForeignKey, UniqueConstraint, Float, Index
 from sqlalchemy.dialects.postgresql import JSONB, ARRAY, UUID
 from sqlalchemy.orm import relationship
 from db.base import Base
@@ -50,6 +50,10 @@ class OAuthAccount(Base):
     scopes = Column(ArrayType)  # array des scopes accordés
     created_at = Column(DateTime, default=dt.datetime.utcnow)
     
+    # Compte Instagram Business résolu via les Pages du token (Meta) - NULL = aucun
+    ig_business_account_id = Column(Text)
+    ig_business_account_checked_at = Column(DateTime)
+    
     # Relations
     user = relationship("User", back_populates="oauth_accounts")
     
@@ -85,6 +89,29 @@ class Hashtag(Base):
     # Relations
     platform = relationship("Platform")
 
+class MetaHashtagId(Base):
+    """
+    Annuaire nom de hashtag -> id Meta (résultat de ig_hashtag_search, stable dans le temps).
+    Indépendant de `hashtags` : couvre aussi les tags cherchés sans être suivis.
+    """
+    __tablename__ = "meta_hashtag_ids"
+    
+    name = Column(String(255), primary_key=True)  # normalisé (normalize_hashtag)
+    meta_hashtag_id = Column(String(64))  # NULL = hashtag inconnu de Meta (résultat négatif)
+    resolved_at = Column(DateTime, nullable=False, default=dt.datetime.utcnow)
+
+class MetaHashtagSearch(Base):
+    """Recherches ig_hashtag_search par utilisateur IG : quota de hashtags uniques sur 7 jours glissants"""
+    __tablename__ = "meta_hashtag_searches"
+    
+    ig_user_id = Column(String(64), primary_key=True)
+    name = Column(String(255), primary_key=True)
+    searched_at = Column(DateTime, nullable=False)  # début de la fenêtre de 7 jours de ce hashtag
+    
+    __table_args__ = (
+        Index("ix_meta_hashtag_searches_user_searched_at", "ig_user_id", "searched_at"),
+    )
+
 class PostHashtag(Base):
     """Table de liaison posts-hashtags"""
     __tablename__ = "post_hashtags"
@@ -124,9 +151,11 @@ class Post(Base):
     api_payload = Column(JSONType)
     last_fetch_at = Column(DateTime)
     source = Column(String(50), default='seed_demo')
+    owner_id = Column(Text)  # compte connecté dont provient le post (open_id TikTok pour video/list)
     
     # Relations
     platform = relationship("Platform")
+    read_model = relationship("PostReadModel", uselist=False, passive_deletes=True)
     
     # Contraintes
     __table_args__ = (
@@ -134,6 +163,81 @@ class Post(Base):
         UniqueConstraint('external_id', name='uq_posts_external_id'),
     )
 
+class PostReadModel(Base):
+    """Champs dérivés d'un post, calculés à l'ingestion (projection directe pour les listes)"""
+    __tablename__ = "post_read_models"
+    
+    post_id = Column(Text, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    author = Column(String(255))  # author résolu (payload / permalink si vide)
+    permalink = Column(Text)
+    media_url = Column(Text)
+    thumbnail_url = Column(Text)
+    media_type = Column(String(50))
+    like_count = Column(BigInteger)
+    comment_count = Column(BigInteger)
+    share_count = Column(BigInteger)
+    view_count = Column(BigInteger)
+    hashtags = Column(ArrayType)  # JSON: ['#tag', ...]
+    mentions = Column(ArrayType)  # JSON: ['@user', ...]
+    updated_at = Column(DateTime, default=dt.datetime.utcnow, onupdate=dt.datetime.utcnow)
+
+class ContentVersion(Base):
+    """Version du contenu d'un périmètre (posts, projet) : base des ETags des dashboards"""
+    __tablename__ = "content_versions"
+    
+    scope = Column(String(100), primary_key=True)  # "posts", "trend_scores", "project:<uuid>"
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=dt.datetime.utcnow, onupdate=dt.datetime.utcnow)
+
+class PostMetricSnapshot(Base):
+    """
+    Relevés successifs des compteurs d'un post (append-only), partitionné par mois sous
+    PostgreSQL (migration post_metric_snapshots). Pas de FK vers posts : les relevés d'un
+    post supprimé expirent avec la rétention.
+    """
+    __tablename__ = "post_metric_snapshots"
+    
+    post_id = Column(Text, primary_key=True)
+    captured_at = Column(DateTime, primary_key=True)
+    like_count = Column(BigInteger)
+    comment_count = Column(BigInteger)
+    share_count = Column(BigInteger)
+    view_count = Column(BigInteger)
+
+class PlatformDailyRollup(Base):
+    """Agrégats quotidiens des posts par plateforme (jour = date de posted_at), base des analytics"""
+    __tablename__ = "platform_daily_rollups"
+    
+    platform_id = Column(Integer, ForeignKey("platforms.id"), primary_key=True)
+    day = Column(Date, primary_key=True, index=True)
+    post_count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0)
+    score_max = Column(Float)
+    score_trend_sum = Column(Float, nullable=False, default=0)
+    score_trend_max = Column(Float)
+    like_sum = Column(BigInteger, nullable=False, default=0)
+    comment_sum = Column(BigInteger, nullable=False, default=0)
+    share_sum = Column(BigInteger, nullable=False, default=0)
+    view_sum = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=dt.datetime.utcnow, onupdate=dt.datetime.utcnow)
+
+class HashtagDailyRollup(Base):
+    """Agrégats quotidiens des posts par hashtag (via post_hashtags)"""
+    __tablename__ = "hashtag_daily_rollups"
+    
+    hashtag_id = Column(Integer, ForeignKey("hashtags.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True, index=True)
+    post_count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0)
+    score_max = Column(Float)
+    score_trend_sum = Column(Float, nullable=False, default=0)
+    score_trend_max = Column(Float)
+    like_sum = Column(BigInteger, nullable=False, default=0)
+    comment_sum = Column(BigInteger, nullable=False, default=0)
+    share_sum = Column(BigInteger, nullable=False, default=0)
+    view_sum = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=dt.datetime.utcnow, onupdate=dt.datetime.utcnow)
+
 class Subscription(Base):
     """Abonnements et quotas utilisateur"""
     __tablename__ = "subscriptions"
@@ -227,4 +331,24 @@ class ProjectCreator(Base):
     # Contraintes
     __table_args__ = (
         UniqueConstraint('project_id', 'platform_id', 'creator_username', name='uq_project_creator'),
+    )
+
+class ProjectRead(Base):
+    """Lectures d'un projet depuis les dernières passes d'ingestion (priorité de rafraîchissement), tous workers confondus"""
+    __tablename__ = "project_reads"
+    
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    read_count = Column(Integer, nullable=False, default=0)
+
+class IngestionCall(Base):
+    """Appels upstream réservés par les passes d'ingestion : budget horaire glissant par plateforme"""
+    __tablename__ = "ingestion_calls"
+    
+    id = Column(Integer, primary_key=True)
+    platform = Column(String(50), nullable=False)
+    called_at = Column(DateTime, nullable=False)
+    calls = Column(Integer, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_ingestion_calls_platform_called_at", "platform", "called_at"),
     )
\ No newline at end of file
@@ -0,0 +1,181 @@
+# db/pool.py
+# Configuration des pools de connexions (variables DB_*) et télémétrie (attente au checkout)
+
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
+
+# Bornes (ms) de l'histogramme d'attente d'une connexion
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+class PoolConfig:
+    """
+    Pools par worker et par moteur (sync + async) : le total de connexions ouvertes vaut
+    workers × (DB_POOL_SIZE + DB_MAX_OVERFLOW + DB_ASYNC_POOL_SIZE + DB_ASYNC_MAX_OVERFLOW).
+    DB_POOL_SIZE=0 : pas de pool applicatif (NullPool), p. ex. derrière PgBouncer.
+    """
+
+    def __init__(self) -> None:
+        self.pool_size = _env_int("DB_POOL_SIZE", 5)
+        self.max_overflow = _env_int("DB_MAX_OVERFLOW", 10)
+        # Moteur async : endpoints Meta / TikTok seulement (requêtes courtes) ; petit pool par défaut,
+        # sans pool applicatif lui aussi si DB_POOL_SIZE=0
+        self.async_pool_size = _env_int("DB_ASYNC_POOL_SIZE", 2 if self.pool_size > 0 else 0)
+        self.async_max_overflow = _env_int("DB_ASYNC_MAX_OVERFLOW", 3)
+        self.pool_timeout = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+        self.pool_recycle = _env_int("DB_POOL_RECYCLE", 1800)
+        self.pool_pre_ping = _env_bool("DB_POOL_PRE_PING", True)
+        # PgBouncer en mode transaction : pas de prepared statements, de SET de session ni de
+        # verrou consultatif de session (services/advisory_locks.py : verrous de transaction)
+        self.pgbouncer = _env_bool("DB_PGBOUNCER", False)
+        self.statement_timeout_ms = _env_int("DB_STATEMENT_TIMEOUT_MS", 0)
+
+
+pool_config = PoolConfig()
+
+
+class PoolMetrics:
+    """Attente au checkout (histogramme), timeouts du pool ; thread-safe"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+
+    def observe(self, seconds: float) -> None:
+        wait_ms = seconds * 1000
+        index = next((i for i, bound in enumerate(WAIT_BUCKETS_MS) if wait_ms <= bound), len(WAIT_BUCKETS_MS))
+        with self._lock:
+            self.buckets[index] += 1
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+
+    def timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            labels = [f"<={bound}ms" for bound in WAIT_BUCKETS_MS] + [f">{WAIT_BUCKETS_MS[-1]}ms"]
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "wait_histogram": dict(zip(labels, self.buckets)),
+            }
+
+
+def _instrumented(pool_class: type, metrics: PoolMetrics) -> type:
+    """Sous-classe du pool qui chronomètre l'obtention d'une connexion (attente + connexion)"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = pool_class._do_get(self)
+        except exc.TimeoutError:
+            metrics.timeout()
+            raise
+        metrics.observe(time.perf_counter() - started)
+        return connection
+
+    return type(f"Instrumented{pool_class.__name__}", (pool_class,), {"_do_get": _do_get})
+
+
+def engine_options(url: URL, metrics: PoolMetrics, is_async: bool = False) -> Dict[str, Any]:
+    """kwargs de create_engine / create_async_engine (pool, pre-ping, PgBouncer, statement_timeout)"""
+    if url.get_backend_name() != "postgresql":
+        # SQLite (dev) : pool par défaut du dialecte
+        return {}
+
+    config = pool_config
+    pool_size = config.async_pool_size if is_async else config.pool_size
+    max_overflow = config.async_max_overflow if is_async else config.max_overflow
+    options: Dict[str, Any] = {"pool_pre_ping": config.pool_pre_ping}
+    if pool_size <= 0:
+        options["poolclass"] = NullPool
+    else:
+        options.update(
+            poolclass=_instrumented(AsyncAdaptedQueuePool if is_async else QueuePool, metrics),
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=config.pool_timeout,
+            pool_recycle=config.pool_recycle,
+        )
+
+    connect_args: Dict[str, Any] = {}
+    driver = url.get_driver_name()
+    if config.pgbouncer:
+        # Les prepared statements nommés ne survivent pas au changement de connexion serveur
+        if driver == "asyncpg":
+            connect_args.update(
+                statement_cache_size=0,
+                prepared_statement_cache_size=0,
+                prepared_statement_name_func=lambda: f"__asyncpg_{uuid.uuid4()}__",
+            )
+        elif driver == "psycopg":
+            connect_args["prepare_threshold"] = None
+    elif config.statement_timeout_ms > 0:
+        # Connexion directe : fixé une fois à l'ouverture de la connexion (aucun aller-retour)
+        if driver == "asyncpg":
+            connect_args["server_settings"] = {"statement_timeout": str(config.statement_timeout_ms)}
+        else:
+            connect_args["options"] = f"-c statement_timeout={config.statement_timeout_ms}"
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+def install_statement_timeout(engine: Engine) -> None:
+    """
+    PgBouncer (mode transaction) : un SET de session fuirait vers d'autres clients,
+    le timeout est posé par transaction (SET LOCAL) au début de chaque requête.
+    """
+    timeout_ms = pool_config.statement_timeout_ms
+    if not (pool_config.pgbouncer and timeout_ms > 0) or engine.dialect.name != "postgresql":
+        return
+
+    @event.listens_for(engine, "begin")
+    def _set_local_statement_timeout(connection) -> None:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+def pool_stats(engine: Engine, metrics: Optional[PoolMetrics]) -> Dict[str, Any]:
+    """Occupation instantanée du pool + métriques d'attente"""
+    pool: Pool = engine.pool
+    stats: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(0, pool.overflow()),  # négatif tant que le pool de base n'est pas plein
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    if metrics is not None:
+        stats.update(metrics.snapshot())
+    return stats
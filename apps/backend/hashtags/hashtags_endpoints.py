@@ -6,6 +6,12 @@ from typing import List, Optional
 from db.base import get_db
 from db.models import Hashtag, Platform, User
 from auth_unified.auth_endpoints import get_current_user
+from core.pagination import NEXT_CURSOR_HEADER, paginate
+from core.responses import FastJSONResponse, schema_rows
+from services.post_utils import get_platform_id
+from services import search_service
+from services.reference_cache import reference_cache
+from services.response_cache import bump_hashtag_versions
 from .schemas import HashtagCreate, HashtagResponse, HashtagUpdate
 
 hashtags_router = APIRouter(prefix="/api/v1/hashtags", tags=["hashtags"])
@@ -14,18 +20,40 @@ hashtags_router = APIRouter(prefix="/api/v1/hashtags", tags=["hashtags"])
 def get_hashtags(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Curseur X-Next-Cursor de la page précédente (remplace skip)"),
     platform: Optional[str] = Query(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Récupérer les hashtags avec filtres"""
+    """Récupérer les hashtags avec filtres (plus récents d'abord, curseur dans X-Next-Cursor)"""
     query = db.query(Hashtag)
     
     if platform:
-        query = query.join(Platform).filter(Platform.name == platform)
+        platform_id = get_platform_id(db, platform)
+        if platform_id is None:
+            return []
+        query = query.filter(Hashtag.platform_id == platform_id)
     
-    hashtags = query.offset(skip).limit(limit).all()
-    return hashtags
+    hashtags, next_cursor = paginate(query, "id", Hashtag.id, Hashtag.id, limit, cursor, skip)
+    # Colonnes déjà typées : sérialisation orjson directe, sans modèles HashtagResponse
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return FastJSONResponse(schema_rows(HashtagResponse).many(hashtags), headers=headers)
+
+@hashtags_router.get("/search", response_model=List[HashtagResponse])
+def search_hashtags(
+    q: str = Query(..., min_length=1, description="Préfixe ou fragment du hashtag"),
+    platform: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Rechercher des hashtags (préfixe d'abord, puis similarité trigramme)"""
+    platform_id = None
+    if platform:
+        platform_id = get_platform_id(db, platform)
+        if platform_id is None:
+            return []
+    return search_service.search_hashtags(db, q, platform_id=platform_id, limit=limit)
 
 @hashtags_router.get("/{hashtag_id}", response_model=HashtagResponse)
 def get_hashtag(
@@ -63,6 +91,7 @@ def create_hashtag(
     db.add(hashtag)
     db.commit()
     db.refresh(hashtag)
+    reference_cache.remember_hashtag(hashtag.name, hashtag.id, hashtag.platform_id)
     return hashtag
 
 @hashtags_router.put("/{hashtag_id}", response_model=HashtagResponse)
@@ -81,8 +110,11 @@ def update_hashtag(
     for field, value in update_data.items():
         setattr(hashtag, field, value)
     
+    reference_cache.publish_change(db)
     db.commit()
     db.refresh(hashtag)
+    reference_cache.forget_hashtag(hashtag.id)
+    reference_cache.remember_hashtag(hashtag.name, hashtag.id, hashtag.platform_id)
     return hashtag
 
 @hashtags_router.delete("/{hashtag_id}")
@@ -96,8 +128,11 @@ def delete_hashtag(
     if not hashtag:
         raise HTTPException(status_code=404, detail="Hashtag non trouvé")
     
+    bump_hashtag_versions(db, [hashtag_id])
+    reference_cache.publish_change(db)
     db.delete(hashtag)
     db.commit()
+    reference_cache.forget_hashtag(hashtag_id)
     return {"message": "Hashtag supprimé"}
 
 @hashtags_router.get("/stats/{hashtag_id}")
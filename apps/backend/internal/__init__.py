@@ -0,0 +1,2 @@
+# internal module
+
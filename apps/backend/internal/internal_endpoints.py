@@ -0,0 +1,96 @@
+# internal/internal_endpoints.py
+# Endpoints internes d'observabilité (réservés aux admins)
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from auth_unified.auth_endpoints import get_current_user
+from core.config import settings
+from db.base import get_db
+from db.models import User
+from services.http_client import http_clients
+from services import response_cache
+from services.reference_cache import reference_cache
+from services.ttl_cache import cache_stats
+
+internal_router = APIRouter(prefix="/api/v1/internal", tags=["internal"])
+
+
+def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    """Restreint l'accès aux utilisateurs ayant le rôle admin"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Accès réservé aux administrateurs")
+    return current_user
+
+
+@internal_router.get("/metrics/db")
+def get_db_pool_metrics(current_user: User = Depends(require_admin)):
+    """Pools de connexions DB : connexions prises, overflow, histogramme d'attente au checkout"""
+    from db.base import db_pool_stats
+
+    return db_pool_stats()
+
+
+@internal_router.get("/metrics/http")
+def get_http_pool_metrics(current_user: User = Depends(require_admin)):
+    """Métriques des pools HTTP upstream (connexions en vol, attente du pool)"""
+    return http_clients.stats()
+
+
+@internal_router.get("/metrics/meta")
+def get_meta_usage_metrics(current_user: User = Depends(require_admin)):
+    """Budget Meta courant : utilisation annoncée par scope (token, business), attentes et rejets"""
+    from services.meta_client import meta_governor
+
+    return meta_governor.stats()
+
+
+@internal_router.get("/metrics/api-fallback")
+def get_api_fallback_metrics(current_user: User = Depends(require_admin)):
+    """Endpoints API d'abord / base en secours : mode, disjoncteurs, réponses servies depuis la base"""
+    from services.api_fallback import api_fallback_stats
+
+    return api_fallback_stats()
+
+
+@internal_router.get("/metrics/meta/hashtag-quota")
+async def get_meta_hashtag_quota(
+    ig_user_id: Optional[str] = None,
+    current_user: User = Depends(require_admin),
+):
+    """Quota ig_hashtag_search d'un utilisateur IG (IG_USER_ID par défaut) sur la fenêtre glissante"""
+    from services.meta_hashtags import search_quota
+
+    return await search_quota(ig_user_id or settings.IG_USER_ID)
+
+
+@internal_router.get("/metrics/cache")
+def get_cache_metrics(current_user: User = Depends(require_admin)):
+    """Hit/miss des caches mémoire (oEmbed, ...) et appels upstream coalescés"""
+    from meta.meta_endpoints import oembed_cache_stats
+
+    return {
+        "caches": cache_stats(),
+        "oembed": oembed_cache_stats(),
+        "reference": reference_cache.stats(),
+        "responses": response_cache.stats(),
+    }
+
+
+@internal_router.get("/metrics/ingestion")
+def get_ingestion_metrics(current_user: User = Depends(require_admin)):
+    """Ingestion planifiée : dernière passe (jobs exécutés / reportés) et budgets par plateforme"""
+    from services.ingestion_scheduler import ingestion_scheduler
+
+    return ingestion_scheduler.stats()
+
+
+@internal_router.post("/reference-cache/invalidate")
+def invalidate_reference_cache(db: Session = Depends(get_db), current_user: User = Depends(require_admin)):
+    """Vide le cache plateformes/hashtags de tous les workers (après une modification SQL directe)"""
+    reference_cache.publish_change(db)
+    db.commit()
+    reference_cache.invalidate()
+    return reference_cache.stats()
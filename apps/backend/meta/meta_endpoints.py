@@ -1,54 +1,69 @@
+import asyncio
+import hashlib
 import json
 import logging
 import re
-from typing import Optional
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import or_
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from auth_unified.auth_endpoints import get_optional_user
 from core.config import settings
-from db.base import get_db
-from db.models import Post, Platform, User, Hashtag, PostHashtag
-from services.meta_client import call_meta
-from services.post_utils import parse_timestamp, ensure_platform, upsert_post, normalize_hashtag, load_post_payload
+from db.base import get_async_db, get_db
+from db.models import Hashtag, Post, PostHashtag, User
+from services.ig_business_accounts import resolve_ig_business_account_id
+from services.meta_client import IG_MEDIA_FIELDS, BatchRequest, MetaAPIError, call_meta, call_meta_batch, token_fingerprint
+from services.api_fallback import call_with_breaker, serve_api_or_db
+from services.meta_hashtags import fetch_hashtag_recent_media
+from services.post_utils import ensure_platform_id, get_platform_id, ingest_posts, normalize_hashtag, load_post_payload, instagram_media_item, record_hashtag_scrape
+from services.reference_cache import reference_cache
+from services.ttl_cache import TTLCache, SingleFlight
 
 router = APIRouter(prefix="/api/v1/meta", tags=["meta"])
 logger = logging.getLogger(__name__)
 
+# Cache oEmbed : succès par URL nettoyée (TTL long) ; échecs permanents (TTL court) par URL et
+# jeu de tokens, un refus de permission d'un token ne devant pas être rejoué aux autres appelants
+_oembed_cache = TTLCache(
+    "oembed",
+    max_entries=settings.OEMBED_CACHE_MAX_ENTRIES,
+    default_ttl=settings.OEMBED_CACHE_TTL,
+)
+_oembed_flights = SingleFlight()
 
-def _get_meta_token(db: Session, current_user: Optional[User]) -> str:
+# Erreurs qui ne changeront pas en réessayant (permission, paramètre invalide, URL invalide)
+PERMANENT_OEMBED_ERRORS = {10, 100, "INVALID_URL", "INVALID_URL_FORMAT", "NUMERIC_ID_NOT_SUPPORTED"}
+
+
+async def _get_meta_token(db: AsyncSession, current_user: Optional[User]) -> str:
     """Récupère le token Meta/Instagram depuis OAuthAccount pour l'utilisateur courant, ou token système"""
     from db.models import OAuthAccount
     
-    # 1. Essayer le token de l'utilisateur connecté (Instagram ou Facebook)
+    # 1. Essayer le token de l'utilisateur connecté (Instagram d'abord, puis Facebook qui
+    #    peut aussi accéder à Instagram) - une seule requête pour les deux providers
     if current_user:
-        # Essayer Instagram d'abord
-        oauth_account = (
-            db.query(OAuthAccount)
-            .filter(
-                OAuthAccount.user_id == current_user.id,
-                OAuthAccount.provider == "instagram",
-            )
-            .first()
-        )
-        if oauth_account and oauth_account.access_token:
-            logger.info(f"Using Instagram OAuth token for user {current_user.id}")
-            return oauth_account.access_token
-        
-        # Essayer Facebook (peut aussi accéder à Instagram)
-        oauth_account = (
-            db.query(OAuthAccount)
-            .filter(
-                OAuthAccount.user_id == current_user.id,
-                OAuthAccount.provider == "facebook",
+        rows = (
+            await db.execute(
+                select(OAuthAccount.provider, OAuthAccount.access_token).where(
+                    OAuthAccount.user_id == current_user.id,
+                    OAuthAccount.provider.in_(("instagram", "facebook")),
+                )
             )
-            .first()
-        )
-        if oauth_account and oauth_account.access_token:
-            logger.info(f"Using Facebook OAuth token for user {current_user.id}")
-            return oauth_account.access_token
+        ).all()
+        tokens = {}
+        for provider, access_token in rows:
+            if access_token:
+                tokens.setdefault(provider, access_token)
+        for provider, label in (("instagram", "Instagram"), ("facebook", "Facebook")):
+            if provider in tokens:
+                logger.info(f"Using {label} OAuth token for user {current_user.id}")
+                return tokens[provider]
     
     # 2. Fallback: token système
     if settings.META_LONG_TOKEN:
@@ -64,7 +79,7 @@ def _get_meta_token(db: Session, current_user: Optional[User]) -> str:
     )
 
 
-def _get_all_meta_tokens(db: Session, current_user: Optional[User]) -> list[tuple[str, str]]:
+async def _get_all_meta_tokens(db: AsyncSession, current_user: Optional[User]) -> list[tuple[str, str]]:
     """Récupère tous les tokens Meta disponibles dans l'ordre de priorité"""
     tokens = []
     
@@ -79,10 +94,10 @@ def _get_all_meta_tokens(db: Session, current_user: Optional[User]) -> list[tupl
     # 3. Token utilisateur Instagram (priorité 3)
     if current_user:
         try:
-            user_token = _get_meta_token(db, current_user)
+            user_token = await _get_meta_token(db, current_user)
             if user_token and user_token not in [t[1] for t in tokens]:
                 tokens.append(("user OAuth", user_token))
-        except:
+        except Exception:  # pas de except nu : ne pas avaler l'annulation de la tâche
             pass
     
     return tokens
@@ -104,6 +119,158 @@ def _extract_meta_error(meta_error: HTTPException) -> tuple[Optional[int], Optio
     return error_code, error_message
 
 
+class _TokenHealth:
+    """
+    Santé des tokens Meta pour oEmbed (mémoire du process).
+    Le token qui a réussi le plus récemment est essayé en premier, puis le
+    meilleur score (moyenne mobile des succès). Les tokens ne sont jamais
+    stockés en clair : la clé est un hash.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+
+    @staticmethod
+    def _key(access_token: str) -> str:
+        return hashlib.sha256(access_token.encode()).hexdigest()[:16]
+
+    def record(self, token_source: str, access_token: str, success: bool) -> None:
+        key = self._key(access_token)
+        entry = self._entries.pop(key, None) or {
+            "token": token_source,
+            "score": 1.0,
+            "successes": 0,
+            "failures": 0,
+            "last_success": 0.0,
+        }
+        entry["score"] = 0.7 * entry["score"] + 0.3 * (1.0 if success else 0.0)
+        if success:
+            entry["successes"] += 1
+            entry["last_success"] = time.time()
+        else:
+            entry["failures"] += 1
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def order(self, tokens: list[tuple[str, str]]) -> list[tuple[str, str]]:
+        def _rank(item: tuple[int, tuple[str, str]]):
+            index, (_, access_token) = item
+            entry = self._entries.get(self._key(access_token))
+            if not entry:
+                return (0.0, -1.0, index)
+            return (-entry["last_success"], -entry["score"], index)
+
+        return [token for _, token in sorted(enumerate(tokens), key=_rank)]
+
+    def snapshot(self) -> list[dict]:
+        return [
+            {**entry, "score": round(entry["score"], 3)}
+            for entry in self._entries.values()
+        ]
+
+
+_token_health = _TokenHealth()
+
+
+def _save_oembed_error(errors_by_code: dict, meta_error: HTTPException, token_source: str) -> None:
+    """Garde la première occurrence de chaque code d'erreur"""
+    error_code, _ = _extract_meta_error(meta_error)
+    if error_code not in errors_by_code:
+        errors_by_code[error_code] = (meta_error, token_source)
+        logger.info(f"📝 Saved error code {error_code} from {token_source}")
+
+
+async def _try_oembed_token(
+    cleaned_url: str,
+    token_source: str,
+    access_token: str,
+    max_retries: int,
+    all_errors: list,
+) -> dict:
+    """
+    Appelle oEmbed avec un token, retry (backoff exponentiel) sur les erreurs
+    transitoires (code 2). Lève la dernière erreur Meta si le token échoue.
+    """
+    for attempt in range(max_retries):
+        if attempt > 0:
+            # Attendre avant de retry (backoff exponentiel: 0.5s, 1s, 2s)
+            wait_time = 0.5 * (2 ** (attempt - 1))
+            await asyncio.sleep(wait_time)
+            logger.info(f"🔄 Retry attempt {attempt} for {token_source} (waited {wait_time}s)")
+        
+        logger.debug(f"Trying token {token_source} (attempt {attempt + 1}/{max_retries})")
+        try:
+            oembed_data = await call_meta(
+                method="GET",
+                endpoint="v21.0/instagram_oembed",
+                params={"url": cleaned_url},
+                access_token=access_token,
+            )
+        except HTTPException as meta_error:
+            error_code, error_message = _extract_meta_error(meta_error)
+            all_errors.append((token_source, error_code, error_message))
+            logger.warning(f"❌ Token {token_source} failed (attempt {attempt + 1}/{max_retries}): code={error_code}, message={(error_message or '')[:100]}")
+            
+            # Si erreur transitoire (code 2) et qu'on peut retry, continuer la boucle
+            if error_code == 2 and attempt < max_retries - 1:
+                logger.info(f"🔄 Will retry {token_source} due to transient error (code 2)")
+                continue
+            
+            _token_health.record(token_source, access_token, success=False)
+            raise
+        
+        _token_health.record(token_source, access_token, success=True)
+        logger.info(f"✅ oEmbed retrieved successfully using {token_source}")
+        return oembed_data
+    
+    raise HTTPException(status_code=500, detail="No oEmbed attempt made")
+
+
+async def _race_oembed_tokens(
+    cleaned_url: str,
+    tokens: list[tuple[str, str]],
+    max_retries: int,
+    hedge_delay: float,
+    errors_by_code: dict,
+    all_errors: list,
+) -> Optional[dict]:
+    """
+    Requêtes "hedged" : lance le token suivant si le précédent n'a pas répondu
+    après hedge_delay secondes (ou dès qu'il échoue). Le premier succès gagne,
+    les autres tentatives sont annulées. Retourne None si tous échouent.
+    """
+    remaining = list(tokens)
+    pending: dict = {}  # {task: token_source}
+    try:
+        while remaining or pending:
+            if remaining:
+                token_source, access_token = remaining.pop(0)
+                task = asyncio.ensure_future(
+                    _try_oembed_token(cleaned_url, token_source, access_token, max_retries, all_errors)
+                )
+                pending[task] = token_source
+            
+            done, _ = await asyncio.wait(
+                pending,
+                timeout=hedge_delay if remaining else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                token_source = pending.pop(task)
+                meta_error = task.exception()
+                if meta_error is None:
+                    return task.result()
+                if not isinstance(meta_error, HTTPException):
+                    raise meta_error
+                _save_oembed_error(errors_by_code, meta_error, token_source)
+    finally:
+        for task in pending:
+            task.cancel()
+    return None
+
+
 async def _fetch_oembed_with_tokens(url: str, tokens: list[tuple[str, str]], retry_transient: bool = True) -> dict:
     """
     Essaie de récupérer oEmbed avec une liste de tokens.
@@ -112,15 +279,14 @@ async def _fetch_oembed_with_tokens(url: str, tokens: list[tuple[str, str]], ret
     1. Validation stricte de l'URL (rejette les IDs numériques)
     2. Essayer tous les tokens dans l'ordre de priorité
     3. Retry automatique (3x) pour les erreurs transitoires (code 2)
+       (OEMBED_TOKEN_STRATEGY=hedged|race : tokens lancés en parallèle, premier succès gagnant)
     4. Si un token fonctionne → retourner 200 OK
     5. Si tous échouent → retourner l'erreur appropriée :
        - Code 10 (permission) → 400 (erreur client)
        - Code 2 (transitoire) → 502 (erreur serveur Meta)
        - Autres → 400 (erreur client)
     """
-    import asyncio
-    
-    cleaned_url = url.split('?')[0].split('#')[0].rstrip('/')
+    cleaned_url = _clean_oembed_url(url)
     
     # Validation basique du préfixe
     if not cleaned_url.startswith(('https://www.instagram.com/', 'https://instagram.com/')):
@@ -162,52 +328,29 @@ async def _fetch_oembed_with_tokens(url: str, tokens: list[tuple[str, str]], ret
     if not tokens:
         raise HTTPException(status_code=500, detail="No tokens available")
     
-    logger.info(f"Fetching oEmbed for {cleaned_url} with {len(tokens)} token(s): {[t[0] for t in tokens]}")
+    ordered_tokens = _token_health.order(tokens)
+    strategy = settings.OEMBED_TOKEN_STRATEGY
+    logger.info(f"Fetching oEmbed for {cleaned_url} with {len(ordered_tokens)} token(s) ({strategy}): {[t[0] for t in ordered_tokens]}")
     
     # Collecter toutes les erreurs pour choisir la plus pertinente
     errors_by_code = {}  # {error_code: (error, token_source)}
     all_errors = []  # Liste de toutes les erreurs pour debug
+    max_retries = 3 if retry_transient else 1
     
-    for token_source, access_token in tokens:
-        # Retry jusqu'à 3 fois pour les erreurs transitoires (code 2)
-        max_retries = 3 if retry_transient else 1
-        
-        for attempt in range(max_retries):
+    if strategy in ("hedged", "race") and len(ordered_tokens) > 1:
+        # Course entre tokens : le suivant part après OEMBED_HEDGE_DELAY (ou tout de suite en mode race)
+        hedge_delay = 0.0 if strategy == "race" else settings.OEMBED_HEDGE_DELAY
+        oembed_data = await _race_oembed_tokens(
+            cleaned_url, ordered_tokens, max_retries, hedge_delay, errors_by_code, all_errors
+        )
+        if oembed_data is not None:
+            return oembed_data
+    else:
+        for token_source, access_token in ordered_tokens:
             try:
-                if attempt > 0:
-                    # Attendre avant de retry (backoff exponentiel: 0.5s, 1s, 2s)
-                    wait_time = 0.5 * (2 ** (attempt - 1))
-                    await asyncio.sleep(wait_time)
-                    logger.info(f"🔄 Retry attempt {attempt} for {token_source} (waited {wait_time}s)")
-                
-                logger.debug(f"Trying token {token_source} (attempt {attempt + 1}/{max_retries})")
-                oembed_data = await call_meta(
-                    method="GET",
-                    endpoint="v21.0/instagram_oembed",
-                    params={"url": cleaned_url},
-                    access_token=access_token,
-                )
-                logger.info(f"✅ oEmbed retrieved successfully using {token_source}")
-                return oembed_data
-                
+                return await _try_oembed_token(cleaned_url, token_source, access_token, max_retries, all_errors)
             except HTTPException as meta_error:
-                error_code, error_message = _extract_meta_error(meta_error)
-                all_errors.append((token_source, error_code, error_message))
-                logger.warning(f"❌ Token {token_source} failed (attempt {attempt + 1}/{max_retries}): code={error_code}, message={error_message[:100]}")
-                
-                # Si erreur transitoire (code 2) et qu'on peut retry, continuer la boucle
-                if error_code == 2 and attempt < max_retries - 1:
-                    logger.info(f"🔄 Will retry {token_source} due to transient error (code 2)")
-                    continue
-                
-                # Sauvegarder l'erreur par code (garder la première occurrence de chaque code)
-                if error_code not in errors_by_code:
-                    errors_by_code[error_code] = (meta_error, token_source)
-                    logger.info(f"📝 Saved error code {error_code} from {token_source}")
-                
-                # Si ce n'est pas une erreur transitoire, passer au token suivant
-                if error_code != 2:
-                    break
+                _save_oembed_error(errors_by_code, meta_error, token_source)
     
     # Tous les tokens ont échoué
     if not errors_by_code:
@@ -273,10 +416,62 @@ async def _fetch_oembed_with_tokens(url: str, tokens: list[tuple[str, str]], ret
         )
 
 
+def _clean_oembed_url(url: str) -> str:
+    """Retire query string, fragment et slash final (clé de cache oEmbed)"""
+    return url.split('?')[0].split('#')[0].rstrip('/')
+
+
+def _is_permanent_oembed_error(exc: HTTPException) -> bool:
+    if exc.status_code != 400 or not isinstance(exc.detail, dict):
+        return False
+    return exc.detail.get("error_code") in PERMANENT_OEMBED_ERRORS
+
+
+async def _fetch_oembed_cached(url: str, tokens: list[tuple[str, str]]) -> dict:
+    """
+    Sert oEmbed depuis le cache, sinon un seul appel Meta par URL même si
+    plusieurs requêtes concurrentes demandent le même permalink.
+    Les échecs permanents sont mémorisés (OEMBED_NEGATIVE_TTL) pour le même jeu de tokens
+    et rejoués tels quels.
+    """
+    cache_key = _clean_oembed_url(url)
+    cached = _oembed_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Empreinte du jeu de tokens : les erreurs mémorisées et les appels coalescés en dépendent
+    error_key = (cache_key, token_fingerprint("|".join(sorted(token for _, token in tokens))))
+    cached_error = _oembed_cache.get(error_key)
+    if cached_error is not None:
+        raise HTTPException(status_code=cached_error.status_code, detail=cached_error.detail)
+
+    async def _load() -> dict:
+        try:
+            oembed_data = await _fetch_oembed_with_tokens(url, tokens)
+        except HTTPException as exc:
+            if _is_permanent_oembed_error(exc):
+                _oembed_cache.set(error_key, exc, ttl=settings.OEMBED_NEGATIVE_TTL, negative=True)
+            raise
+        _oembed_cache.set(cache_key, oembed_data)
+        return oembed_data
+
+    return await _oembed_flights.do(error_key, _load)
+
+
+def oembed_cache_stats() -> dict:
+    """Statistiques hit/miss du cache oEmbed et des appels coalescés"""
+    return {
+        **_oembed_cache.stats(),
+        **_oembed_flights.stats(),
+        "token_strategy": settings.OEMBED_TOKEN_STRATEGY,
+        "token_health": _token_health.snapshot(),
+    }
+
+
 @router.get("/oembed")
 async def get_oembed(
     url: str = Query(..., description="URL publique IG/FB à embarquer"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Optional[User] = Depends(get_optional_user),
 ):
     """
@@ -287,31 +482,31 @@ async def get_oembed(
     2. Permission: Meta oEmbed Read enables fetching oEmbed data (thumbnails, HTML, metadata)
     3. End-User Benefit: Users can preview Instagram content directly in veyl.io without leaving the platform
     """
-    tokens = _get_all_meta_tokens(db, current_user)
+    tokens = await _get_all_meta_tokens(db, current_user)
     if not tokens:
         raise HTTPException(
             status_code=500,
             detail="No Meta access token available. Please configure META_LONG_TOKEN or IG_ACCESS_TOKEN, or connect your Instagram/Facebook account."
         )
-    return await _fetch_oembed_with_tokens(url, tokens)
+    return await _fetch_oembed_cached(url, tokens)
 
 
 @router.get("/oembed/public")
 async def get_oembed_public(
     url: str = Query(..., description="URL publique IG/FB à embarquer"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Public endpoint for oEmbed demo (no authentication required).
     Uses system tokens only (no user authentication required).
     """
-    tokens = _get_all_meta_tokens(db, None)
+    tokens = await _get_all_meta_tokens(db, None)
     if not tokens:
         raise HTTPException(
             status_code=500,
             detail="No Meta access token configured. Please set META_LONG_TOKEN or IG_ACCESS_TOKEN."
         )
-    return await _fetch_oembed_with_tokens(url, tokens)
+    return await _fetch_oembed_cached(url, tokens)
 
 
 @router.get("/ig-public")
@@ -319,7 +514,7 @@ async def get_instagram_public_content(
     tag: str = Query(..., min_length=1, description="Hashtag to search (without #)"),
     user_id: Optional[str] = Query(None),
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Optional[User] = Depends(get_optional_user),
 ):
     """
@@ -331,80 +526,52 @@ async def get_instagram_public_content(
     3. End-User Benefit: Users can discover and monitor trending Instagram content by hashtag, 
        enabling content research and trend analysis for their projects.
     
-    STRATÉGIE: 1. Essayer Meta API d'abord → 2. Fallback DB si échec
+    STRATÉGIE (API_FALLBACK_MODE) : api_first = Meta API d'abord, DB si échec ;
+    swr = DB si assez fraîche (Meta rafraîchit en tâche de fond), sinon Meta API
     """
-    # 1️⃣ ESSAYER META API D'ABORD (même si IG_USER_ID manquant, on essaie)
-    # Le token peut contenir l'info nécessaire
-    try:
-        ig_user_id = user_id or settings.IG_USER_ID
-        if not ig_user_id:
-            logger.warning("IG_USER_ID not found, but trying API anyway (token may contain info)")
-            # Essayer quand même avec "me" ou le user_id du token
-            ig_user_id = "me"
-        
+    # Même si IG_USER_ID manque, on essaie : le token peut contenir l'info nécessaire
+    ig_user_id = user_id or settings.IG_USER_ID
+    if not ig_user_id:
+        logger.warning("IG_USER_ID not found, but trying API anyway (token may contain info)")
+        # Essayer quand même avec "me" ou le user_id du token
+        ig_user_id = "me"
+    normalized_tag = normalize_hashtag(tag)
+
+    async def fetch_api(session: AsyncSession) -> Optional[dict]:
         logger.info(f"Trying Meta API for hashtag: #{tag} (user_id: {ig_user_id})")
-        search = await call_meta(
-            method="GET",
-            endpoint="v21.0/ig_hashtag_search",
-            params={"user_id": ig_user_id, "q": tag},
-        )
-        data = search.get("data", [])
-        if not data:
+        # Id du hashtag lu dans l'annuaire (un appel) ; sinon recherche + médias en un batch, sous quota
+        posts = await fetch_hashtag_recent_media(ig_user_id, tag, limit)
+        if posts is None:
             logger.warning(f"Hashtag #{tag} not found in Meta API, falling back to DB")
-            raise Exception(f"Hashtag {tag} not found in Meta API")  # Raise generic exception to trigger fallback
-
-        hashtag_id = data[0]["id"]
-        media = await call_meta(
-            method="GET",
-            endpoint=f"v21.0/{hashtag_id}/recent_media",
-            params={
-                "user_id": ig_user_id,
-                "fields": "id,caption,media_type,media_url,permalink,timestamp,like_count,comments_count,username",
-                "limit": limit,
-            },
-        )
-
-        posts = media.get("data", [])
+            return None
         logger.info(f"API returned {len(posts)} posts from Meta API")
         
         # Si l'API retourne 0 posts, faire le fallback DB
         if not posts:
             logger.warning(f"Meta API returned 0 posts for #{tag}, falling back to DB")
-            raise Exception(f"No posts returned from Meta API for #{tag}")  # Trigger fallback
+            return None
+        
+        # Stocker les posts dans la DB (un seul INSERT ... ON CONFLICT pour le lot)
+        items = [instagram_media_item(item, "meta_ig_public_api") for item in posts]
+        authors = {item["external_id"]: item["defaults"]["author"] for item in items}
+        
+        # ingest_posts (ORM sync) exécuté sur la connexion async : pas de blocage de la boucle
+        stored = await session.run_sync(ingest_posts, "instagram", items)
+        # Posts liés au hashtag (post_hashtags) et last_scraped daté : lus par le chemin DB
+        await session.run_sync(
+            lambda sync_session: record_hashtag_scrape(
+                sync_session,
+                ensure_platform_id(sync_session, "instagram"),
+                normalized_tag,
+                [row.id for row in stored.values()],
+                datetime.utcnow(),
+            )
+        )
         
-        # Stocker les posts dans la DB
         results = []
         for item in posts:
-            # PRIORITÉ 1: Extraire username depuis l'API response (le plus fiable)
-            author = item.get("username")
-            
-            # PRIORITÉ 2: Extraire username depuis permalink si pas dans API response
-            if not author:
-                permalink = item.get("permalink")
-                if permalink:
-                    # Format: https://www.instagram.com/p/{code}/ ou https://www.instagram.com/{username}/p/{code}/
-                    permalink_match = re.search(r'instagram\.com/([^/]+)/', permalink)
-                    if permalink_match:
-                        potential_username = permalink_match.group(1)
-                        # Ignorer les patterns spéciaux comme 'p', 'reel', etc.
-                        if potential_username not in ['p', 'reel', 'tv', 'stories']:
-                            author = potential_username
-            
-            defaults = {
-                "author": author,
-                "caption": item.get("caption", ""),
-                "media_url": item.get("media_url"),
-                "posted_at": parse_timestamp(item.get("timestamp")),
-                "metrics": json.dumps({
-                    "likes": item.get("like_count", 0),
-                    "comments": item.get("comments_count", 0),
-                    "like_count": item.get("like_count", 0),  # Ajouter aussi pour compatibilité
-                    "comment_count": item.get("comments_count", 0),  # Ajouter aussi pour compatibilité
-                }),
-            }
-            post = upsert_post(
-                db, "instagram", item["id"], item, "meta_ig_public_api", defaults
-            )
+            post = stored[str(item["id"])]
+            author = authors[item["id"]]
             permalink = item.get("permalink")
             # Si pas de permalink mais qu'on a un ID, construire le permalink
             if not permalink and item.get("id"):
@@ -427,88 +594,100 @@ async def get_instagram_public_content(
                 "media_type": item.get("media_type"),
             })
         
-        db.commit()
+        await session.commit()
         return {"data": results, "source": "meta_api"}
-    except HTTPException as http_exc:
+
+    def on_error(e: Exception) -> None:
         # Pour toutes les erreurs Meta API (400, 401, 403, 404, 500, etc.), faire le fallback DB
-        logger.warning(f"Meta API returned {http_exc.status_code} for #{tag}, falling back to DB: {http_exc.detail}")
-        # Ne pas relancer l'exception, continuer vers le fallback DB
-    except Exception as e:
-        logger.exception(f"API failed for #{tag}, falling back to DB: {e}")
-    
-    # 2️⃣ FALLBACK: CHARGER DEPUIS DB
-    logger.info("Loading from database (fallback)...")
-    platform = db.query(Platform).filter(Platform.name == "instagram").first()
-    if not platform:
-        raise HTTPException(status_code=404, detail="Instagram platform not found in database")
-    
-    # Rechercher les posts contenant le hashtag
-    normalized_tag = normalize_hashtag(tag)
-    posts = (
-        db.query(Post)
-        .filter(
-            Post.platform_id == platform.id,
-            or_(
-                Post.caption.ilike(f"%#{normalized_tag}%"),
-                Post.caption.ilike(f"%{normalized_tag}%"),
-            ),
-        )
-        .order_by(Post.posted_at.desc().nullslast())
-        .limit(limit)
-        .all()
-    )
-    
-    if not posts:
-        # Si ni l'API ni la DB n'ont retourné de résultats, renvoyer une liste vide au lieu d'une erreur 500
-        # C'est normal qu'il n'y ait pas toujours de résultats, ce n'est pas une erreur serveur
-        logger.info(f"No posts found for hashtag #{tag} in database (fallback)")
-        return {"data": [], "source": "database_fallback"}
-    
-    results = []
-    for post in posts:
-        payload_data = load_post_payload(post)
-        metrics = payload_data["metrics"]
-        api_payload = payload_data["api_payload"]
+        if isinstance(e, HTTPException):
+            logger.warning(f"Meta API returned {e.status_code} for #{tag}, falling back to DB: {e.detail}")
+        else:
+            logger.exception(f"API failed for #{tag}, falling back to DB: {e}")
+
+    async def load_db() -> Tuple[Optional[dict], Optional[datetime]]:
+        logger.info(f"Loading #{tag} from database...")
+        platform_id = await db.run_sync(get_platform_id, "instagram")
+        if platform_id is None:
+            return None, None
         
-        # Extraire username depuis api_payload ou permalink
-        author = post.author
-        if not author and api_payload:
-            author = (
-                api_payload.get('username')
-                or api_payload.get('owner_username')
-                or api_payload.get('from', {}).get('username')
+        hashtag = (
+            await db.execute(
+                select(Hashtag.id, Hashtag.last_scraped).where(Hashtag.name == normalized_tag)
             )
-        # Si toujours pas trouvé, essayer depuis permalink (si stocké dans api_payload)
-        if not author and api_payload:
-            permalink = api_payload.get('permalink')
-            if permalink:
-                permalink_match = re.search(r'instagram\.com/([^/]+)/', permalink)
-                if permalink_match:
-                    potential_username = permalink_match.group(1)
-                    if potential_username not in ['p', 'reel', 'tv', 'stories']:
-                        author = potential_username
+        ).first()
         
-        results.append({
-            "id": post.id,
-            "caption": post.caption,
-            "media_url": post.media_url,
-            "permalink": api_payload.get('permalink') if api_payload else None,
-            "username": author,
-            "author": author,
-            "like_count": metrics.get("likes") or metrics.get("like_count") or 0,
-            "comments_count": metrics.get("comments") or metrics.get("comments_count") or metrics.get("comment_count") or 0,
-            "timestamp": post.posted_at.isoformat() if post.posted_at else None,
-            "media_type": api_payload.get('media_type') if api_payload else None,
-        })
-    
-    return {"data": results, "source": "database_fallback"}
+        # Posts liés au hashtag (post_hashtags), pas une sous-chaîne de la caption
+        posts = []
+        if hashtag is not None:
+            posts = (
+                await db.scalars(
+                    select(Post)
+                    .join(PostHashtag, PostHashtag.post_id == Post.id)
+                    .where(Post.platform_id == platform_id, PostHashtag.hashtag_id == hashtag.id)
+                    .order_by(Post.posted_at.desc().nullslast())
+                    .limit(limit)
+                )
+            ).all()
+        
+        if not posts:
+            # Si ni l'API ni la DB n'ont retourné de résultats, renvoyer une liste vide au lieu d'une erreur 500
+            # C'est normal qu'il n'y ait pas toujours de résultats, ce n'est pas une erreur serveur
+            logger.info(f"No posts found for hashtag #{tag} in database")
+            return {"data": [], "source": "database_fallback"}, None
+        
+        results = []
+        for post in posts:
+            payload_data = load_post_payload(post)
+            metrics = payload_data["metrics"]
+            api_payload = payload_data["api_payload"]
+            
+            # Extraire username depuis api_payload ou permalink
+            author = post.author
+            if not author and api_payload:
+                author = (
+                    api_payload.get('username')
+                    or api_payload.get('owner_username')
+                    or api_payload.get('from', {}).get('username')
+                )
+            # Si toujours pas trouvé, essayer depuis permalink (si stocké dans api_payload)
+            if not author and api_payload:
+                permalink = api_payload.get('permalink')
+                if permalink:
+                    permalink_match = re.search(r'instagram\.com/([^/]+)/', permalink)
+                    if permalink_match:
+                        potential_username = permalink_match.group(1)
+                        if potential_username not in ['p', 'reel', 'tv', 'stories']:
+                            author = potential_username
+            
+            results.append({
+                "id": post.id,
+                "caption": post.caption,
+                "media_url": post.media_url,
+                "permalink": api_payload.get('permalink') if api_payload else None,
+                "username": author,
+                "author": author,
+                "like_count": metrics.get("likes") or metrics.get("like_count") or 0,
+                "comments_count": metrics.get("comments") or metrics.get("comments_count") or metrics.get("comment_count") or 0,
+                "timestamp": post.posted_at.isoformat() if post.posted_at else None,
+                "media_type": api_payload.get('media_type') if api_payload else None,
+            })
+        
+        # Fraîcheur : dernier rafraîchissement du hashtag (ig-public ou ingestion planifiée)
+        return {"data": results, "source": "database_fallback"}, hashtag.last_scraped
+
+    result = await serve_api_or_db(
+        "meta.ig_public", (ig_user_id, normalized_tag, limit), fetch_api, load_db, on_error=on_error,
+    )
+    if result is None:
+        raise HTTPException(status_code=404, detail="Instagram platform not found in database")
+    return result
 
 
 @router.get("/ig-hashtag")
 async def get_instagram_hashtag_media(
     tag: str = Query(..., min_length=1),
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Optional[User] = Depends(get_optional_user),
 ):
     """Alias pour /ig-public (compatibilité)"""
@@ -519,7 +698,7 @@ async def get_instagram_hashtag_media(
 async def get_page_public_posts(
     page_id: str = Query(..., min_length=1, description="Facebook Page ID (numeric)"),
     limit: int = Query(10, ge=1, le=50, description="Nombre de posts à récupérer"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Optional[User] = Depends(get_optional_user),
 ):
     """
@@ -554,7 +733,7 @@ async def get_page_public_posts(
                 "fields": "id,message,created_time,permalink_url,reactions.summary(true),comments.summary(true),attachments{media,subattachments}",
                 "limit": limit,
             },
-            access_token=_get_meta_token(db, current_user) if current_user else None,
+            access_token=await _get_meta_token(db, current_user) if current_user else None,
         )
         
         # Meta API retourne: {"data": [...], "paging": {...}}
@@ -620,51 +799,72 @@ async def get_page_public_posts(
         )
 
 
-async def _get_ig_business_account_id(db: Session, current_user: Optional[User], access_token: str) -> Optional[str]:
-    """Récupère l'Instagram Business Account ID depuis les Pages Facebook de l'utilisateur"""
-    import httpx
-    
+async def _get_ig_business_account_id(
+    db: AsyncSession,
+    current_user: Optional[User],
+    access_token: str,
+    refresh: bool = False,
+) -> Optional[str]:
+    """Récupère l'Instagram Business Account ID du token (mémorisé par compte OAuth)"""
+    return await resolve_ig_business_account_id(
+        db, current_user.id if current_user else None, access_token, refresh=refresh,
+    )
+
+
+async def _call_with_ig_account_refresh(
+    db: AsyncSession,
+    current_user: Optional[User],
+    ig_business_id: str,
+    resolved: bool,
+    call: Callable[[str], Awaitable[Any]],
+) -> Tuple[str, Any]:
+    """
+    call(ig_business_id). Si l'id vient de la résolution 'me' (mémorisée) et que Meta le rejette,
+    re-résolution forcée puis un second essai avec le nouvel id. Retourne (id utilisé, résultat).
+    """
     try:
-        # Récupérer les Pages Facebook de l'utilisateur
-        async with httpx.AsyncClient(timeout=20) as client:
-            pages_response = await client.get(
-                "https://graph.facebook.com/v21.0/me/accounts",
-                params={"access_token": access_token}
-            )
-            if pages_response.status_code != 200:
-                logger.warning(f"Failed to fetch pages: {pages_response.status_code}")
-                return None
-            
-            pages_data = pages_response.json().get("data", [])
-            
-            # Pour chaque Page, chercher l'IG Business Account
-            for page in pages_data:
-                page_id = page.get("id")
-                if not page_id:
-                    continue
-                
-                try:
-                    page_response = await client.get(
-                        f"https://graph.facebook.com/v21.0/{page_id}",
-                        params={
-                            "fields": "instagram_business_account{id}",
-                            "access_token": access_token
-                        }
-                    )
-                    if page_response.status_code == 200:
-                        ig_account = page_response.json().get("instagram_business_account")
-                        if ig_account and ig_account.get("id"):
-                            ig_business_id = ig_account["id"]
-                            logger.info(f"Found IG Business Account ID: {ig_business_id}")
-                            return ig_business_id
-                except Exception as e:
-                    logger.warning(f"Error fetching IG Business Account for page {page_id}: {e}")
-                    continue
-        
-        return None
-    except Exception as e:
-        logger.error(f"Error in _get_ig_business_account_id: {e}")
-        return None
+        return ig_business_id, await call(ig_business_id)
+    except MetaAPIError as e:
+        if not resolved or e.status_code not in (400, 403, 404):
+            raise
+        access_token = await _get_meta_token(db, current_user)
+        fresh_id = await _get_ig_business_account_id(db, current_user, access_token, refresh=True)
+        if not fresh_id or fresh_id == ig_business_id:
+            raise
+        logger.info(f"IG Business Account changed for user {current_user.id}: {ig_business_id} -> {fresh_id}")
+        return fresh_id, await call(fresh_id)
+
+
+async def _fetch_ig_profile(
+    object_id: str,
+    fields: str,
+    media_limit: int,
+    access_token: Optional[str],
+) -> Tuple[dict, Optional[list]]:
+    """Profil d'un compte IG et, si media_limit, ses médias récents dans le même batch"""
+    if not media_limit:
+        profile = await call_meta(
+            method="GET",
+            endpoint=f"v21.0/{object_id}",
+            params={"fields": fields},
+            access_token=access_token,
+        )
+        return profile, None
+
+    profile, media = await call_meta_batch(
+        [
+            BatchRequest(f"v21.0/{object_id}", {"fields": fields}),
+            BatchRequest(f"v21.0/{object_id}/media", {"fields": IG_MEDIA_FIELDS, "limit": media_limit}),
+        ],
+        access_token=access_token,
+    )
+    if isinstance(profile, MetaAPIError):
+        raise profile
+    if isinstance(media, MetaAPIError):
+        # Le profil reste utile sans les médias (permission instagram_basic limitée)
+        logger.warning(f"Could not fetch media for IG account {object_id}: {media.status_code}")
+        return profile, []
+    return profile, media.get("data", [])
 
 
 @router.get("/insights")
@@ -672,7 +872,7 @@ async def get_insights(
     resource_id: str = Query(..., description="IG Business Account ID, Facebook Page ID, ou 'me'"),
     metrics: str = Query(..., description="Métriques séparées par virgules (ex: 'page_fans,page_impressions' pour Facebook, 'impressions,reach' pour Instagram)"),
     period: Optional[str] = Query("day", description="Période: 'day', 'week', 'days_28', 'lifetime' (défaut: 'day')"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Optional[User] = Depends(get_optional_user),
 ):
     """
@@ -720,7 +920,7 @@ async def get_insights(
         
         # Récupérer le token de l'utilisateur
         try:
-            access_token = _get_meta_token(db, current_user)
+            access_token = await _get_meta_token(db, current_user)
         except HTTPException:
             raise HTTPException(
                 status_code=400,
@@ -761,19 +961,27 @@ async def get_insights(
         # Appeler Meta API pour récupérer les insights
         # Note: Meta API retourne un objet avec 'data' array contenant les métriques
         # Pour Facebook Pages, certaines métriques nécessitent un paramètre 'period'
-        params = {"metric": ",".join(metrics_list)}
+        call_token = await _get_meta_token(db, current_user) if current_user else None
         
-        # Ajouter period pour Facebook Pages (si resource_id ressemble à un Page ID, c'est probablement une Page)
-        # Les Page IDs sont généralement des nombres longs (15+ chiffres)
-        # Les IG Business IDs sont généralement plus courts (10-11 chiffres)
-        if period and len(actual_resource_id) > 12:  # Probablement une Page Facebook
-            params["period"] = period
+        async def fetch_insights(resource: str):
+            params = {"metric": ",".join(metrics_list)}
+            
+            # Ajouter period pour Facebook Pages (si resource_id ressemble à un Page ID, c'est probablement une Page)
+            # Les Page IDs sont généralement des nombres longs (15+ chiffres)
+            # Les IG Business IDs sont généralement plus courts (10-11 chiffres)
+            if period and len(resource) > 12:  # Probablement une Page Facebook
+                params["period"] = period
+            
+            return await call_meta(
+                method="GET",
+                endpoint=f"v21.0/{resource}/insights",
+                params=params,
+                access_token=call_token,
+            )
         
-        insights_response = await call_meta(
-            method="GET",
-            endpoint=f"v21.0/{actual_resource_id}/insights",
-            params=params,
-            access_token=_get_meta_token(db, current_user) if current_user else None,
+        # Id résolu depuis 'me' rejeté par Meta : re-résolution et second essai
+        actual_resource_id, insights_response = await _call_with_ig_account_refresh(
+            db, current_user, actual_resource_id, resource_id == "me", fetch_insights,
         )
         
         # Meta API retourne: {"data": [{"name": "followers_count", "values": [...]}, ...]}
@@ -840,7 +1048,8 @@ async def get_insights(
 @router.get("/ig-business-profile")
 async def get_instagram_business_profile(
     ig_business_account_id: str = Query(..., description="IG Business Account ID ou 'me'"),
-    db: Session = Depends(get_db),
+    media_limit: int = Query(0, ge=0, le=50, description="Médias récents à inclure (même appel batch que le profil)"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Optional[User] = Depends(get_optional_user),
 ):
     """
@@ -878,7 +1087,7 @@ async def get_instagram_business_profile(
         
         # Récupérer le token de l'utilisateur
         try:
-            access_token = _get_meta_token(db, current_user)
+            access_token = await _get_meta_token(db, current_user)
         except HTTPException:
             raise HTTPException(
                 status_code=400,
@@ -897,18 +1106,23 @@ async def get_instagram_business_profile(
         logger.info(f"Using IG Business Account ID for user {current_user.id}: {actual_ig_business_id}")
     
     try:
-        # Appeler Meta API pour récupérer le profil Instagram Business
+        # Appeler Meta API pour récupérer le profil Instagram Business (et ses médias récents)
         # Fields disponibles: username, profile_picture_url, followers_count, media_count, website, biography
-        profile_data = await call_meta(
-            method="GET",
-            endpoint=f"v21.0/{actual_ig_business_id}",
-            params={
-                "fields": "username,profile_picture_url,followers_count,media_count,website,biography"
-            },
-            access_token=_get_meta_token(db, current_user) if current_user else None,
+        call_token = await _get_meta_token(db, current_user) if current_user else None
+        actual_ig_business_id, (profile_data, recent_media) = await _call_with_ig_account_refresh(
+            db,
+            current_user,
+            actual_ig_business_id,
+            ig_business_account_id == "me",
+            lambda ig_id: _fetch_ig_profile(
+                ig_id,
+                "username,profile_picture_url,followers_count,media_count,website,biography",
+                media_limit,
+                call_token,
+            ),
         )
         
-        return {
+        result = {
             "ig_business_account_id": actual_ig_business_id,
             "username": profile_data.get("username"),
             "profile_picture_url": profile_data.get("profile_picture_url"),
@@ -918,6 +1132,9 @@ async def get_instagram_business_profile(
             "biography": profile_data.get("biography"),
             "raw_data": profile_data,  # Garder les données brutes pour debug
         }
+        if recent_media is not None:
+            result["recent_media"] = recent_media
+        return result
         
     except MetaAPIError as e:
         logger.error(f"Meta API error fetching IG Business profile for {actual_ig_business_id}: {e}")
@@ -945,7 +1162,8 @@ async def get_instagram_business_profile(
 async def get_instagram_profile(
     username: Optional[str] = Query(None, description="Instagram username (optionnel, cherche user_id dans DB)"),
     user_id: Optional[str] = Query(None, description="Instagram user ID (requis si username non trouvé)"),
-    db: Session = Depends(get_db),
+    media_limit: int = Query(0, ge=0, le=50, description="Médias récents à inclure (même appel batch que le profil)"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Optional[User] = Depends(get_optional_user),
 ):
     """
@@ -996,34 +1214,33 @@ async def get_instagram_profile(
         # Pour instagram_basic, on peut utiliser l'endpoint /{user-id} avec les champs de base
         
         # Si user_id fourni, l'utiliser directement
+        # Pas de profil en base : le disjoncteur évite d'attendre Meta quand il est en panne (503 immédiat)
         if user_id:
-            profile_data = await call_meta(
-                method="GET",
-                endpoint=f"v21.0/{user_id}",
-                params={
-                    "fields": "username,profile_picture_url,biography"
-                },
-                access_token=_get_meta_token(db, current_user) if current_user else None,
-            )
+            access_token = await _get_meta_token(db, current_user) if current_user else None
+            profile_data, recent_media = await call_with_breaker("meta.ig_profile", lambda: _fetch_ig_profile(
+                user_id, "username,profile_picture_url,biography", media_limit, access_token,
+            ))
         elif username:
             # Si seulement username fourni, essayer de trouver le user_id dans la DB
             # Chercher dans les posts Instagram pour ce créateur
-            instagram_platform = db.query(Platform).filter(Platform.name == "instagram").first()
+            instagram_platform_id = await db.run_sync(get_platform_id, "instagram")
             found_user_id = None
             
-            if instagram_platform:
+            if instagram_platform_id is not None:
                 # Chercher un post de ce créateur
                 post = (
-                    db.query(Post)
-                    .filter(
-                        Post.platform_id == instagram_platform.id,
-                        or_(
-                            Post.author == username,
-                            Post.author.ilike(f"%{username}%")
+                    await db.scalars(
+                        select(Post)
+                        .where(
+                            Post.platform_id == instagram_platform_id,
+                            or_(
+                                Post.author == username,
+                                Post.author.ilike(f"%{username}%")
+                            )
                         )
+                        .limit(1)
                     )
-                    .first()
-                )
+                ).first()
                 
                 if post and post.api_payload:
                     # Essayer d'extraire le user_id depuis api_payload
@@ -1044,14 +1261,10 @@ async def get_instagram_profile(
             if found_user_id:
                 # Utiliser le user_id trouvé dans la DB
                 user_id = found_user_id
-                profile_data = await call_meta(
-                    method="GET",
-                    endpoint=f"v21.0/{user_id}",
-                    params={
-                        "fields": "username,profile_picture_url,biography"
-                    },
-                    access_token=_get_meta_token(db, current_user) if current_user else None,
-                )
+                access_token = await _get_meta_token(db, current_user) if current_user else None
+                profile_data, recent_media = await call_with_breaker("meta.ig_profile", lambda: _fetch_ig_profile(
+                    user_id, "username,profile_picture_url,biography", media_limit, access_token,
+                ))
             else:
                 # Si user_id non trouvé dans la DB, retourner une erreur explicative
                 raise HTTPException(
@@ -1067,13 +1280,16 @@ async def get_instagram_profile(
                 detail="Either username or user_id must be provided"
             )
         
-        return {
+        result = {
             "user_id": user_id,
             "username": profile_data.get("username") or username,
             "profile_picture_url": profile_data.get("profile_picture_url"),
             "biography": profile_data.get("biography"),
             "raw_data": profile_data,  # Garder les données brutes pour debug
         }
+        if recent_media is not None:
+            result["recent_media"] = recent_media
+        return result
         
     except MetaAPIError as e:
         logger.error(f"Meta API error fetching IG profile for {user_id or username}: {e}")
@@ -1111,48 +1327,28 @@ def link_posts_to_hashtag(
     Lie automatiquement les posts contenant un hashtag à ce hashtag dans la DB.
     Utilisé pour créer les liens PostHashtag manquants.
     """
-    from services.post_utils import search_posts_by_hashtag
+    from services.post_utils import search_posts_by_hashtag, ensure_hashtag_ids, insert_post_hashtag_links
+    from services.response_cache import bump_post_versions
     
     normalized_name = normalize_hashtag(hashtag_name)
     if not normalized_name:
         raise HTTPException(status_code=400, detail="Hashtag name required")
     
     # Chercher ou créer le hashtag
-    hashtag = db.query(Hashtag).filter(Hashtag.name == normalized_name).first()
-    if not hashtag:
-        platform = ensure_platform(db, "instagram")
-        hashtag = Hashtag(name=normalized_name, platform_id=platform.id)
-        db.add(hashtag)
-        db.flush()
+    hashtag_id = ensure_hashtag_ids(db, ensure_platform_id(db, "instagram"), [normalized_name])[normalized_name]
     
-    # Rechercher les posts contenant ce hashtag
+    # Rechercher les posts contenant ce hashtag, liens créés en un seul INSERT ... ON CONFLICT DO NOTHING
     posts = search_posts_by_hashtag(db, normalized_name, limit=100)
-    
-    linked_count = 0
-    for post in posts:
-        # Vérifier si le lien existe déjà
-        existing_link = (
-            db.query(PostHashtag)
-            .filter(
-                PostHashtag.post_id == post.id,
-                PostHashtag.hashtag_id == hashtag.id
-            )
-            .first()
-        )
-        if not existing_link:
-            post_hashtag_link = PostHashtag(
-                post_id=post.id,
-                hashtag_id=hashtag.id
-            )
-            db.add(post_hashtag_link)
-            linked_count += 1
+    linked_count = insert_post_hashtag_links(db, ((post.id, hashtag_id) for post in posts))
+    if linked_count:
+        bump_post_versions(db, [post.id for post in posts])
     
     db.commit()
     logger.info(f"Linked {linked_count} posts to hashtag #{normalized_name}")
     
     return {
         "hashtag": normalized_name,
-        "hashtag_id": hashtag.id,
+        "hashtag_id": hashtag_id,
         "linked_posts": linked_count,
         "total_posts_found": len(posts)
     }
@@ -5,6 +5,7 @@ from typing import List, Optional
 from db.base import get_db
 from db.models import Platform, User
 from auth_unified.auth_endpoints import get_current_user
+from services.reference_cache import reference_cache
 from .schemas import PlatformCreate, PlatformResponse, PlatformUpdate
 
 platforms_router = APIRouter(prefix="/api/v1/platforms", tags=["platforms"])
@@ -48,6 +49,7 @@ def create_platform(
     db.add(platform)
     db.commit()
     db.refresh(platform)
+    reference_cache.remember_platform(platform.name, platform.id)
     return platform
 
 @platforms_router.put("/{platform_id}", response_model=PlatformResponse)
@@ -66,8 +68,11 @@ def update_platform(
     for field, value in update_data.items():
         setattr(platform, field, value)
     
+    reference_cache.publish_change(db)
     db.commit()
     db.refresh(platform)
+    reference_cache.forget_platform(platform.id)
+    reference_cache.remember_platform(platform.name, platform.id)
     return platform
 
 @platforms_router.delete("/{platform_id}")
@@ -81,6 +86,8 @@ def delete_platform(
     if not platform:
         raise HTTPException(status_code=404, detail="Plateforme non trouvée")
     
+    reference_cache.publish_change(db)
     db.delete(platform)
     db.commit()
+    reference_cache.forget_platform(platform_id)
     return {"message": "Plateforme supprimée"}
@@ -1,36 +1,87 @@
 # posts/posts_endpoints.py
-from fastapi import APIRouter, Depends, HTTPException, Query  # type: ignore
+from fastapi import APIRouter, Depends, HTTPException, Query, Request  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
 from typing import List, Optional
 from db.base import get_db
 from db.models import Post, Platform, User
 from auth_unified.auth_endpoints import get_current_user
-from .schemas import PostCreate, PostResponse, PostUpdate
+from core.pagination import NEXT_CURSOR_HEADER, paginate
+from core.responses import schema_rows
+from services.post_utils import get_platform_id
+from services import search_service
+from services.analytics_rollups import refresh_rollups_for_posts
+from services.post_read_model import refresh_read_models
+from services.response_cache import (
+    POSTS_SCOPE,
+    TREND_SCOPE,
+    bump_post_versions,
+    cached_response,
+    etag_json_response,
+    scopes_etag,
+)
+from .schemas import POST_JSON_FIELDS, PostCreate, PostResponse, PostUpdate
 
 posts_router = APIRouter(prefix="/api/v1/posts", tags=["posts"])
 
 @posts_router.get("/", response_model=List[PostResponse])
 def get_posts(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Curseur X-Next-Cursor de la page précédente (remplace skip)"),
     platform: Optional[str] = Query(None),
     trending: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Récupérer les posts avec filtres"""
+    """
+    Récupérer les posts avec filtres (curseur de la page suivante dans le header X-Next-Cursor).
+    ETag dérivé des versions de contenu : un poll sans nouveauté reçoit un 304.
+    """
+    etag = scopes_etag(db, [POSTS_SCOPE, TREND_SCOPE], skip, limit, cursor, platform, trending)
+    cache_key = ("posts", skip, limit, cursor, platform, trending)
+    cached = cached_response(request, cache_key, etag)
+    if cached is not None:
+        return cached
+
     query = db.query(Post)
     
     if platform:
-        query = query.join(Platform).filter(Platform.name == platform)
+        platform_id = get_platform_id(db, platform)
+        if platform_id is None:
+            return []
+        query = query.filter(Post.platform_id == platform_id)
     
     if trending:
-        query = query.filter(Post.score_trend > 0).order_by(Post.score_trend.desc())
+        query = query.filter(Post.score_trend > 0)
+        posts, next_cursor = paginate(query, "score_trend", Post.score_trend, Post.id, limit, cursor, skip)
     else:
-        query = query.order_by(Post.posted_at.desc())
+        posts, next_cursor = paginate(query, "posted_at", Post.posted_at, Post.id, limit, cursor, skip)
     
-    posts = query.offset(skip).limit(limit).all()
-    return posts
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    rows = schema_rows(PostResponse, POST_JSON_FIELDS).many(posts)
+    return etag_json_response(cache_key, etag, List[PostResponse], rows, headers, prevalidated=True)
+
+@posts_router.get("/search", response_model=List[PostResponse])
+def search_posts(
+    q: str = Query(..., min_length=1, description="Terme de recherche"),
+    platform: Optional[str] = Query(None, description="Filtrer par plateforme"),
+    min_score: Optional[float] = Query(None, ge=0, description="Score minimum"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Recherche plein texte de posts (tsvector + pg_trgm), classée par pertinence et tendance"""
+    platform_id = None
+    if platform:
+        platform_id = get_platform_id(db, platform)
+        if platform_id is None:
+            return []
+    
+    return search_service.search_posts(
+        db, q, platform_id=platform_id, min_score=min_score, limit=limit, offset=offset
+    )
 
 @posts_router.get("/{post_id}", response_model=PostResponse)
 def get_post(
@@ -58,6 +109,10 @@ def create_post(
     
     post = Post(**post_in.dict())
     db.add(post)
+    db.flush()
+    refresh_read_models(db, [post.id])
+    refresh_rollups_for_posts(db, [post.id])
+    bump_post_versions(db, [post.id])
     db.commit()
     db.refresh(post)
     return post
@@ -74,10 +129,15 @@ def update_post(
     if not post:
         raise HTTPException(status_code=404, detail="Post non trouvé")
     
+    previous_day = post.posted_at.date() if post.posted_at else None
     update_data = post_in.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(post, field, value)
     
+    db.flush()
+    refresh_read_models(db, [post.id])
+    refresh_rollups_for_posts(db, [post.id], extra_days=[previous_day] if previous_day else [])
+    bump_post_versions(db, [post.id])
     db.commit()
     db.refresh(post)
     return post
@@ -93,7 +153,11 @@ def delete_post(
     if not post:
         raise HTTPException(status_code=404, detail="Post non trouvé")
     
+    bump_post_versions(db, [post.id])
+    posted_day = post.posted_at.date() if post.posted_at else None
     db.delete(post)
+    db.flush()
+    refresh_rollups_for_posts(db, [], extra_days=[posted_day] if posted_day else [])
     db.commit()
     return {"message": "Post supprimé"}
 
@@ -115,34 +179,11 @@ def get_trending_posts_platform(
     current_user: User = Depends(get_current_user)
 ):
     """Récupérer les posts les plus tendance pour une plateforme"""
-    posts = db.query(Post).join(Platform).filter(
-        Platform.name == platform_name,
+    platform_id = get_platform_id(db, platform_name)
+    if platform_id is None:
+        return []
+    posts = db.query(Post).filter(
+        Post.platform_id == platform_id,
         Post.score_trend > 0
     ).order_by(Post.score_trend.desc()).limit(limit).all()
     return posts
-
-@posts_router.get("/search", response_model=List[PostResponse])
-def search_posts(
-    q: str = Query(..., min_length=1, description="Terme de recherche"),
-    platform: Optional[str] = Query(None, description="Filtrer par plateforme"),
-    min_score: Optional[float] = Query(None, ge=0, description="Score minimum"),
-    limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Recherche de posts avec PostgreSQL"""
-    # Recherche PostgreSQL
-    query = db.query(Post)
-    
-    if platform:
-        query = query.join(Platform).filter(Platform.name == platform)
-    
-    if min_score is not None:
-        query = query.filter(Post.score >= min_score)
-    
-    # Recherche basique dans caption
-    query = query.filter(Post.caption.ilike(f"%{q}%"))
-    
-    posts = query.order_by(Post.score_trend.desc(), Post.posted_at.desc()).offset(offset).limit(limit).all()
-    return posts
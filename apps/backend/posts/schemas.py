@@ -38,3 +38,6 @@ class PostResponse(PostBase):
     
     class Config:
         from_attributes = True
+
+# Colonnes Text de Post contenant du JSON, décodées par schema_rows
+POST_JSON_FIELDS = ("hashtags", "metrics")
@@ -1,13 +1,12 @@
 # projects/projects_endpoints.py
 import json
 import logging
-import re
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
-from sqlalchemy import text
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from sqlalchemy import func, text
 from sqlalchemy.orm import Session, joinedload
-from typing import Dict, List, Optional, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
 from uuid import UUID
 
 from db.base import get_db
@@ -17,12 +16,13 @@ from db.models import (
     ProjectHashtag,
     ProjectCreator,
     Hashtag,
-    Platform,
     Post,
     PostHashtag,
     OAuthAccount,
 )
 from auth_unified.auth_endpoints import get_current_user
+from core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, keyset_fetch
+from core.responses import schema_rows
 from projects.schemas import (
     ProjectCreate,
     ProjectUpdate,
@@ -31,7 +31,27 @@ from projects.schemas import (
     ProjectHashtagCreate,
     ProjectPostResponse,
 )
-from services.post_utils import search_posts_by_hashtag, ensure_platform, normalize_hashtag, normalize_creator, load_post_payload
+from services.post_utils import (
+    search_posts_by_hashtag,
+    ensure_platform_id,
+    get_platform_id,
+    insert_post_hashtag_links,
+    normalize_hashtag,
+    normalize_creator,
+)
+from services.ingestion_scheduler import record_project_read
+from services.post_read_model import build_read_model_for_post, read_model_list
+from services.reference_cache import reference_cache
+from services.response_cache import (
+    TREND_SCOPE,
+    bump_content_versions,
+    bump_post_versions,
+    cached_response,
+    etag_json_response,
+    make_etag,
+    project_scope,
+    scopes_etag,
+)
 
 logger = logging.getLogger(__name__)
 projects_router = APIRouter(prefix="/api/v1/projects", tags=["projects"])
@@ -59,25 +79,26 @@ def _collect_project_posts(
     project: Project,
     limit: Optional[int] = None,
     platform_filter: Optional[str] = None,  # 'instagram', 'tiktok', 'facebook', None (all)
+    after: Optional[Tuple[Any, Any]] = None,  # (posted_at, id) du dernier post de la page précédente
 ) -> List[Post]:
     """
-    Collecte les posts d'un projet.
+    Collecte les posts d'un projet, triés par (posted_at DESC NULLS LAST, id DESC).
     Si platform_filter est fourni, filtre par plateforme.
+    Si after est fourni, ne retourne que les posts situés après ce curseur.
     """
     post_map: Dict[str, Post] = {}
     
     # Déterminer les platform_ids à filtrer
     platform_ids = None
     if platform_filter:
-        platform = db.query(Platform).filter(Platform.name == platform_filter).first()
-        if platform:
-            platform_ids = [platform.id]
-            logger.debug(f"[COLLECT] Filtering by platform: {platform_filter} (platform_id: {platform.id})")
+        platform_id = get_platform_id(db, platform_filter)
+        if platform_id is not None:
+            platform_ids = [platform_id]
+            logger.debug(f"[COLLECT] Filtering by platform: {platform_filter} (platform_id: {platform_id})")
         elif platform_filter == 'meta':
             # Meta = Instagram + Facebook
-            meta_platforms = db.query(Platform).filter(Platform.name.in_(['instagram', 'facebook'])).all()
-            platform_ids = [p.id for p in meta_platforms]
-            logger.debug(f"[COLLECT] Filtering by meta platforms: {[p.name for p in meta_platforms]}")
+            platform_ids = reference_cache.platform_ids(db, ['instagram', 'facebook'])
+            logger.debug(f"[COLLECT] Filtering by meta platforms: {platform_ids}")
         else:
             logger.warning(f"[COLLECT] Platform '{platform_filter}' not found in database")
 
@@ -90,15 +111,12 @@ def _collect_project_posts(
     if usernames:
         query = (
             db.query(Post)
-            .options(joinedload(Post.platform))
+            .options(joinedload(Post.platform), joinedload(Post.read_model))
             .filter(Post.author.in_(usernames))
         )
         if platform_ids:
             query = query.filter(Post.platform_id.in_(platform_ids))
-        query = query.order_by(Post.posted_at.desc().nullslast(), Post.fetched_at.desc().nullslast())
-        if limit:
-            query = query.limit(limit)
-        for post in query.all():
+        for post in keyset_fetch(query, Post.posted_at, Post.id, limit, after):
             post_map[post.id] = post
 
     hashtag_links = (
@@ -109,86 +127,34 @@ def _collect_project_posts(
     hashtag_ids = [link.hashtag_id for link in hashtag_links]
     logger.debug(f"[COLLECT] Found {len(hashtag_links)} hashtag links, {len(hashtag_ids)} hashtag_ids")
     if hashtag_ids:
-        # 1️⃣ Essayer d'abord via PostHashtag (liens explicites)
+        # Liens post_hashtags créés à l'ingestion (extraction des hashtags des captions)
         hashtag_query = (
             db.query(Post)
-            .options(joinedload(Post.platform))
-            .join(PostHashtag, PostHashtag.post_id == Post.id)
-            .filter(PostHashtag.hashtag_id.in_(hashtag_ids))
+            .options(joinedload(Post.platform), joinedload(Post.read_model))
+            .filter(
+                Post.id.in_(
+                    db.query(PostHashtag.post_id).filter(PostHashtag.hashtag_id.in_(hashtag_ids))
+                )
+            )
         )
         if platform_ids:
             hashtag_query = hashtag_query.filter(Post.platform_id.in_(platform_ids))
             logger.debug(f"[COLLECT] Filtering posts by platform_ids: {platform_ids}")
-        hashtag_query = hashtag_query.order_by(Post.posted_at.desc().nullslast(), Post.fetched_at.desc().nullslast())
-        if limit:
-            hashtag_query = hashtag_query.limit(limit)
-        posts_from_hashtags = hashtag_query.all()
+        posts_from_hashtags = keyset_fetch(hashtag_query, Post.posted_at, Post.id, limit, after)
         logger.info(f"[COLLECT] Found {len(posts_from_hashtags)} posts from hashtags via PostHashtag (platform_filter: {platform_filter})")
         for post in posts_from_hashtags:
             post_map[post.id] = post
-            logger.debug(f"  - Post {post.id}: platform={post.platform.name if post.platform else 'None'}, caption={post.caption[:50] if post.caption else 'None'}")
-        
-        # 2️⃣ FALLBACK: Si aucun post trouvé via PostHashtag, chercher directement dans caption/hashtags
-        # (comme dans Search page - fallback DB direct)
-        if len(posts_from_hashtags) == 0:
-            logger.warning(f"[COLLECT] No posts found via PostHashtag, trying direct search in caption/hashtags...")
-            
-            # Récupérer les noms des hashtags
-            hashtags = db.query(Hashtag).filter(Hashtag.id.in_(hashtag_ids)).all()
-            hashtag_names = [h.name for h in hashtags]
-            logger.debug(f"[COLLECT] Searching for posts with hashtags: {hashtag_names}")
-            
-            for hashtag_name in hashtag_names:
-                # Utiliser la fonction partagée pour la recherche (avec filtrage par plateforme)
-                fallback_posts = search_posts_by_hashtag(
-                    db, 
-                    hashtag_name, 
-                    limit=limit or 100,
-                    platform_ids=platform_ids
-                )
-                logger.info(f"[COLLECT] Found {len(fallback_posts)} posts via direct search for #{hashtag_name} (platform_filter: {platform_filter})")
-                
-                for post in fallback_posts:
-                    post_map[post.id] = post
-                    logger.debug(f"  - Post {post.id}: platform={post.platform.name if post.platform else 'None'}, caption={post.caption[:50] if post.caption else 'None'}")
-                    
-                    # 🔗 AUTO-LINK: Créer le lien PostHashtag si il n'existe pas
-                    hashtag = next((h for h in hashtags if h.name == hashtag_name), None)
-                    if hashtag:
-                        existing_link = (
-                            db.query(PostHashtag)
-                            .filter(
-                                PostHashtag.post_id == post.id,
-                                PostHashtag.hashtag_id == hashtag.id
-                            )
-                            .first()
-                        )
-                        if not existing_link:
-                            post_hashtag_link = PostHashtag(
-                                post_id=post.id,
-                                hashtag_id=hashtag.id
-                            )
-                            db.add(post_hashtag_link)
-                            logger.debug(f"Auto-linked post {post.id} to hashtag {hashtag.name}")
-            
-            # Commit les auto-links
-            if len(post_map) > len(posts_from_hashtags):
-                try:
-                    db.commit()
-                    logger.info(f"[COLLECT] Auto-linked {len(post_map) - len(posts_from_hashtags)} posts to hashtags")
-                except Exception as e:
-                    logger.exception(f"[COLLECT] Error auto-linking posts: {e}")
-                    db.rollback()
 
     posts = list(post_map.values())
 
-    def _sort_key(post: Post) -> float:
-        for candidate in (post.posted_at, post.fetched_at):
-            if candidate:
-                if candidate.tzinfo:
-                    return candidate.timestamp()
-                return candidate.replace(tzinfo=timezone.utc).timestamp()
-        return 0.0
+    # Même ordre que les requêtes (fusion créateurs + hashtags stable pour le curseur)
+    def _sort_key(post: Post) -> Tuple[bool, float, str]:
+        posted_at = post.posted_at
+        if not posted_at:
+            return (False, 0.0, post.id)
+        if not posted_at.tzinfo:
+            posted_at = posted_at.replace(tzinfo=timezone.utc)
+        return (True, posted_at.timestamp(), post.id)
 
     posts.sort(key=_sort_key, reverse=True)
 
@@ -198,6 +164,9 @@ def _collect_project_posts(
 
 
 def _sync_project_metadata(db: Session, project: Project) -> None:
+    # Hashtags / créateurs modifiés : les ETags des posts du projet changent
+    bump_content_versions(db, [project_scope(project.id)])
+
     creators = (
         db.query(ProjectCreator)
         .filter(ProjectCreator.project_id == project.id)
@@ -259,13 +228,13 @@ def _attach_creator(
     normalized_platform = (platform_name or "").strip().lower()
     if not normalized_platform:
         raise HTTPException(status_code=400, detail="Platform invalide")
-    platform = ensure_platform(db, normalized_platform)
+    platform_id = ensure_platform_id(db, normalized_platform)
 
     existing = (
         db.query(ProjectCreator)
         .filter(
             ProjectCreator.project_id == project.id,
-            ProjectCreator.platform_id == platform.id,
+            ProjectCreator.platform_id == platform_id,
             ProjectCreator.creator_username == normalized_username,
         )
         .first()
@@ -276,7 +245,7 @@ def _attach_creator(
     creator = ProjectCreator(
         project_id=project.id,
         creator_username=normalized_username,
-        platform_id=platform.id,
+        platform_id=platform_id,
     )
     db.add(creator)
     return creator
@@ -296,67 +265,34 @@ def _attach_hashtag(
     normalized_platform = (platform_name or "").strip().lower()
     if not normalized_platform:
         raise HTTPException(status_code=400, detail="Platform invalide")
-    platform = ensure_platform(db, normalized_platform)
+    platform_id = ensure_platform_id(db, normalized_platform)
 
-    hashtag = (
-        db.query(Hashtag)
-        .filter(Hashtag.name == normalized_name, Hashtag.platform_id == platform.id)
-        .first()
-    )
-    if not hashtag:
-        hashtag = Hashtag(name=normalized_name, platform_id=platform.id)
+    # hashtags.name est unique : un hashtag déjà créé (ingestion, autre plateforme) est réutilisé
+    cached = reference_cache.hashtag(db, normalized_name)
+    if cached:
+        hashtag_id = cached[0]
+    else:
+        hashtag = Hashtag(name=normalized_name, platform_id=platform_id)
         db.add(hashtag)
         db.flush()
+        hashtag_id = hashtag.id
+        reference_cache.remember_on_commit(db, "hashtag", normalized_name, hashtag_id, platform_id)
 
     existing = (
         db.query(ProjectHashtag)
         .filter(
             ProjectHashtag.project_id == project.id,
-            ProjectHashtag.hashtag_id == hashtag.id,
+            ProjectHashtag.hashtag_id == hashtag_id,
         )
         .first()
     )
     if existing:
         raise HTTPException(status_code=409, detail="Hashtag already linked to project")
 
-    project_hashtag = ProjectHashtag(project_id=project.id, hashtag_id=hashtag.id)
+    project_hashtag = ProjectHashtag(project_id=project.id, hashtag_id=hashtag_id)
     db.add(project_hashtag)
     
-    # 🔥 AUTO-LINK: Chercher les posts qui contiennent ce hashtag sur TOUTES les plateformes
-    posts_with_hashtag = search_posts_by_hashtag(db, normalized_name, limit=100)
-    
-    linked_count = 0
-    platform_counts = {}
-    for post in posts_with_hashtag:
-        # Vérifier si le lien existe déjà
-        existing_link = (
-            db.query(PostHashtag)
-            .filter(
-                PostHashtag.post_id == post.id,
-                PostHashtag.hashtag_id == hashtag.id
-            )
-            .first()
-        )
-        
-        if not existing_link:
-            post_hashtag_link = PostHashtag(
-                post_id=post.id,
-                hashtag_id=hashtag.id
-            )
-            db.add(post_hashtag_link)
-            linked_count += 1
-            
-            # Compter par plateforme
-            platform_name = post.platform.name if post.platform else 'unknown'
-            platform_counts[platform_name] = platform_counts.get(platform_name, 0) + 1
-    
-    if linked_count > 0:
-        platform_summary = ", ".join([f"{count} {platform}" for platform, count in platform_counts.items()])
-        logger.info(f"Auto-linked {linked_count} posts to #{normalized_name} ({platform_summary})")
-        db.flush()  # Commit les liens immédiatement
-    else:
-        logger.warning(f"No posts found with #{normalized_name} in caption")
-    
+    # Les posts contenant ce hashtag sont déjà liés à l'ingestion (post_hashtags)
     return project_hashtag
 
 
@@ -412,17 +348,34 @@ def serialize_project(project: Project, include_relations: bool = True) -> dict:
 
 @projects_router.get("", response_model=List[ProjectResponse])
 def list_projects(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Liste tous les projets de l'utilisateur"""
+    """Liste tous les projets de l'utilisateur (ETag : nombre et dernière modification des projets)"""
     try:
+        count, last_updated = (
+            db.query(func.count(Project.id), func.max(Project.updated_at))
+            .filter(Project.user_id == current_user.id)
+            .one()
+        )
+        etag = make_etag("projects", current_user.id, count, last_updated)
+        cache_key = ("projects", str(current_user.id))
+        cached = cached_response(request, cache_key, etag)
+        if cached is not None:
+            return cached
+
         projects = (
             db.query(Project)
             .filter(Project.user_id == current_user.id)
             .all()
         )
-        return [serialize_project(p, include_relations=False) for p in projects]
+        return etag_json_response(
+            cache_key,
+            etag,
+            List[ProjectResponse],
+            [serialize_project(p, include_relations=False) for p in projects],
+        )
     except Exception as exc:
         logger.exception("Erreur lors de la récupération des projets pour l'utilisateur %s", current_user.id)
         raise HTTPException(status_code=500, detail=f"Impossible de lister les projets: {exc}") from exc
@@ -440,147 +393,83 @@ def get_project(
 @projects_router.get("/{project_id}/posts", response_model=List[ProjectPostResponse])
 def list_project_posts(
     project_id: str,
+    request: Request,
     platform: Optional[str] = Query(None, description="Filter by platform: 'instagram', 'tiktok', 'facebook', 'meta'"),
+    limit: int = Query(60, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Curseur X-Next-Cursor de la page précédente"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Retourne les posts associés au projet (via ses créateurs)."""
+    """
+    Retourne les posts associés au projet (via ses créateurs et hashtags), page suivante dans X-Next-Cursor.
+    ETag dérivé de la version du projet : un poll sans nouveauté reçoit un 304 sans lire les posts.
+    """
     try:
         project = _get_project_or_404(db, current_user, project_id)
+        record_project_read(project.id)
+        etag = scopes_etag(db, [project_scope(project.id), TREND_SCOPE], platform, limit, cursor)
+        cache_key = ("project_posts", str(project.id), platform, limit, cursor)
+        cached = cached_response(request, cache_key, etag)
+        if cached is not None:
+            return cached
+
         logger.info(f"Loading posts for project {project_id} (platform filter: {platform})")
 
-        posts = _collect_project_posts(db, project, limit=60, platform_filter=platform)
+        after = decode_cursor(cursor, "posted_at") if cursor else None
+        posts = _collect_project_posts(db, project, limit=limit + 1, platform_filter=platform, after=after)
+        headers = None
+        if len(posts) > limit:
+            posts = posts[:limit]
+            headers = {NEXT_CURSOR_HEADER: encode_cursor("posted_at", posts[-1].posted_at, posts[-1].id)}
         logger.info(f"Found {len(posts)} posts for project {project_id}")
-        if not posts:
-            return []
 
-        results: List[ProjectPostResponse] = []
+        # Lignes projetées sur ProjectPostResponse, sérialisées par orjson sans construire les modèles
+        rows = schema_rows(ProjectPostResponse)
+        results: List[Dict[str, Any]] = []
+        missing_read_models = 0
         for post in posts:
             try:
-                # Charger payload une seule fois par post
-                payload_data = load_post_payload(post)
-                metrics = payload_data["metrics"]
-                api_payload = payload_data["api_payload"]
-                
-                permalink = None
-                platform_name = post.platform.name if post.platform else 'instagram'
-                
-                # PRIORITÉ 1: Chercher permalink dans api_payload (le plus fiable, contient le vrai permalink)
-                if api_payload:
-                    permalink_candidate = (
-                        api_payload.get('permalink')
-                        or api_payload.get('share_url')
-                        or api_payload.get('url')
-                        or (api_payload.get('media_details') or {}).get('permalink')
-                    )
-                    if isinstance(permalink_candidate, str) and permalink_candidate.startswith('http'):
-                        permalink = permalink_candidate
-                
-                # PRIORITÉ 2: Construire depuis external_id seulement si pas de permalink
-                if not permalink and post.external_id and isinstance(post.external_id, str):
-                    if post.external_id.startswith('http'):
-                        permalink = post.external_id
-                    elif platform_name == 'tiktok':
-                        # TikTok: external_id est le video_id, construire l'URL
-                        permalink = f"https://www.tiktok.com/@{(post.author or 'user')}/video/{post.external_id}"
-                    elif platform_name == 'instagram':
-                        # Instagram : vérifier si c'est un ID numérique (ne fonctionne pas avec oEmbed)
-                        external_id_clean = post.external_id.strip('/')
-                        if not external_id_clean.isdigit():
-                            # Code court valide - construire l'URL
-                            permalink = f"https://www.instagram.com/p/{external_id_clean}/"
-                        # Si c'est un ID numérique, ne pas créer de permalink (oEmbed ne le supporte pas)
-                        # Le permalink restera None, ce qui empêchera l'appel oEmbed avec une URL invalide
-
-                # Pour TikTok, extraire cover_image_url ou thumbnail_url depuis api_payload si media_url manquant
-                media_url = post.media_url
-                if platform_name == 'tiktok' and not media_url and api_payload:
-                    media_url = (
-                        api_payload.get('cover_image_url')
-                        or api_payload.get('thumbnail_url')
-                        or api_payload.get('media_url')
-                    )
-                
-                # Extraire hashtags et mentions depuis caption ou colonne hashtags
-                hashtags_list = post.hashtags if isinstance(post.hashtags, list) else []
-                if not hashtags_list and post.caption:
-                    # Extraire hashtags depuis caption si colonne hashtags vide
-                    hashtags_list = re.findall(r'#\w+', post.caption)
-                
-                mentions_list = []
-                if post.caption:
-                    mentions_list = re.findall(r'@\w+', post.caption)
-                
-                # Extraire username depuis api_payload si author est vide
-                author = post.author
-                if not author and api_payload:
-                    # Essayer plusieurs champs possibles
-                    author = (
-                        api_payload.get('username')
-                        or api_payload.get('owner_username')
-                        or api_payload.get('from', {}).get('username')
-                        or api_payload.get('creator', {}).get('username')
-                    )
-                    # Si toujours pas trouvé, essayer depuis permalink
-                    if not author and permalink:
-                        permalink_match = re.search(r'instagram\.com/([^/]+)/', permalink)
-                        if permalink_match:
-                            potential_username = permalink_match.group(1)
-                            if potential_username not in ['p', 'reel', 'tv', 'stories']:
-                                author = potential_username
-                
-                # Extraire metrics avec fallback sur plusieurs clés
-                # Utiliser get() avec None comme défaut pour distinguer 0 de None
-                like_count = (
-                    metrics.get('like_count') if 'like_count' in metrics else
-                    metrics.get('likes') if 'likes' in metrics else
-                    api_payload.get('like_count') if api_payload and 'like_count' in api_payload else
-                    api_payload.get('likes') if api_payload and 'likes' in api_payload else
-                    None
-                )
-                comment_count = (
-                    metrics.get('comment_count') if 'comment_count' in metrics else
-                    metrics.get('comments_count') if 'comments_count' in metrics else
-                    metrics.get('comments') if 'comments' in metrics else
-                    api_payload.get('comment_count') if api_payload and 'comment_count' in api_payload else
-                    api_payload.get('comments_count') if api_payload and 'comments_count' in api_payload else
-                    None
-                )
-                
-                # Convertir en int si présent, sinon None (pour distinguer 0 de None)
-                like_count_int = int(like_count) if like_count is not None else None
-                comment_count_int = int(comment_count) if comment_count is not None else None
-                
-                # S'assurer que tous les champs sont valides avant de créer ProjectPostResponse
-                post_data = {
-                    "id": str(post.id) if post.id else "",
-                    "author": author,
-                    "username": author,  # Alias pour compatibilité frontend
-                    "caption": post.caption,
-                    "media_url": media_url,
-                    "permalink": permalink,
-                    "posted_at": post.posted_at,
-                    "fetched_at": post.fetched_at,
-                    "platform": post.platform.name if post.platform else None,
-                    "like_count": like_count_int,
-                    "comment_count": comment_count_int,
-                    "share_count": int(metrics.get('share_count') or api_payload.get('share_count') or 0) if (metrics.get('share_count') or api_payload.get('share_count')) else None,
-                    "view_count": int(metrics.get('view_count') or api_payload.get('view_count') or 0) if (metrics.get('view_count') or api_payload.get('view_count')) else None,
-                    "score_trend": float(post.score_trend) if post.score_trend is not None else None,
-                    "hashtags": hashtags_list or [],
-                    "mentions": mentions_list or [],
-                    "location": None,  # Pas stocké actuellement dans Post
-                    "media_type": api_payload.get('media_type') if api_payload else None,
-                    "thumbnail_url": api_payload.get('thumbnail_url') if api_payload else None,
-                    "external_id": post.external_id,
-                }
-                results.append(ProjectPostResponse(**post_data))
+                # Projection du read model calculé à l'ingestion (recalcul à la volée si absent)
+                read_model = post.read_model
+                if read_model is not None:
+                    derived = {
+                        "author": read_model.author,
+                        "permalink": read_model.permalink,
+                        "media_url": read_model.media_url,
+                        "thumbnail_url": read_model.thumbnail_url,
+                        "media_type": read_model.media_type,
+                        "like_count": read_model.like_count,
+                        "comment_count": read_model.comment_count,
+                        "share_count": read_model.share_count,
+                        "view_count": read_model.view_count,
+                        "hashtags": read_model_list(read_model.hashtags),
+                        "mentions": read_model_list(read_model.mentions),
+                    }
+                else:
+                    missing_read_models += 1
+                    derived = build_read_model_for_post(post)
+                    derived.pop("post_id")
+
+                results.append(rows.from_values(dict(
+                    id=str(post.id) if post.id else "",
+                    username=derived["author"],  # Alias pour compatibilité frontend
+                    caption=post.caption,
+                    posted_at=post.posted_at,
+                    fetched_at=post.fetched_at,
+                    platform=post.platform.name if post.platform else None,
+                    score_trend=float(post.score_trend) if post.score_trend is not None else None,
+                    location=None,  # Pas stocké actuellement dans Post
+                    external_id=post.external_id,
+                    **derived,
+                )))
             except Exception as e:
                 logger.error(f"Error processing post {post.id} in project {project_id}: {e}", exc_info=True)
                 # Continue avec les autres posts au lieu de faire échouer toute la requête
                 continue
 
-        return results
+        if missing_read_models:
+            logger.info(f"{missing_read_models} posts without read model in project {project_id} (run scripts/backfill_post_read_models.py)")
+        return etag_json_response(cache_key, etag, List[ProjectPostResponse], results, headers, prevalidated=True)
     except HTTPException:
         raise
     except Exception as e:
@@ -877,34 +766,16 @@ def link_posts_to_project_hashtag(
     # Rechercher les posts (utilise la fonction partagée)
     posts_with_hashtag = search_posts_by_hashtag(db, normalized_name, limit=limit)
     
-    linked_count = 0
-    already_linked = 0
-    platform_counts = {}
+    # Un seul INSERT ... ON CONFLICT DO NOTHING pour tous les liens
+    linked_count = insert_post_hashtag_links(db, ((post.id, hashtag.id) for post in posts_with_hashtag))
+    already_linked = len(posts_with_hashtag) - linked_count
+    if linked_count:
+        bump_post_versions(db, [post.id for post in posts_with_hashtag])
     
+    platform_counts = {}
     for post in posts_with_hashtag:
         platform_name = post.platform.name if post.platform else 'unknown'
-        logger.debug(f"  - Post {post.id}: platform={platform_name}, caption={post.caption[:50] if post.caption else 'None'}")
-        existing_link = (
-            db.query(PostHashtag)
-            .filter(
-                PostHashtag.post_id == post.id,
-                PostHashtag.hashtag_id == hashtag.id
-            )
-            .first()
-        )
-        
-        if not existing_link:
-            post_hashtag_link = PostHashtag(
-                post_id=post.id,
-                hashtag_id=hashtag.id
-            )
-            db.add(post_hashtag_link)
-            linked_count += 1
-            
-            platform_name = post.platform.name if post.platform else 'unknown'
-            platform_counts[platform_name] = platform_counts.get(platform_name, 0) + 1
-        else:
-            already_linked += 1
+        platform_counts[platform_name] = platform_counts.get(platform_name, 0) + 1
     
     db.commit()
     
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Backfill ponctuel de post_hashtags : extrait les hashtags des captions des posts
+existants et crée hashtags + liens en lot (ON CONFLICT DO NOTHING, relançable).
+
+Usage: python scripts/backfill_post_hashtags.py [--chunk-size 1000] [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.base import SessionLocal  # noqa: E402
+from db.models import Post  # noqa: E402
+from services.post_utils import extract_hashtags, link_post_hashtags  # noqa: E402
+
+
+def backfill(chunk_size: int, dry_run: bool) -> None:
+    db = SessionLocal()
+    last_id = None
+    scanned = 0
+    linked = 0
+    started = time.perf_counter()
+    try:
+        while True:
+            # Pagination par clé (id) : pas d'OFFSET qui ralentit au fil des chunks
+            query = db.query(Post.id, Post.platform_id, Post.caption).order_by(Post.id)
+            if last_id is not None:
+                query = query.filter(Post.id > last_id)
+            rows = query.limit(chunk_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            scanned += len(rows)
+
+            by_platform = defaultdict(dict)
+            for post_id, platform_id, caption in rows:
+                tags = extract_hashtags(caption)
+                if tags:
+                    by_platform[platform_id][post_id] = tags
+
+            if dry_run:
+                linked += sum(len(tags) for posts in by_platform.values() for tags in posts.values())
+            else:
+                for platform_id, hashtags_by_post in by_platform.items():
+                    linked += link_post_hashtags(db, platform_id, hashtags_by_post)
+                db.commit()
+
+            print(f"🔧 {scanned:,} posts traités, {linked:,} liens {'à créer' if dry_run else 'créés'} ({time.perf_counter() - started:.1f}s)")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    print(f"✅ Backfill terminé : {scanned:,} posts, {linked:,} liens {'à créer' if dry_run else 'créés'}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Lie les posts existants à leurs hashtags (captions)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Posts par transaction")
+    parser.add_argument("--dry-run", action="store_true", help="Compter sans écrire")
+    args = parser.parse_args()
+    backfill(args.chunk_size, args.dry_run)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Backfill ponctuel de post_read_models : calcule le read model des posts existants
+par chunks (INSERT ... ON CONFLICT DO UPDATE, relançable).
+
+Usage: python scripts/backfill_post_read_models.py [--chunk-size 1000] [--missing-only]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.base import SessionLocal  # noqa: E402
+from db.models import Post, PostReadModel  # noqa: E402
+from services.post_read_model import refresh_read_models  # noqa: E402
+
+
+def backfill(chunk_size: int, missing_only: bool) -> None:
+    db = SessionLocal()
+    last_id = None
+    written = 0
+    started = time.perf_counter()
+    try:
+        while True:
+            # Pagination par clé (id) : pas d'OFFSET qui ralentit au fil des chunks
+            query = db.query(Post.id).order_by(Post.id)
+            if missing_only:
+                query = query.outerjoin(PostReadModel, PostReadModel.post_id == Post.id).filter(PostReadModel.post_id.is_(None))
+            if last_id is not None:
+                query = query.filter(Post.id > last_id)
+            post_ids = [post_id for (post_id,) in query.limit(chunk_size).all()]
+            if not post_ids:
+                break
+            last_id = post_ids[-1]
+
+            written += refresh_read_models(db, post_ids)
+            db.commit()
+            print(f"🔧 {written:,} read models écrits ({time.perf_counter() - started:.1f}s)")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    print(f"✅ Backfill terminé : {written:,} read models")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Calcule le read model des posts existants")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Posts par transaction")
+    parser.add_argument("--missing-only", action="store_true", help="Seulement les posts sans read model")
+    args = parser.parse_args()
+    backfill(args.chunk_size, args.missing_only)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test de charge : blocage de la boucle d'événements par les requêtes DB des endpoints async.
+
+Compare les deux façons d'accéder à la DB depuis un endpoint `async def` :
+- avant : Session sync (get_db) -> la requête s'exécute sur la boucle et gèle tout le worker
+- après : AsyncSession (get_async_db, asyncpg / aiosqlite) -> la boucle reste libre
+
+Pendant que N requêtes lentes (requête SQL de --query-ms) tournent en parallèle, une
+sonde mesure le retard de la boucle et un client mesure la latence de /ping.
+SQLite temporaire par défaut ; --database pour une base PostgreSQL de test (pg_sleep).
+
+Usage: python scripts/bench_event_loop.py [--requests 50] [--concurrency 10] [--query-ms 50]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROBE_INTERVAL = 0.005
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def build_app(slow_sql: str, query_ms: float):
+    from fastapi import Depends, FastAPI
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import Session
+
+    from db.base import get_async_db, get_db
+
+    app = FastAPI()
+
+    @app.get("/before")
+    async def before(db: Session = Depends(get_db)):
+        db.execute(text(slow_sql), {"ms": query_ms})
+        return {"ok": True}
+
+    @app.get("/after")
+    async def after(db: AsyncSession = Depends(get_async_db)):
+        await db.execute(text(slow_sql), {"ms": query_ms})
+        return {"ok": True}
+
+    @app.get("/ping")
+    async def ping():
+        return {"pong": True}
+
+    return app
+
+
+async def run_mode(app, path: str, requests: int, concurrency: int) -> dict:
+    import httpx
+
+    lags = []
+    ping_latencies = []
+    done = asyncio.Event()
+
+    async def probe():
+        # Retard de réveil d'un sleep court = temps pendant lequel la boucle était occupée
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(PROBE_INTERVAL)
+            lags.append(max(0.0, time.perf_counter() - started - PROBE_INTERVAL))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await client.get(path)  # chauffe (connexions du pool)
+
+        async def pinger():
+            # Latence mesurée depuis l'instant prévu de l'envoi (inclut l'attente de la boucle)
+            while not done.is_set():
+                scheduled = time.perf_counter() + 0.01
+                await asyncio.sleep(0.01)
+                await client.get("/ping")
+                ping_latencies.append(time.perf_counter() - scheduled)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                response = await client.get(path)
+                response.raise_for_status()
+
+        probe_task = asyncio.create_task(probe())
+        ping_task = asyncio.create_task(pinger())
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await asyncio.gather(probe_task, ping_task)
+
+    return {
+        "seconds": elapsed,
+        "rps": requests / elapsed,
+        "lag_max_ms": max(lags, default=0.0) * 1000,
+        "lag_p95_ms": _percentile(lags, 0.95) * 1000,
+        "blocked_ms": sum(lags) * 1000,
+        "ping_p50_ms": statistics.median(ping_latencies) * 1000 if ping_latencies else 0.0,
+        "ping_p95_ms": _percentile(ping_latencies, 0.95) * 1000,
+        "pings": len(ping_latencies),
+    }
+
+
+async def bench(args) -> None:
+    from sqlalchemy import event
+
+    from db.base import async_engine, engine
+
+    if engine.dialect.name == "sqlite":
+        # Requête lente simulée : fonction SQL qui dort (exécutée par le driver, comme un vrai I/O)
+        def _register_sleep(dbapi_connection, connection_record):
+            dbapi_connection.create_function("bench_sleep", 1, lambda ms: time.sleep(ms / 1000.0) or 1)
+
+        event.listen(engine, "connect", _register_sleep)
+        event.listen(async_engine.sync_engine, "connect", _register_sleep)
+        slow_sql = "SELECT bench_sleep(:ms)"
+    else:
+        slow_sql = "SELECT pg_sleep(:ms / 1000.0)"
+
+    app = build_app(slow_sql, args.query_ms)
+    print(f"🔧 {args.requests} requêtes, concurrence {args.concurrency}, requête SQL de {args.query_ms:.0f} ms ({engine.dialect.name})")
+    for label, path in (("avant (Session sync)", "/before"), ("après (AsyncSession)", "/after")):
+        result = await run_mode(app, path, args.requests, args.concurrency)
+        print(f"   {label}")
+        print(f"      {result['rps']:8.1f} req/s en {result['seconds']:.2f}s")
+        print(f"      boucle bloquée : max {result['lag_max_ms']:.1f} ms, p95 {result['lag_p95_ms']:.1f} ms, total {result['blocked_ms']:.0f} ms")
+        print(f"      /ping concurrent : p50 {result['ping_p50_ms']:.1f} ms, p95 {result['ping_p95_ms']:.1f} ms ({result['pings']} pings)")
+
+    await async_engine.dispose()
+    engine.dispose()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Blocage de la boucle d'événements : Session sync vs AsyncSession")
+    parser.add_argument("--requests", type=int, default=50, help="Nombre de requêtes lentes")
+    parser.add_argument("--concurrency", type=int, default=10, help="Requêtes lentes simultanées")
+    parser.add_argument("--query-ms", type=float, default=50.0, help="Durée de la requête SQL simulée (ms)")
+    parser.add_argument("--database", default=None, help="URL de base de test (SQLite temporaire par défaut)")
+    args = parser.parse_args()
+
+    # La config exige ces variables : valeurs factices suffisantes pour le benchmark
+    for name in ("SECRET_KEY", "OAUTH_STATE_SECRET", "WEBHOOK_VERIFY_TOKEN"):
+        os.environ.setdefault(name, "bench")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # db.base lit DATABASE_URL à l'import : à fixer avant tout import applicatif
+        os.environ["DATABASE_URL"] = args.database or f"sqlite:///{tmp}/bench.db"
+        os.environ.pop("ASYNC_DATABASE_URL", None)
+        asyncio.run(bench(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
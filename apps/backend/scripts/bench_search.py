@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark recherche posts : ILIKE (ancien chemin) vs tsvector/GIN + pg_trgm.
+
+Crée un jeu synthétique dans un schéma dédié (bench_search) de la base DATABASE_URL
+(PostgreSQL requis, extension pg_trgm disponible), puis chronomètre les deux chemins.
+
+Usage: DATABASE_URL=postgresql://... python scripts/bench_search.py --rows 1000000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+
+SCHEMA = "bench_search"
+
+VOCABULARY = [
+    "fashion", "streetwear", "vintage", "sneakers", "paris", "runway", "denim", "luxury",
+    "beauty", "skincare", "makeup", "travel", "summer", "food", "coffee", "design",
+    "interior", "art", "music", "festival", "fitness", "yoga", "nature", "sunset",
+    "minimal", "techwear", "outfit", "style", "trend", "tiktok", "reels", "launch",
+]
+
+# Même expression que la migration posts_search
+SEARCH_VECTOR_EXPRESSION = """
+    setweight(to_tsvector('simple', coalesce(caption, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(hashtags, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(author, '')), 'C')
+"""
+
+QUERIES = {
+    "ilike_caption": """
+        SELECT id FROM posts
+        WHERE caption ILIKE :pattern
+        ORDER BY score_trend DESC, posted_at DESC
+        LIMIT 20
+    """,
+    "ilike_hashtag": """
+        SELECT id FROM posts
+        WHERE caption ILIKE :hash_pattern OR caption ILIKE :pattern
+           OR (hashtags IS NOT NULL AND hashtags ILIKE :pattern)
+        ORDER BY posted_at DESC NULLS LAST
+        LIMIT 100
+    """,
+    "fts_ranked": """
+        SELECT id FROM posts
+        WHERE search_vector @@ to_tsquery('simple', :tsquery) OR caption ILIKE :pattern
+        ORDER BY ts_rank(search_vector, to_tsquery('simple', :tsquery), 1)
+                 * (1 + 0.2 * ln(1 + greatest(coalesce(score_trend, 0), 0))) DESC,
+                 posted_at DESC NULLS LAST
+        LIMIT 20
+    """,
+    "fts_hashtag": """
+        SELECT id FROM posts
+        WHERE search_vector @@ to_tsquery('simple', :tsquery)
+        ORDER BY posted_at DESC NULLS LAST
+        LIMIT 100
+    """,
+}
+
+
+def setup_dataset(conn, rows: int) -> None:
+    """Génère `rows` posts aléatoires (captions et hashtags tirés du vocabulaire)"""
+    print(f"🔧 Génération de {rows:,} posts synthétiques dans le schéma {SCHEMA}...")
+    started = time.perf_counter()
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    conn.execute(text(f"SET search_path TO {SCHEMA}, public"))
+    conn.execute(text("""
+        CREATE TABLE posts (
+            id text PRIMARY KEY,
+            platform_id integer NOT NULL,
+            author varchar(255),
+            caption text,
+            hashtags text,
+            score_trend double precision,
+            posted_at timestamp,
+            search_vector tsvector
+        )
+    """))
+    conn.execute(
+        text("""
+            INSERT INTO posts (id, platform_id, author, caption, hashtags, score_trend, posted_at)
+            SELECT
+                'p' || g,
+                1 + (g % 2),
+                'creator_' || (g % 5000),
+                (SELECT string_agg(w.word, ' ')
+                   FROM (SELECT (:vocab)[1 + floor(random() * :vocab_size)::int] AS word
+                         FROM generate_series(1, 12 + (g % 3))) w)
+                || ' #' || (:vocab)[1 + (g % :vocab_size)],
+                '["' || (:vocab)[1 + ((g * 7) % :vocab_size)] || '","'
+                     || (:vocab)[1 + ((g * 13) % :vocab_size)] || '"]',
+                random() * 100,
+                now() - (g % 100000) * interval '1 minute'
+            FROM generate_series(1, :rows) g
+        """),
+        {"vocab": VOCABULARY, "vocab_size": len(VOCABULARY), "rows": rows},
+    )
+    conn.execute(text(f"UPDATE posts SET search_vector = {SEARCH_VECTOR_EXPRESSION}"))
+    conn.execute(text("CREATE INDEX ix_bench_posts_search_vector ON posts USING gin (search_vector)"))
+    conn.execute(text("CREATE INDEX ix_bench_posts_caption_trgm ON posts USING gin (caption gin_trgm_ops)"))
+    conn.execute(text("ANALYZE posts"))
+    print(f"✅ Jeu de données prêt en {time.perf_counter() - started:.1f}s")
+
+
+def run_query(conn, name: str, params: dict, repeat: int) -> dict:
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(text(QUERIES[name]), params).fetchall()
+        durations.append((time.perf_counter() - started) * 1000)
+    plan = conn.execute(text("EXPLAIN " + QUERIES[name]), params).fetchall()
+    scan = "Seq Scan" if any("Seq Scan" in row[0] for row in plan) else "Index/Bitmap Scan"
+    durations.sort()
+    return {
+        "p50": statistics.median(durations),
+        "p95": durations[max(0, int(len(durations) * 0.95) - 1)],
+        "mean": statistics.fmean(durations),
+        "scan": scan,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark ILIKE vs plein texte sur les posts")
+    parser.add_argument("--rows", type=int, default=200_000, help="Nombre de posts synthétiques")
+    parser.add_argument("--repeat", type=int, default=20, help="Exécutions par requête")
+    parser.add_argument("--terms", nargs="+", default=["fashion", "sneak", "techwear"], help="Termes recherchés")
+    parser.add_argument("--keep", action="store_true", help="Conserver le schéma de benchmark")
+    args = parser.parse_args()
+
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url or not database_url.startswith("postgres"):
+        print("❌ DATABASE_URL PostgreSQL requis")
+        return 1
+
+    engine = create_engine(database_url)
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        setup_dataset(conn, args.rows)
+        try:
+            print(f"\n{'terme':<12}{'requête':<16}{'p50 ms':>10}{'p95 ms':>10}{'moy ms':>10}  plan")
+            print("-" * 76)
+            for term in args.terms:
+                params = {
+                    "pattern": f"%{term}%",
+                    "hash_pattern": f"%#{term}%",
+                    "tsquery": f"{term}:*",
+                }
+                results = {name: run_query(conn, name, params, args.repeat) for name in QUERIES}
+                for name, result in results.items():
+                    print(
+                        f"{term:<12}{name:<16}{result['p50']:>10.2f}{result['p95']:>10.2f}"
+                        f"{result['mean']:>10.2f}  {result['scan']}"
+                    )
+                speedup = results["ilike_caption"]["p50"] / max(results["fts_ranked"]["p50"], 1e-6)
+                print(f"{'':<12}→ recherche plein texte x{speedup:.1f} vs ILIKE (p50)\n")
+        finally:
+            if not args.keep:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
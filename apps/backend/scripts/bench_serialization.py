@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark : CPU par requête et octets transférés pour une réponse de N posts (1000 par défaut).
+
+Compare, sur la même liste de posts en mémoire (pas de DB : seule la sérialisation diffère) :
+- response_model : l'endpoint retourne les objets ORM, FastAPI valide List[PostResponse]
+  puis ré-encode avec le json de la stdlib (chemin par défaut)
+- orjson : lignes projetées sur PostResponse (core.responses.SchemaRows) et FastJSONResponse
+
+puis la taille du corps avec et sans GZip (GZipMiddleware, seuil GZIP_MIN_SIZE). Le CPU mesuré
+inclut le client en process (décodage / décompression), identique pour les deux variantes.
+
+Usage: python scripts/bench_serialization.py [--posts 1000] [--requests 200]
+"""
+
+import argparse
+import asyncio
+import datetime as dt
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_posts(count: int):
+    from db.models import Post
+
+    rng = random.Random(42)
+    now = dt.datetime(2024, 6, 1)
+    words = ["trend", "summer", "style", "food", "travel", "beauty", "fitness", "music"]
+    return [
+        Post(
+            id=f"ig_{17900000000000000 + i}",
+            external_id=str(17900000000000000 + i),
+            platform_id=1,
+            author=f"creator_{rng.randint(1, 300)}",
+            caption=" ".join(rng.choices(words, k=20)) + " #" + " #".join(rng.sample(words, 3)),
+            hashtags=rng.sample(words, 3),
+            metrics={"like_count": rng.randint(0, 50000), "comments_count": rng.randint(0, 2000)},
+            posted_at=now - dt.timedelta(minutes=i * 7),
+            fetched_at=now,
+            language="fr",
+            media_url=f"https://scontent.cdninstagram.com/v/t51.29350-15/{i}_n.jpg",
+            sentiment=rng.random(),
+            score=rng.random() * 100,
+            score_trend=rng.random() * 10,
+        )
+        for i in range(count)
+    ]
+
+
+def build_app(posts):
+    from typing import List
+
+    from fastapi import FastAPI
+    from fastapi.middleware.gzip import GZipMiddleware
+
+    from core.config import settings
+    from core.responses import FastJSONResponse, schema_rows
+    from posts.schemas import POST_JSON_FIELDS, PostResponse
+
+    app = FastAPI()
+
+    @app.get("/response_model", response_model=List[PostResponse])
+    async def response_model():
+        return posts
+
+    @app.get("/orjson", response_model=List[PostResponse])
+    async def fast():
+        return FastJSONResponse(schema_rows(PostResponse, POST_JSON_FIELDS).many(posts))
+
+    app.add_middleware(GZipMiddleware, minimum_size=max(settings.GZIP_MIN_SIZE, 1), compresslevel=settings.GZIP_COMPRESSLEVEL)
+    return app
+
+
+async def measure(client, path: str, requests: int, encoding: str):
+    response = await client.get(path, headers={"Accept-Encoding": encoding})
+    wire_bytes = int(response.headers.get("content-length", len(response.content)))
+    cpu_started = time.process_time()
+    for _ in range(requests):
+        await client.get(path, headers={"Accept-Encoding": encoding})
+    cpu_ms = (time.process_time() - cpu_started) / requests * 1000
+    return cpu_ms, wire_bytes, response.json()
+
+
+async def bench(args) -> None:
+    import httpx
+
+    posts = make_posts(args.posts)
+    app = build_app(posts)
+    print(f"🔧 {args.posts} posts, {args.requests} requêtes par variante (CPU process, client ASGI en process)")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        results = {}
+        for path in ("/response_model", "/orjson"):
+            for encoding in ("identity", "gzip"):
+                results[(path, encoding)] = await measure(client, path, args.requests, encoding)
+
+    baseline = results[("/response_model", "identity")]
+    for (path, encoding), (cpu_ms, wire_bytes, payload) in results.items():
+        same = "identique" if payload == baseline[2] else "DIFFÉRENT"
+        print(f"   {path[1:]:<15} {encoding:<9} {cpu_ms:7.2f} ms CPU/req  {wire_bytes / 1024:8.1f} Ko  (JSON {same})")
+    print(f"   gain CPU orjson : x{baseline[0] / results[('/orjson', 'identity')][0]:.2f}, "
+          f"octets gzip : {results[('/orjson', 'gzip')][1] / baseline[1]:.0%} du corps brut")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="CPU et octets : response_model + json stdlib vs orjson, avec/sans GZip")
+    parser.add_argument("--posts", type=int, default=1000, help="Posts par réponse")
+    parser.add_argument("--requests", type=int, default=200, help="Requêtes mesurées par variante")
+    args = parser.parse_args()
+
+    # La config exige ces variables : valeurs factices suffisantes pour le benchmark
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+    for name in ("SECRET_KEY", "OAUTH_STATE_SECRET", "WEBHOOK_VERIFY_TOKEN"):
+        os.environ.setdefault(name, "bench")
+
+    asyncio.run(bench(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark du moteur de scoring des tendances (posts/seconde).
+
+1. Calcul seul : compute_trend_scores (NumPy) vs la même formule en Python ligne à ligne
+2. Bout en bout : run_trend_scoring (lecture par chunks + UPDATE en lot) sur une base
+   synthétique. SQLite temporaire par défaut ; --database pour une base PostgreSQL de test
+   (la table posts y est créée puis vidée).
+
+Usage: python scripts/bench_trend_scoring.py --rows 200000 [--database postgresql://...]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# La config exige ces variables : valeurs factices suffisantes pour le benchmark
+for _name in ("SECRET_KEY", "OAUTH_STATE_SECRET", "WEBHOOK_VERIFY_TOKEN"):
+    os.environ.setdefault(_name, "bench")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import numpy as np  # noqa: E402
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from db.models import Platform, Post  # noqa: E402
+from services.trend_scoring import (  # noqa: E402
+    COMMENT_WEIGHT,
+    LIKE_WEIGHT,
+    MIN_AGE_HOURS,
+    SHARE_WEIGHT,
+    VIEW_WEIGHT,
+    compute_trend_scores,
+    run_trend_scoring,
+)
+
+HALF_LIFE_HOURS = 48.0
+
+
+def python_scores(metrics, ages):
+    """Référence ligne à ligne (même formule que compute_trend_scores)"""
+    scores = []
+    for (likes, comments, shares, views), age in zip(metrics, ages):
+        engagement = likes * LIKE_WEIGHT + comments * COMMENT_WEIGHT + shares * SHARE_WEIGHT + views * VIEW_WEIGHT
+        age = max(age, MIN_AGE_HOURS)
+        scores.append(round(math.log1p(engagement / age) * 2 ** (-age / HALF_LIFE_HOURS) * 10.0, 4))
+    return scores
+
+
+def bench_compute(rows: int) -> None:
+    rng = np.random.default_rng(42)
+    metrics = rng.integers(0, 50_000, size=(rows, 4)).astype(np.float64)
+    ages = rng.uniform(0, 24 * 7, size=rows)
+
+    started = time.perf_counter()
+    vectorized = compute_trend_scores(metrics, ages, HALF_LIFE_HOURS)
+    numpy_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    reference = python_scores(metrics.tolist(), ages.tolist())
+    python_seconds = time.perf_counter() - started
+
+    assert np.allclose(vectorized, reference, atol=1e-3), "Écart entre NumPy et la référence Python"
+    print("🔧 Calcul seul")
+    print(f"   NumPy  : {rows / numpy_seconds:>14,.0f} posts/s ({numpy_seconds * 1000:.1f} ms)")
+    print(f"   Python : {rows / python_seconds:>14,.0f} posts/s ({python_seconds * 1000:.1f} ms)")
+    print(f"   → x{python_seconds / numpy_seconds:.0f}")
+
+
+def seed_posts(session, rows: int) -> None:
+    now = datetime.utcnow()
+    platform = session.query(Platform).filter(Platform.name == "bench").first()
+    if not platform:
+        platform = Platform(name="bench")
+        session.add(platform)
+        session.flush()
+    session.query(Post).filter(Post.platform_id == platform.id).delete()
+    chunk = []
+    for i in range(rows):
+        chunk.append({
+            "id": f"bench_{i}",
+            "external_id": f"bench_{i}",
+            "platform_id": platform.id,
+            "posted_at": now - timedelta(minutes=random.randint(0, 60 * 24 * 10)),
+            "metrics": json.dumps({
+                "like_count": random.randint(0, 50_000),
+                "comment_count": random.randint(0, 2_000),
+                "share_count": random.randint(0, 500),
+                "view_count": random.randint(0, 500_000),
+            }),
+            "score_trend": 0,
+        })
+        if len(chunk) == 10_000:
+            session.execute(insert(Post), chunk)
+            chunk = []
+    if chunk:
+        session.execute(insert(Post), chunk)
+    session.commit()
+
+
+def bench_end_to_end(rows: int, database_url: str, batch_size: int) -> None:
+    engine = create_engine(database_url)
+    Platform.__table__.create(engine, checkfirst=True)
+    Post.__table__.create(engine, checkfirst=True)
+    session = sessionmaker(bind=engine)()
+    try:
+        seed_posts(session, rows)
+        result = run_trend_scoring(session, window_days=7, batch_size=batch_size, half_life_hours=HALF_LIFE_HOURS)
+        print(f"🔧 Bout en bout ({engine.dialect.name}, chunks de {batch_size})")
+        print(f"   {result['scored']:,} posts scorés, {result['expired']:,} expirés en {result['seconds']}s")
+        print(f"   → {result['posts_per_second']:,} posts/s")
+        session.query(Post).filter(Post.id.like("bench_%")).delete(synchronize_session=False)
+        session.commit()
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark du scoring des tendances")
+    parser.add_argument("--rows", type=int, default=200_000, help="Nombre de posts synthétiques")
+    parser.add_argument("--batch-size", type=int, default=5_000, help="Posts par chunk (bout en bout)")
+    parser.add_argument("--database", default=None, help="URL de base de test (SQLite temporaire par défaut)")
+    args = parser.parse_args()
+
+    bench_compute(args.rows)
+    print()
+    if args.database:
+        bench_end_to_end(args.rows, args.database, args.batch_size)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            bench_end_to_end(args.rows, f"sqlite:///{tmp}/bench.db", args.batch_size)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
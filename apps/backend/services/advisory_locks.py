@@ -0,0 +1,42 @@
+# services/advisory_locks.py
+# Verrous consultatifs PostgreSQL des tâches de fond : chaque worker gunicorn démarre les mêmes
+# boucles (app.py), une seule exécute la passe, les autres la sautent.
+# Hors PostgreSQL (SQLite en dev, un seul process) le verrou est toujours accordé.
+#
+# Verrous de transaction (pg_try_advisory_xact_lock) sur une transaction ouverte pendant toute
+# la passe : compatible PgBouncer en mode transaction (DB_PGBOUNCER), où un verrou de session
+# resterait sur une connexion serveur rendue au pool puis réutilisée par un autre client.
+# Contraintes : une connexion serveur reste "idle in transaction" pendant la passe, et
+# idle_in_transaction_session_timeout (PostgreSQL / PgBouncer) doit dépasser sa durée,
+# sinon la transaction est coupée et le verrou libéré en cours de passe.
+
+from sqlalchemy import text
+
+# Une clé par tâche : des passes différentes peuvent tourner en parallèle
+INGESTION_ROUND_LOCK = 720_020
+TREND_SCORING_LOCK = 720_009
+METRICS_MAINTENANCE_LOCK = 720_019
+# Espace de clés (pg_advisory_xact_lock(espace, hashtext(ig_user_id))) du quota de recherche de hashtags
+HASHTAG_SEARCH_LOCK = 720_024
+
+
+def acquire_advisory_lock(key: int):
+    """Connexion portant le verrou `key` (transaction ouverte), None si un autre worker le détient"""
+    from db.base import engine
+
+    connection = engine.connect()
+    if connection.dialect.name != "postgresql":
+        return connection
+    # Pas de commit : le verrou vit jusqu'à la fin de la transaction (release_advisory_lock)
+    if connection.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": key}).scalar():
+        return connection
+    connection.close()
+    return None
+
+
+def release_advisory_lock(connection, key: int) -> None:
+    """Fin de la transaction : le verrou `key` est libéré avec elle"""
+    try:
+        connection.rollback()
+    finally:
+        connection.close()
@@ -0,0 +1,210 @@
+# services/analytics_rollups.py
+# Rollups quotidiens des posts (par plateforme et par hashtag) lus par les endpoints analytics
+#
+# Un bucket (jour, plateforme | hashtag) est recalculé entièrement depuis posts + post_read_models :
+# à l'ingestion pour les seuls buckets touchés par le lot (jours x plateformes et hashtags des posts
+# reçus), après le scoring pour toute la fenêtre de tendance.
+#
+# CLI : python -m services.analytics_rollups [--days 30 | --full [--if-empty]]
+# (start.sh lance --full --if-empty après les migrations : remplissage initial)
+
+import argparse
+import json
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import DateTime, and_, func, literal, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from db.models import HashtagDailyRollup, PlatformDailyRollup, Post, PostHashtag, PostReadModel
+
+logger = logging.getLogger(__name__)
+
+# Jours recalculés par requête (reconstruction complète)
+_DAYS_PER_CHUNK = 31
+
+# Colonnes agrégées communes aux deux rollups, dans l'ordre des INSERT ... SELECT
+_AGGREGATE_COLUMNS = (
+    "post_count", "score_sum", "score_max", "score_trend_sum", "score_trend_max",
+    "like_sum", "comment_sum", "share_sum", "view_sum",
+)
+
+
+def _aggregates() -> List[Any]:
+    return [
+        func.count(Post.id),
+        func.coalesce(func.sum(Post.score), 0),
+        func.max(Post.score),
+        func.coalesce(func.sum(Post.score_trend), 0),
+        func.max(Post.score_trend),
+        func.coalesce(func.sum(PostReadModel.like_count), 0),
+        func.coalesce(func.sum(PostReadModel.comment_count), 0),
+        func.coalesce(func.sum(PostReadModel.share_count), 0),
+        func.coalesce(func.sum(PostReadModel.view_count), 0),
+    ]
+
+
+def _day_ranges(days: Sequence[date]) -> List[Tuple[datetime, datetime]]:
+    """Jours triés -> intervalles [début, fin[ contigus (filtre indexé sur posted_at)"""
+    ranges: List[Tuple[datetime, datetime]] = []
+    for day in sorted(set(days)):
+        start = datetime.combine(day, datetime.min.time())
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], start + timedelta(days=1))
+        else:
+            ranges.append((start, start + timedelta(days=1)))
+    return ranges
+
+
+def _posted_in(days: Sequence[date]):
+    return or_(*(and_(Post.posted_at >= start, Post.posted_at < end) for start, end in _day_ranges(days)))
+
+
+def _upsert_from_select(db: Session, model, key_columns: Sequence[str], source) -> None:
+    """INSERT ... SELECT ... ON CONFLICT DO UPDATE (recalculs concurrents du même bucket)"""
+    columns = [*key_columns, *_AGGREGATE_COLUMNS, "updated_at"]
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert(model).from_select(columns, source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[getattr(model, column) for column in key_columns],
+        set_={column: getattr(stmt.excluded, column) for column in (*_AGGREGATE_COLUMNS, "updated_at")},
+    )
+    db.execute(stmt)
+
+
+def refresh_rollups(
+    db: Session,
+    days: Iterable[date],
+    platform_ids: Optional[Iterable[int]] = None,
+    hashtag_ids: Optional[Iterable[int]] = None,
+) -> int:
+    """
+    Recalcule les buckets de ces jours dans la transaction courante.
+    platform_ids / hashtag_ids : limite le recalcul à ces plateformes / hashtags (None : tous).
+    """
+    days = sorted(set(days))
+    if not days:
+        return 0
+    platform_ids = None if platform_ids is None else sorted(set(platform_ids))
+    hashtag_ids = None if hashtag_ids is None else sorted(set(hashtag_ids))
+
+    now = datetime.utcnow()
+    day = func.date(Post.posted_at)
+    for start in range(0, len(days), _DAYS_PER_CHUNK):
+        chunk = days[start:start + _DAYS_PER_CHUNK]
+        # Les buckets devenus vides (post supprimé, posted_at modifié) disparaissent
+        if platform_ids is None or platform_ids:
+            deleted = db.query(PlatformDailyRollup).filter(PlatformDailyRollup.day.in_(chunk))
+            by_platform = (
+                select(Post.platform_id, day, *_aggregates(), literal(now, DateTime()))
+                .select_from(Post)
+                .outerjoin(PostReadModel, PostReadModel.post_id == Post.id)
+                .where(_posted_in(chunk))
+                .group_by(Post.platform_id, day)
+            )
+            if platform_ids is not None:
+                deleted = deleted.filter(PlatformDailyRollup.platform_id.in_(platform_ids))
+                by_platform = by_platform.where(Post.platform_id.in_(platform_ids))
+            deleted.delete(synchronize_session=False)
+            _upsert_from_select(db, PlatformDailyRollup, ("platform_id", "day"), by_platform)
+
+        if hashtag_ids is None or hashtag_ids:
+            deleted = db.query(HashtagDailyRollup).filter(HashtagDailyRollup.day.in_(chunk))
+            by_hashtag = (
+                select(PostHashtag.hashtag_id, day, *_aggregates(), literal(now, DateTime()))
+                .select_from(PostHashtag)
+                .join(Post, Post.id == PostHashtag.post_id)
+                .outerjoin(PostReadModel, PostReadModel.post_id == Post.id)
+                .where(_posted_in(chunk))
+                .group_by(PostHashtag.hashtag_id, day)
+            )
+            if hashtag_ids is not None:
+                deleted = deleted.filter(HashtagDailyRollup.hashtag_id.in_(hashtag_ids))
+                by_hashtag = by_hashtag.where(PostHashtag.hashtag_id.in_(hashtag_ids))
+            deleted.delete(synchronize_session=False)
+            _upsert_from_select(db, HashtagDailyRollup, ("hashtag_id", "day"), by_hashtag)
+    return len(days)
+
+
+def refresh_rollups_for_posts(db: Session, post_ids: Iterable[str], extra_days: Iterable[date] = ()) -> int:
+    """
+    Recalcule les buckets des posts donnés (ingestion, CRUD) : leurs jours, limités à leurs
+    plateformes et à leurs hashtags. À appeler après refresh_read_models et link_post_hashtags.
+    extra_days : jours recalculés en entier (ancien posted_at d'un post modifié ou supprimé,
+    dont les anciens liens ne sont plus connus).
+    """
+    post_ids = list(dict.fromkeys(post_ids))
+    extra_days = set(extra_days)
+    days: Set[date] = set()
+    platform_ids: Set[int] = set()
+    hashtag_ids: Set[int] = set()
+    for start in range(0, len(post_ids), 500):
+        batch = post_ids[start:start + 500]
+        rows = (
+            db.query(Post.posted_at, Post.platform_id)
+            .filter(Post.id.in_(batch), Post.posted_at.isnot(None))
+            .all()
+        )
+        days.update(posted_at.date() for posted_at, _ in rows)
+        platform_ids.update(platform_id for _, platform_id in rows)
+        hashtag_ids.update(
+            hashtag_id
+            for (hashtag_id,) in db.query(PostHashtag.hashtag_id).filter(PostHashtag.post_id.in_(batch)).distinct()
+        )
+    refreshed = refresh_rollups(db, extra_days)
+    return refreshed + refresh_rollups(db, days - extra_days, platform_ids, hashtag_ids)
+
+
+def refresh_recent_rollups(db: Session, days: int, today: Optional[date] = None) -> int:
+    """Recalcule les `days` derniers jours (score_trend change à chaque passe de scoring)"""
+    today = today or datetime.utcnow().date()
+    return refresh_rollups(db, [today - timedelta(days=offset) for offset in range(days + 1)])
+
+
+def rebuild_rollups(db: Session) -> Dict[str, Any]:
+    """Reconstruction complète (migration, backfill) : commit par tranche de jours"""
+    started = time.perf_counter()
+    first, last = db.query(func.min(Post.posted_at), func.max(Post.posted_at)).one()
+    refreshed = 0
+    if first is not None:
+        all_days = [first.date() + timedelta(days=offset) for offset in range((last.date() - first.date()).days + 1)]
+        for start in range(0, len(all_days), _DAYS_PER_CHUNK):
+            refreshed += refresh_rollups(db, all_days[start:start + _DAYS_PER_CHUNK])
+            db.commit()
+    result = {"days": refreshed, "seconds": round(time.perf_counter() - started, 3)}
+    logger.info(f"Analytics rollups rebuilt: {result}")
+    return result
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Recalcule les rollups analytics quotidiens")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--days", type=int, default=30, help="Jours récents à recalculer")
+    group.add_argument("--full", action="store_true", help="Reconstruire tout l'historique")
+    parser.add_argument("--if-empty", action="store_true", help="Avec --full : seulement si aucun rollup n'existe")
+    args = parser.parse_args(argv)
+
+    from db.base import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if args.full and args.if_empty and db.query(PlatformDailyRollup.day).first() is not None:
+            result = {"skipped": "rollups already built"}
+        elif args.full:
+            result = rebuild_rollups(db)
+        else:
+            result = {"days": refresh_recent_rollups(db, args.days)}
+            db.commit()
+    finally:
+        db.close()
+    print(json.dumps(result))
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
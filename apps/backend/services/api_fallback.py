@@ -0,0 +1,287 @@
+# services/api_fallback.py
+# Endpoints "API d'abord, base en secours" (ig-public, tiktok/videos, tiktok/stats, ...) :
+# disjoncteur par endpoint et mode stale-while-revalidate (API_FALLBACK_MODE)
+#
+# api_first : appel live, la base en cas d'échec ou de réponse vide.
+# swr : la base répond d'abord. Réponse relevée il y a moins de API_SWR_MAX_STALE_SECONDS :
+# servie immédiatement, rafraîchie en tâche de fond au-delà de API_SWR_REVALIDATE_AFTER_SECONDS.
+# Sinon appel live, attendu au plus API_SWR_WAIT_SECONDS si la base a une réponse plus ancienne
+# (l'appel continue en fond et met la base à jour pour les requêtes suivantes).
+#
+# Les appels live d'une même requête (endpoint + clé) sont coalescés et tournent dans leur propre
+# session : ils survivent à la requête qui les a déclenchés.
+# Disjoncteur : API_BREAKER_FAILURE_THRESHOLD échecs upstream consécutifs (5xx, réseau) l'ouvrent ;
+# aucun appel pendant API_BREAKER_RESET_SECONDS, puis un seul appel d'essai le referme ou le rouvre.
+
+import asyncio
+import logging
+import math
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+import httpx
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from services.ttl_cache import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# (réponse, date du relevé le plus récent) ; réponse None = rien en base
+DbResult = Tuple[Optional[Any], Optional[datetime]]
+
+
+class CircuitOpenError(HTTPException):
+    """Appel upstream court-circuité : l'endpoint a trop échoué récemment"""
+
+    def __init__(self, endpoint: str, retry_after: float) -> None:
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"message": "Upstream API temporarily unavailable", "endpoint": endpoint},
+            headers={"Retry-After": str(max(math.ceil(retry_after), 1))},
+        )
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur d'un endpoint (mémoire du process) : fermé → ouvert après `failure_threshold`
+    échecs consécutifs ; ouvert → demi-ouvert après `reset_timeout` secondes (un seul appel
+    d'essai à la fois) ; l'essai referme (succès) ou rouvre (échec).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float) -> None:
+        self.name = name
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(self.reset_timeout - (time.monotonic() - self.opened_at), 0.0)
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info(f"Circuit {self.name} closed")
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or (self.opened_at is None and self.failures >= self.failure_threshold):
+            if self.opened_at is None:
+                self.times_opened += 1
+                logger.warning(f"Circuit {self.name} opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def record_neutral(self) -> None:
+        """Appel terminé sans verdict sur l'upstream (erreur client, token manquant)"""
+        self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_after": round(self.retry_after(), 1),
+            "times_opened": self.times_opened,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_counters: Dict[str, Counter] = {}
+_flights = SingleFlight()
+_background: Set["asyncio.Task[Any]"] = set()
+
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        breaker = _breakers[endpoint] = CircuitBreaker(
+            endpoint, settings.API_BREAKER_FAILURE_THRESHOLD, settings.API_BREAKER_RESET_SECONDS,
+        )
+    return breaker
+
+
+def _count(endpoint: str, event: str) -> None:
+    _counters.setdefault(endpoint, Counter())[event] += 1
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """Panne upstream (5xx, réseau, timeout) ; ni les erreurs client (token, 404) ni les bugs locaux"""
+    if not isinstance(exc, HTTPException):
+        return isinstance(exc, (asyncio.TimeoutError, httpx.HTTPError, OSError))
+    upstream_status = exc.detail.get("status_code") if isinstance(exc.detail, dict) else None
+    return (upstream_status if isinstance(upstream_status, int) else exc.status_code) >= 500
+
+
+async def call_with_breaker(endpoint: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+    """Appel upstream sous le disjoncteur de l'endpoint ; CircuitOpenError (503) s'il est ouvert"""
+    breaker = get_breaker(endpoint)
+    if not breaker.allow_request():
+        _count(endpoint, "short_circuited")
+        raise CircuitOpenError(endpoint, breaker.retry_after())
+    _count(endpoint, "api_calls")
+    try:
+        result = await fn()
+    except asyncio.CancelledError:
+        breaker.record_neutral()
+        raise
+    except Exception as e:
+        if is_upstream_failure(e):
+            _count(endpoint, "api_failures")
+            breaker.record_failure()
+        else:
+            breaker.record_neutral()
+        raise
+    breaker.record_success()
+    return result
+
+
+def _age(fetched_at: Optional[datetime]) -> Optional[float]:
+    if fetched_at is None:
+        return None
+    return max((datetime.utcnow() - fetched_at).total_seconds(), 0.0)
+
+
+def _refresh(
+    endpoint: str,
+    key: Hashable,
+    fetch_api: Callable[[AsyncSession], Awaitable[Optional[Any]]],
+    on_error: Optional[Callable[[Exception], None]],
+) -> Awaitable[Optional[Any]]:
+    """Appel live coalescé par (endpoint, clé), dans une session dédiée"""
+
+    async def run() -> Optional[Any]:
+        from db.base import AsyncSessionLocal
+
+        async def fetch() -> Optional[Any]:
+            async with AsyncSessionLocal() as session:
+                return await fetch_api(session)
+
+        try:
+            return await call_with_breaker(endpoint, fetch)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            if on_error is not None:
+                on_error(e)
+            else:
+                logger.warning(f"{endpoint} API call failed for {key!r}: {e}")
+            raise
+
+    return _flights.do((endpoint, key), run)
+
+
+def _revalidate_in_background(
+    endpoint: str,
+    key: Hashable,
+    fetch_api: Callable[[AsyncSession], Awaitable[Optional[Any]]],
+    on_error: Optional[Callable[[Exception], None]],
+) -> None:
+    _count(endpoint, "revalidations")
+    task = asyncio.ensure_future(_refresh(endpoint, key, fetch_api, on_error))
+    _background.add(task)
+
+    def done(t: "asyncio.Task[Any]") -> None:
+        _background.discard(t)
+        if not t.cancelled():
+            t.exception()  # déjà journalisée par _refresh
+
+    task.add_done_callback(done)
+
+
+async def serve_api_or_db(
+    endpoint: str,
+    key: Hashable,
+    fetch_api: Callable[[AsyncSession], Awaitable[Optional[Any]]],
+    load_db: Callable[[], Awaitable[DbResult]],
+    on_error: Optional[Callable[[Exception], None]] = None,
+    swr: bool = True,
+) -> Optional[Any]:
+    """
+    Réponse d'un endpoint API d'abord / base en secours selon API_FALLBACK_MODE.
+    fetch_api(session) : appel live + stockage, None si l'API n'a rien (réponse de la base).
+    load_db() : (réponse construite depuis la base ou None, date du relevé le plus récent).
+    swr=False force api_first (requête que la base ne sait pas servir, ex. pagination).
+    Renvoie None si ni l'API ni la base n'ont de réponse.
+    """
+    if not swr or settings.API_FALLBACK_MODE != "swr":
+        try:
+            result = await _refresh(endpoint, key, fetch_api, on_error)
+        except Exception:
+            result = None
+        if result is not None:
+            return result
+        _count(endpoint, "served_db_fallback")
+        cached, _ = await load_db()
+        return cached
+
+    cached, fetched_at = await load_db()
+    age = _age(fetched_at)
+    if cached is not None and age is not None and age <= settings.API_SWR_MAX_STALE_SECONDS:
+        _count(endpoint, "served_db_fresh")
+        if age > settings.API_SWR_REVALIDATE_AFTER_SECONDS and get_breaker(endpoint).state != CircuitBreaker.OPEN:
+            _revalidate_in_background(endpoint, key, fetch_api, on_error)
+        return cached
+
+    refresh = _refresh(endpoint, key, fetch_api, on_error)
+    try:
+        if cached is None:
+            result = await refresh
+        else:
+            result = await asyncio.wait_for(refresh, settings.API_SWR_WAIT_SECONDS)
+    except asyncio.TimeoutError:
+        _count(endpoint, "api_wait_timeouts")
+        result = None
+    except Exception:
+        result = None
+    if result is not None:
+        return result
+    if cached is not None:
+        _count(endpoint, "served_db_stale")
+    return cached
+
+
+def api_fallback_stats() -> Dict[str, Any]:
+    """Mode, disjoncteurs et compteurs par endpoint"""
+    endpoints = set(_breakers) | set(_counters)
+    return {
+        "mode": settings.API_FALLBACK_MODE,
+        "refreshes": {**_flights.stats(), "background": len(_background)},
+        "endpoints": {
+            endpoint: {
+                "breaker": _breakers[endpoint].stats() if endpoint in _breakers else None,
+                **_counters.get(endpoint, {}),
+            }
+            for endpoint in sorted(endpoints)
+        },
+    }
@@ -0,0 +1,208 @@
+# services/http_client.py
+# Clients HTTP partagés (keep-alive) pour les APIs upstream Meta / TikTok
+
+import importlib.util
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import httpx  # type: ignore
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Un pool de connexions par upstream (un hôte chacun)
+UPSTREAM_HOSTS: Dict[str, str] = {
+    "meta": "https://graph.facebook.com",
+    "tiktok": "https://open.tiktokapis.com",
+}
+
+
+class PoolStats:
+    """Compteurs d'un pool : requêtes en vol, connexions ouvertes, attente d'une connexion."""
+
+    def __init__(self) -> None:
+        self.requests_total = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.new_connections = 0
+        self.pool_wait_total = 0.0
+        self.pool_wait_max = 0.0
+        self.errors = 0
+
+    def record_wait(self, wait: float) -> None:
+        self.pool_wait_total += wait
+        if wait > self.pool_wait_max:
+            self.pool_wait_max = wait
+
+    def as_dict(self) -> Dict[str, Any]:
+        avg_wait = self.pool_wait_total / self.requests_total if self.requests_total else 0.0
+        return {
+            "requests_total": self.requests_total,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "new_connections": self.new_connections,
+            "reused_connections": max(self.requests_total - self.new_connections, 0),
+            "pool_wait_avg_ms": round(avg_wait * 1000, 3),
+            "pool_wait_max_ms": round(self.pool_wait_max * 1000, 3),
+            "errors": self.errors,
+        }
+
+
+class _InstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    Transport httpx qui mesure l'utilisation du pool.
+
+    Le temps d'attente d'une connexion est mesuré entre l'entrée dans le pool et
+    le premier événement httpcore (connect_tcp si nouvelle connexion, sinon
+    send_request_headers sur une connexion réutilisée).
+    """
+
+    def __init__(self, transport: httpx.AsyncHTTPTransport, stats: PoolStats) -> None:
+        self._transport = transport
+        self._stats = stats
+
+    def open_connections(self) -> int:
+        pool = getattr(self._transport, "_pool", None)
+        connections = getattr(pool, "connections", None) or []
+        return len(connections)
+
+    def idle_connections(self) -> int:
+        pool = getattr(self._transport, "_pool", None)
+        connections = getattr(pool, "connections", None) or []
+        return sum(1 for conn in connections if conn.is_idle())
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        stats = self._stats
+        start = time.perf_counter()
+        acquired = False
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            nonlocal acquired
+            if acquired:
+                return
+            if event_name == "connection.connect_tcp.started":
+                stats.new_connections += 1
+            elif not event_name.endswith("send_request_headers.started"):
+                return
+            acquired = True
+            stats.record_wait(time.perf_counter() - start)
+
+        request.extensions = {**request.extensions, "trace": trace}
+        stats.requests_total += 1
+        stats.in_flight += 1
+        stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+        try:
+            return await self._transport.handle_async_request(request)
+        except httpx.TransportError:
+            stats.errors += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class HTTPClientManager:
+    """
+    Gère un httpx.AsyncClient par upstream pour toute la durée du process.
+
+    Créé au démarrage de l'app et fermé à l'arrêt : les connexions TCP/TLS
+    vers graph.facebook.com et open.tiktokapis.com sont réutilisées entre les
+    requêtes au lieu d'un handshake complet à chaque appel.
+    """
+
+    def __init__(self) -> None:
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._transports: Dict[str, _InstrumentedTransport] = {}
+        self._stats: Dict[str, PoolStats] = {}
+        self._http2 = self._resolve_http2()
+
+    @staticmethod
+    def _resolve_http2() -> bool:
+        if not settings.HTTP2_ENABLED:
+            return False
+        if importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP2_ENABLED=true mais le paquet 'h2' est absent, fallback HTTP/1.1")
+            return False
+        return True
+
+    def _create_client(self, name: str) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        )
+        timeout = httpx.Timeout(
+            settings.HTTP_TIMEOUT,
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+            pool=settings.HTTP_POOL_TIMEOUT,
+        )
+        stats = PoolStats()
+        transport = _InstrumentedTransport(
+            httpx.AsyncHTTPTransport(limits=limits, http2=self._http2),
+            stats,
+        )
+        self._transports[name] = transport
+        self._stats[name] = stats
+        logger.info(
+            "HTTP client '%s' créé (http2=%s, max_connections=%d, keepalive=%d)",
+            name,
+            self._http2,
+            settings.HTTP_MAX_CONNECTIONS,
+            settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        )
+        return httpx.AsyncClient(transport=transport, timeout=timeout)
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Retourne le client de l'upstream `name`, créé à la demande."""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._create_client(name)
+            self._clients[name] = client
+        return client
+
+    async def startup(self) -> None:
+        for name in UPSTREAM_HOSTS:
+            self.get(name)
+
+    async def shutdown(self) -> None:
+        for name, client in list(self._clients.items()):
+            try:
+                await client.aclose()
+            except Exception as exc:
+                logger.warning("Erreur fermeture HTTP client '%s': %s", name, exc)
+        self._clients.clear()
+        self._transports.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"http2": self._http2}
+        for name, stats in self._stats.items():
+            pool = stats.as_dict()
+            transport = self._transports.get(name)
+            pool["open_connections"] = transport.open_connections() if transport else 0
+            pool["idle_connections"] = transport.idle_connections() if transport else 0
+            pool["host"] = UPSTREAM_HOSTS.get(name)
+            result[name] = pool
+        return result
+
+
+# Instance globale (démarrée / fermée par app.py)
+http_clients = HTTPClientManager()
+
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    return http_clients.get(name)
+
+
+def request_timeout(timeout: Optional[float]) -> Any:
+    """Timeout par appel : garde les timeouts connect/pool du pool partagé."""
+    if timeout is None:
+        return httpx.USE_CLIENT_DEFAULT
+    return httpx.Timeout(
+        timeout,
+        connect=settings.HTTP_CONNECT_TIMEOUT,
+        pool=settings.HTTP_POOL_TIMEOUT,
+    )
@@ -0,0 +1,164 @@
+# services/ig_business_accounts.py
+# Résolution token Meta -> compte Instagram Business (via les Pages Facebook du token)
+#
+# Le lien change rarement : il est mémorisé par compte OAuth (oauth_accounts.ig_business_account_id,
+# valable IG_BUSINESS_ACCOUNT_TTL) et par process (TTLCache par empreinte de token, tokens système
+# compris). Chemin chaud : aucun appel upstream. Chemin froid : un batch Graph (Pages puis comptes
+# IG via ?ids=) ; si la recherche groupée échoue (une Page inaccessible fait échouer tout ?ids=),
+# une requête par Page, en parallèle. Les résolutions concurrentes d'un même token sont coalescées.
+# Quand Meta rejette l'id mémorisé, l'appelant force une re-résolution (refresh=True).
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from db.models import OAuthAccount
+from services.meta_client import (
+    BatchRequest,
+    MetaAPIError,
+    batch_result,
+    call_meta,
+    call_meta_batch,
+    token_fingerprint,
+)
+from services.ttl_cache import SingleFlight, TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Providers dont le token donne accès aux Pages / comptes IG
+META_PROVIDERS = ("instagram", "facebook")
+
+# Requêtes par Page simultanées quand la recherche groupée échoue
+_PAGE_LOOKUP_CONCURRENCY = 10
+
+_MISSING = object()
+
+_cache = TTLCache("ig_business_accounts", max_entries=10000, default_ttl=settings.IG_BUSINESS_ACCOUNT_TTL)
+_flights = SingleFlight()
+
+
+def _ttl(ig_business_id: Optional[str]) -> float:
+    return settings.IG_BUSINESS_ACCOUNT_TTL if ig_business_id else settings.IG_BUSINESS_ACCOUNT_NEGATIVE_TTL
+
+
+async def fetch_ig_business_account_id(access_token: str) -> Optional[str]:
+    """
+    Premier compte IG Business des Pages du token (ordre de /me/accounts), None si aucun.
+    Les erreurs Meta (token, quota) sont levées : elles ne doivent pas être mémorisées.
+    """
+    pages, accounts = await call_meta_batch(
+        [
+            BatchRequest("v21.0/me/accounts", {"fields": "id", "limit": 100}, name="pages"),
+            BatchRequest("v21.0/", {
+                "ids": batch_result("pages", "$.data.*.id"),
+                "fields": "instagram_business_account{id}",
+            }),
+        ],
+        access_token=access_token,
+    )
+    if isinstance(pages, MetaAPIError):
+        raise pages
+    page_ids = [page["id"] for page in pages.get("data", []) if page.get("id")]
+    if not page_ids:
+        return None
+
+    if isinstance(accounts, MetaAPIError):
+        logger.info(f"Grouped IG account lookup failed ({accounts.status_code}): {len(page_ids)} per-page lookups")
+        semaphore = asyncio.Semaphore(_PAGE_LOOKUP_CONCURRENCY)
+
+        async def lookup(page_id: str) -> Any:
+            async with semaphore:
+                return await call_meta(
+                    method="GET",
+                    endpoint=f"v21.0/{page_id}",
+                    params={"fields": "instagram_business_account{id}"},
+                    access_token=access_token,
+                )
+
+        results = await asyncio.gather(*(lookup(page_id) for page_id in page_ids), return_exceptions=True)
+        accounts = {page_id: result for page_id, result in zip(page_ids, results) if isinstance(result, dict)}
+
+    for page_id in page_ids:
+        ig_account = (accounts.get(page_id) or {}).get("instagram_business_account")
+        if ig_account and ig_account.get("id"):
+            return ig_account["id"]
+    return None
+
+
+async def _persist(user_id: Any, access_token: str, ig_business_id: Optional[str]) -> None:
+    """Mémorise le résultat sur les comptes OAuth Meta de l'utilisateur portant ce token"""
+    from db.base import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(OAuthAccount)
+            .where(
+                OAuthAccount.user_id == user_id,
+                OAuthAccount.provider.in_(META_PROVIDERS),
+                OAuthAccount.access_token == access_token,
+            )
+            .values(ig_business_account_id=ig_business_id, ig_business_account_checked_at=datetime.utcnow())
+        )
+        await session.commit()
+
+
+async def _refresh(user_id: Any, access_token: str, key: str) -> Optional[str]:
+    try:
+        ig_business_id = await fetch_ig_business_account_id(access_token)
+    except Exception as e:
+        logger.warning(f"IG Business Account resolution failed (token {key}): {e}")
+        return None
+    _cache.set(key, ig_business_id, ttl=_ttl(ig_business_id), negative=ig_business_id is None)
+    if user_id is not None:
+        try:
+            await _persist(user_id, access_token, ig_business_id)
+        except Exception as e:
+            logger.warning(f"Could not persist IG Business Account for user {user_id}: {e}")
+    logger.info(f"Resolved IG Business Account for token {key}: {ig_business_id}")
+    return ig_business_id
+
+
+async def resolve_ig_business_account_id(
+    db: AsyncSession,
+    user_id: Any,
+    access_token: str,
+    refresh: bool = False,
+) -> Optional[str]:
+    """
+    Compte IG Business du token : cache process, puis compte OAuth en base, puis Meta.
+    refresh=True ignore les valeurs mémorisées (id rejeté par Meta).
+    """
+    key = token_fingerprint(access_token)
+    if refresh:
+        _cache.delete(key)
+    else:
+        cached = _cache.get(key, _MISSING)
+        if cached is not _MISSING:
+            return cached
+        if user_id is not None:
+            row = (
+                await db.execute(
+                    select(OAuthAccount.ig_business_account_id, OAuthAccount.ig_business_account_checked_at)
+                    .where(
+                        OAuthAccount.user_id == user_id,
+                        OAuthAccount.provider.in_(META_PROVIDERS),
+                        OAuthAccount.access_token == access_token,
+                        OAuthAccount.ig_business_account_checked_at.isnot(None),
+                    )
+                    .order_by(OAuthAccount.ig_business_account_checked_at.desc())
+                    .limit(1)
+                )
+            ).first()
+            if row is not None:
+                ig_business_id, checked_at = row
+                remaining = (checked_at + timedelta(seconds=_ttl(ig_business_id)) - datetime.utcnow()).total_seconds()
+                if remaining > 0:
+                    _cache.set(key, ig_business_id, ttl=remaining, negative=ig_business_id is None)
+                    return ig_business_id
+
+    return await _flights.do(("ig_business_account", key), lambda: _refresh(user_id, access_token, key))
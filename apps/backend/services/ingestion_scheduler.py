@@ -0,0 +1,606 @@
+# services/ingestion_scheduler.py
+# Ingestion planifiée des projets actifs : les hashtags et créateurs suivis sont rafraîchis en
+# tâche de fond, les dashboards lisent des données déjà en base au lieu d'attendre Meta / TikTok.
+#
+# Une passe :
+# 1. planification : projets 'active' dus (last_run_at plus vieux que INGESTION_PROJECT_REFRESH_MINUTES,
+#    intervalle raccourci pour les projets les plus consultés) ; un job par cible (plateforme,
+#    hashtag | créateur | compte), partagé par tous les projets qui la suivent
+# 2. exécution par priorité décroissante (ancienneté x trafic) sous le budget de la plateforme :
+#    appels simultanés (sémaphore) et appels par heure glissante ; un job hors budget est reporté
+# 3. last_run_at des projets dont tous les jobs ont été tentés, last_signal_at de ceux ayant
+#    reçu de nouveaux posts, last_scraped des hashtags rafraîchis ; version de la liste /posts
+#    incrémentée une seule fois (les jobs n'invalident que leurs projets)
+#
+# Budget horaire (ingestion_calls) et lectures des projets (project_reads) sont en base : tous les
+# workers les partagent, et la passe elle-même ne tourne que dans le worker qui tient le verrou.
+# Les lectures sont comptées en mémoire et reportées par chaque worker avant chaque passe.
+#
+# Cibles : hashtags Instagram (recent_media, précédé de ig_hashtag_search si l'id n'est pas dans
+# l'annuaire services.meta_hashtags), créateurs Instagram
+# (business_discovery). TikTok n'expose que les vidéos du compte connecté (video/list) :
+# un job par compte TikTok lié (open_id) des propriétaires de projets TikTok.
+#
+# CLI : python -m services.ingestion_scheduler [--dry-run]
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from db.models import (
+    Hashtag,
+    IngestionCall,
+    OAuthAccount,
+    Platform,
+    Post,
+    Project,
+    ProjectCreator,
+    ProjectHashtag,
+    ProjectRead,
+)
+from services.advisory_locks import INGESTION_ROUND_LOCK, acquire_advisory_lock, release_advisory_lock
+from services.meta_client import IG_MEDIA_FIELDS, call_meta
+from services.meta_hashtags import fetch_hashtag_recent_media
+from services.post_utils import (
+    ingest_posts,
+    instagram_media_item,
+    normalize_creator,
+    normalize_hashtag,
+    tiktok_video_item,
+)
+from services.response_cache import POSTS_SCOPE, bump_content_versions
+from services.tiktok_client import call_tiktok
+
+logger = logging.getLogger(__name__)
+
+# Ancienneté attribuée à un projet jamais ingéré (passe devant tous les autres)
+_NEVER_RUN_MINUTES = 7 * 24 * 60
+
+class PlatformBudget:
+    """
+    Budget d'une plateforme : appels simultanés (sémaphore du worker qui exécute la passe) et
+    appels upstream par heure glissante, comptés dans ingestion_calls (partagés entre workers)
+    """
+
+    def __init__(self, name: str, concurrency: int, calls_per_hour: int, window: float = 3600.0) -> None:
+        self.name = name
+        self.concurrency = max(concurrency, 1)
+        self.calls_per_hour = calls_per_hour
+        self.window = window
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.calls_total = 0
+        self.deferred_total = 0
+        self.errors = 0
+
+    def remaining(self, db: Session, now: datetime) -> int:
+        used = (
+            db.query(func.coalesce(func.sum(IngestionCall.calls), 0))
+            .filter(IngestionCall.platform == self.name, IngestionCall.called_at > now - timedelta(seconds=self.window))
+            .scalar()
+        )
+        return max(self.calls_per_hour - used, 0)
+
+    def record_calls(self, db: Session, calls: int, now: datetime) -> None:
+        """Réservation de la passe (dans la transaction courante) ; purge des appels sortis de la fenêtre"""
+        db.query(IngestionCall).filter(
+            IngestionCall.platform == self.name, IngestionCall.called_at <= now - timedelta(seconds=self.window),
+        ).delete(synchronize_session=False)
+        db.add(IngestionCall(platform=self.name, called_at=now, calls=calls))
+        self.calls_total += calls
+
+    def as_dict(self, db: Session) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "calls_per_hour": self.calls_per_hour,
+            "remaining": self.remaining(db, datetime.utcnow()),
+            "calls_total": self.calls_total,
+            "deferred_total": self.deferred_total,
+            "errors": self.errors,
+        }
+
+
+class IngestionJob:
+    """Une cible à rafraîchir, partagée par tous les projets qui la suivent"""
+
+    def __init__(self, platform: str, kind: str, target: str, calls: int, access_token: Optional[str] = None) -> None:
+        self.platform = platform
+        self.kind = kind  # 'hashtag' | 'creator' | 'account'
+        self.target = target
+        self.calls = calls  # appels upstream réservés dans le budget
+        self.access_token = access_token
+        self.project_ids: Set[UUID] = set()
+        self.hashtag_ids: Set[int] = set()
+        self.priority = 0.0
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return (self.platform, self.kind, self.target)
+
+    def __repr__(self) -> str:
+        return f"IngestionJob({self.platform}:{self.kind}:{self.target}, projects={len(self.project_ids)}, priority={self.priority:.1f})"
+
+
+# ---- Fetchers : job -> items de ingest_posts ----
+
+async def _fetch_instagram_hashtag(job: IngestionJob, limit: int) -> List[Dict[str, Any]]:
+    media = await fetch_hashtag_recent_media(settings.IG_USER_ID, job.target, limit)
+    return [instagram_media_item(item, "meta_ig_public_api") for item in media or []]
+
+
+async def _fetch_instagram_creator(job: IngestionJob, limit: int) -> List[Dict[str, Any]]:
+    response = await call_meta(
+        method="GET",
+        endpoint=f"v21.0/{settings.IG_USER_ID}",
+        params={"fields": f"business_discovery.username({job.target}){{media.limit({limit}){{{IG_MEDIA_FIELDS}}}}}"},
+    )
+    media = ((response.get("business_discovery") or {}).get("media") or {}).get("data", [])
+    items = []
+    for item in media:
+        item.setdefault("username", job.target)
+        items.append(instagram_media_item(item, "meta_business_discovery"))
+    return items
+
+
+async def _fetch_tiktok_account(job: IngestionJob, limit: int) -> List[Dict[str, Any]]:
+    response = await call_tiktok(
+        method="GET",
+        endpoint="video/list/",
+        params={"max_count": min(limit, 20)},  # max_count <= 20 côté TikTok
+        access_token=job.access_token,
+    )
+    videos = response.get("data", {}).get("videos", [])
+    return [tiktok_video_item(video, "tiktok_video_list_api", job.target) for video in videos if video.get("id")]
+
+
+FETCHERS: Dict[Tuple[str, str], Callable[[IngestionJob, int], Awaitable[List[Dict[str, Any]]]]] = {
+    ("instagram", "hashtag"): _fetch_instagram_hashtag,
+    ("instagram", "creator"): _fetch_instagram_creator,
+    ("tiktok", "account"): _fetch_tiktok_account,
+}
+
+# Appels upstream d'un job, au pire (réservés avant exécution)
+JOB_CALLS = {
+    ("instagram", "hashtag"): 2,
+    ("instagram", "creator"): 1,
+    ("tiktok", "account"): 1,
+}
+
+
+# ---- Planification et persistance (sync, exécutées dans un thread) ----
+
+def _project_priority(last_run_at: Optional[datetime], reads: int, now: datetime) -> Tuple[bool, float]:
+    """(dû, priorité) : ancienneté en minutes x (1 + log(1 + lectures récentes))"""
+    traffic = 1 + math.log1p(reads)
+    if last_run_at is None:
+        return True, _NEVER_RUN_MINUTES * traffic
+    age = (now - last_run_at).total_seconds() / 60
+    return age * traffic >= settings.INGESTION_PROJECT_REFRESH_MINUTES, age * traffic
+
+
+def plan_jobs(
+    db: Session,
+    now: Optional[datetime] = None,
+    reads: Optional[Dict[Any, int]] = None,
+) -> Tuple[List[IngestionJob], Dict[UUID, int]]:
+    """
+    Jobs de la passe (dédupliqués entre projets, triés par priorité décroissante) et,
+    pour chaque projet dû, le nombre de jobs qui le concernent.
+    """
+    now = now or datetime.utcnow()
+    reads = reads or {}
+
+    due: Dict[UUID, float] = {}
+    owners: Dict[UUID, UUID] = {}
+    platforms_by_project: Dict[UUID, Set[str]] = {}
+    for project_id, user_id, platforms, last_run_at in (
+        db.query(Project.id, Project.user_id, Project.platforms, Project.last_run_at)
+        .filter(Project.status == "active")
+        .all()
+    ):
+        is_due, priority = _project_priority(last_run_at, reads.get(project_id, 0), now)
+        if not is_due:
+            continue
+        due[project_id] = priority
+        owners[project_id] = user_id
+        try:
+            platforms_by_project[project_id] = set(json.loads(platforms) if platforms else [])
+        except (TypeError, ValueError):
+            platforms_by_project[project_id] = set()
+    if not due:
+        return [], {}
+
+    jobs: Dict[Tuple[str, str, str], IngestionJob] = {}
+
+    def add(project_id: UUID, platform: str, kind: str, target: str, access_token: Optional[str] = None) -> IngestionJob:
+        job = jobs.get((platform, kind, target))
+        if job is None:
+            job = jobs[(platform, kind, target)] = IngestionJob(
+                platform, kind, target, JOB_CALLS[(platform, kind)], access_token,
+            )
+        job.project_ids.add(project_id)
+        job.priority = max(job.priority, due[project_id])
+        return job
+
+    due_ids = list(due)
+    for project_id, hashtag_id, name, platform in (
+        db.query(ProjectHashtag.project_id, Hashtag.id, Hashtag.name, Platform.name)
+        .join(Hashtag, Hashtag.id == ProjectHashtag.hashtag_id)
+        .join(Platform, Platform.id == Hashtag.platform_id)
+        .filter(ProjectHashtag.project_id.in_(due_ids))
+        .all()
+    ):
+        platforms_by_project[project_id].add(platform)
+        if platform == "instagram":
+            add(project_id, "instagram", "hashtag", normalize_hashtag(name)).hashtag_ids.add(hashtag_id)
+
+    for project_id, username, platform in (
+        db.query(ProjectCreator.project_id, ProjectCreator.creator_username, Platform.name)
+        .join(Platform, Platform.id == ProjectCreator.platform_id)
+        .filter(ProjectCreator.project_id.in_(due_ids))
+        .all()
+    ):
+        platforms_by_project[project_id].add(platform)
+        if platform == "instagram":
+            add(project_id, "instagram", "creator", normalize_creator(username))
+
+    tiktok_projects = [project_id for project_id in due_ids if "tiktok" in platforms_by_project[project_id]]
+    if tiktok_projects:
+        accounts = {
+            user_id: (access_token, open_id)
+            for user_id, access_token, open_id in (
+                db.query(OAuthAccount.user_id, OAuthAccount.access_token, OAuthAccount.provider_user_id)
+                .filter(
+                    OAuthAccount.provider == "tiktok",
+                    OAuthAccount.access_token.isnot(None),
+                    OAuthAccount.user_id.in_({owners[project_id] for project_id in tiktok_projects}),
+                )
+                .all()
+            )
+        }
+        for project_id in tiktok_projects:
+            account = accounts.get(owners[project_id])
+            if account:
+                access_token, open_id = account
+                # Cible = open_id : les vidéos stockées sont rattachées au compte (Post.owner_id)
+                add(project_id, "tiktok", "account", open_id, access_token)
+
+    if not settings.IG_USER_ID:
+        skipped = [key for key in jobs if key[0] == "instagram"]
+        if skipped:
+            logger.warning(f"IG_USER_ID not set: {len(skipped)} Instagram ingestion job(s) skipped")
+        for key in skipped:
+            del jobs[key]
+
+    ordered = sorted(jobs.values(), key=lambda job: job.priority, reverse=True)
+    project_jobs = {project_id: 0 for project_id in due_ids}
+    for job in ordered:
+        for project_id in job.project_ids:
+            project_jobs[project_id] += 1
+    return ordered, project_jobs
+
+
+def store_job_items(db: Session, platform: str, items: List[Dict[str, Any]]) -> int:
+    """Upsert des posts d'un job (transaction commitée) ; retourne le nombre de posts nouveaux"""
+    external_ids = {str(item["external_id"]) for item in items}
+    known = {
+        external_id
+        for (external_id,) in db.query(Post.external_id).filter(Post.external_id.in_(external_ids)).all()
+    }
+    # Liste /posts invalidée une fois en fin de passe (record_round) : pas de contention entre jobs
+    ingest_posts(db, platform, items, bump_global=False)
+    db.commit()
+    return len(external_ids - known)
+
+
+def record_round(
+    db: Session,
+    now: datetime,
+    completed: Sequence[UUID],
+    signaled: Sequence[UUID],
+    scraped_hashtag_ids: Sequence[int],
+    posts_changed: bool = False,
+) -> None:
+    """Persiste last_run_at, last_signal_at et Hashtag.last_scraped de la passe (+ version /posts)"""
+    if completed:
+        db.query(Project).filter(Project.id.in_(list(completed))).update(
+            {Project.last_run_at: now}, synchronize_session=False,
+        )
+    if signaled:
+        db.query(Project).filter(Project.id.in_(list(signaled))).update(
+            {Project.last_signal_at: now}, synchronize_session=False,
+        )
+    if scraped_hashtag_ids:
+        db.query(Hashtag).filter(Hashtag.id.in_(list(scraped_hashtag_ids))).update(
+            {Hashtag.last_scraped: now}, synchronize_session=False,
+        )
+    if posts_changed:
+        bump_content_versions(db, [POSTS_SCOPE])
+    db.commit()
+
+
+# ---- Lectures des projets (trafic) ----
+
+# Lectures comptées en mémoire (aucune écriture sur le chemin de la requête), reportées dans
+# project_reads par chaque worker avant chaque passe
+_pending_reads: Counter = Counter()
+_pending_reads_lock = threading.Lock()
+
+
+def record_project_read(project_id: UUID) -> None:
+    """Compte une lecture du projet (priorité de rafraîchissement)"""
+    with _pending_reads_lock:
+        _pending_reads[project_id] += 1
+
+
+def flush_project_reads(db: Session) -> int:
+    """Reporte les lectures comptées par ce worker dans project_reads (un seul upsert) ; commit"""
+    global _pending_reads
+    with _pending_reads_lock:
+        pending, _pending_reads = _pending_reads, Counter()
+    if not pending:
+        return 0
+    try:
+        insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        stmt = insert(ProjectRead).values(
+            [{"project_id": project_id, "read_count": count} for project_id, count in sorted(pending.items(), key=str)]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ProjectRead.project_id],
+            set_={"read_count": ProjectRead.read_count + stmt.excluded.read_count},
+        )
+        db.execute(stmt)
+        db.commit()
+    except Exception:
+        db.rollback()
+        with _pending_reads_lock:
+            _pending_reads.update(pending)
+        raise
+    return len(pending)
+
+
+def project_reads(db: Session) -> Dict[UUID, int]:
+    return dict(db.query(ProjectRead.project_id, ProjectRead.read_count).all())
+
+
+def take_project_reads(db: Session) -> Dict[UUID, int]:
+    """Lectures depuis les passes précédentes, avec décroissance de moitié à chaque passe ; commit"""
+    reads = project_reads(db)
+    db.query(ProjectRead).filter(ProjectRead.read_count <= 1).delete(synchronize_session=False)
+    db.query(ProjectRead).update({ProjectRead.read_count: ProjectRead.read_count // 2}, synchronize_session=False)
+    db.commit()
+    return reads
+
+
+# ---- Scheduler ----
+
+class IngestionScheduler:
+    """Passes d'ingestion des projets actifs sous budgets par plateforme"""
+
+    def __init__(self) -> None:
+        self.budgets: Dict[str, PlatformBudget] = {
+            "instagram": PlatformBudget(
+                "instagram", settings.INGESTION_INSTAGRAM_CONCURRENCY, settings.INGESTION_INSTAGRAM_CALLS_PER_HOUR,
+            ),
+            "tiktok": PlatformBudget(
+                "tiktok", settings.INGESTION_TIKTOK_CONCURRENCY, settings.INGESTION_TIKTOK_CALLS_PER_HOUR,
+            ),
+        }
+        self.rounds = 0
+        self.last_round: Optional[Dict[str, Any]] = None
+
+    async def _run_job(self, job: IngestionJob) -> Optional[int]:
+        """Exécute un job : nombre de posts nouveaux, None en cas d'échec"""
+        from db.base import SessionLocal
+
+        budget = self.budgets[job.platform]
+        async with budget.semaphore:
+            try:
+                items = await FETCHERS[(job.platform, job.kind)](job, settings.INGESTION_POSTS_PER_JOB)
+            except Exception as e:
+                budget.errors += 1
+                logger.warning(f"Ingestion {job.platform}:{job.kind}:{job.target} failed: {e}")
+                return None
+        if not items:
+            return 0
+
+        db = SessionLocal()
+        try:
+            return await asyncio.to_thread(store_job_items, db, job.platform, items)
+        except Exception as e:
+            logger.exception(f"Ingestion {job.platform}:{job.kind}:{job.target} store failed: {e}")
+            db.rollback()
+            return None
+        finally:
+            db.close()
+
+    def _plan(self, now: datetime, dry_run: bool) -> Tuple[List[IngestionJob], Dict[UUID, int]]:
+        from db.base import SessionLocal
+
+        db = SessionLocal()
+        try:
+            if not dry_run:
+                flush_project_reads(db)
+            reads = project_reads(db) if dry_run else take_project_reads(db)
+            return plan_jobs(db, now, reads)
+        finally:
+            db.close()
+
+    def _reserve(self, now: datetime, jobs: List[IngestionJob]) -> Tuple[List[IngestionJob], int]:
+        """Jobs retenus par priorité sous les budgets horaires (réservés en base) ; nombre de reportés"""
+        from db.base import SessionLocal
+
+        db = SessionLocal()
+        try:
+            remaining = {name: budget.remaining(db, now) for name, budget in self.budgets.items()}
+            dispatched: List[IngestionJob] = []
+            deferred = 0
+            for job in jobs:
+                if len(dispatched) >= settings.INGESTION_MAX_JOBS_PER_ROUND:
+                    deferred += 1
+                elif job.calls > remaining[job.platform]:
+                    self.budgets[job.platform].deferred_total += 1
+                    deferred += 1
+                else:
+                    remaining[job.platform] -= job.calls
+                    dispatched.append(job)
+            reserved: Counter = Counter()
+            for job in dispatched:
+                reserved[job.platform] += job.calls
+            for platform, calls in reserved.items():
+                self.budgets[platform].record_calls(db, calls, now)
+            db.commit()
+            return dispatched, deferred
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _record(
+        self,
+        now: datetime,
+        completed: List[UUID],
+        signaled: List[UUID],
+        hashtag_ids: List[int],
+        posts_changed: bool,
+    ) -> None:
+        from db.base import SessionLocal
+
+        db = SessionLocal()
+        try:
+            record_round(db, now, completed, signaled, hashtag_ids, posts_changed)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def run_once(self, dry_run: bool = False) -> Dict[str, Any]:
+        """Une passe complète ; dry_run : planification seule (ni appel upstream, ni écriture)"""
+        started = time.perf_counter()
+        now = datetime.utcnow()
+
+        # Une seule passe à la fois sur l'ensemble des workers
+        lock = await asyncio.to_thread(acquire_advisory_lock, INGESTION_ROUND_LOCK)
+        if lock is None:
+            logger.info("Ingestion round skipped: another worker holds the lock")
+            return {"skipped": "locked"}
+        try:
+            jobs, project_jobs = await asyncio.to_thread(self._plan, now, dry_run)
+            if dry_run:
+                return {
+                    "projects_due": len(project_jobs),
+                    "jobs": [
+                        {"key": ":".join(job.key), "projects": len(job.project_ids), "priority": round(job.priority, 1)}
+                        for job in jobs
+                    ],
+                }
+
+            dispatched, deferred = await asyncio.to_thread(self._reserve, now, jobs)
+            outcomes = await asyncio.gather(*(self._run_job(job) for job in dispatched))
+
+            # Un job tenté (même en échec) compte : un hashtag en erreur ne bloque pas ses projets
+            remaining = dict(project_jobs)
+            signaled: Set[UUID] = set()
+            hashtag_ids: Set[int] = set()
+            new_posts = failed = 0
+            for job, outcome in zip(dispatched, outcomes):
+                for project_id in job.project_ids:
+                    remaining[project_id] -= 1
+                if outcome is None:
+                    failed += 1
+                    continue
+                hashtag_ids.update(job.hashtag_ids)
+                if outcome:
+                    new_posts += outcome
+                    signaled.update(job.project_ids)
+            completed = [project_id for project_id, count in remaining.items() if count == 0]
+            posts_changed = any(outcome is not None for outcome in outcomes)
+            await asyncio.to_thread(
+                self._record, now, completed, sorted(signaled, key=str), sorted(hashtag_ids), posts_changed,
+            )
+        finally:
+            await asyncio.to_thread(release_advisory_lock, lock, INGESTION_ROUND_LOCK)
+
+        self.rounds += 1
+        self.last_round = {
+            "at": now.isoformat(),
+            "projects_due": len(project_jobs),
+            "projects_completed": len(completed),
+            "projects_signaled": len(signaled),
+            "jobs_run": len(dispatched),
+            "jobs_failed": failed,
+            "jobs_deferred": deferred,
+            "new_posts": new_posts,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        logger.info(f"Ingestion round: {self.last_round}")
+        return self.last_round
+
+    def stats(self) -> Dict[str, Any]:
+        """rounds / last_round : passes de ce worker ; lectures et budgets : état partagé (base)"""
+        from db.base import SessionLocal
+
+        db = SessionLocal()
+        try:
+            return {
+                "rounds": self.rounds,
+                "last_round": self.last_round,
+                "tracked_projects": db.query(func.count(ProjectRead.project_id)).scalar(),
+                "budgets": {name: budget.as_dict(db) for name, budget in self.budgets.items()},
+            }
+        finally:
+            db.close()
+
+
+ingestion_scheduler = IngestionScheduler()
+
+
+def _flush_reads() -> None:
+    from db.base import SessionLocal
+
+    db = SessionLocal()
+    try:
+        flush_project_reads(db)
+    finally:
+        db.close()
+
+
+async def ingestion_scheduler_loop() -> None:
+    """Tâche planifiée (démarrée par app.py) : une passe toutes les INGESTION_INTERVAL_MINUTES"""
+    interval = settings.INGESTION_INTERVAL_MINUTES * 60
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(_flush_reads)
+            await ingestion_scheduler.run_once()
+        except Exception as e:
+            logger.exception(f"Ingestion round failed: {e}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Une passe d'ingestion des projets actifs")
+    parser.add_argument("--dry-run", action="store_true", help="Afficher les jobs planifiés sans appeler les APIs")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(ingestion_scheduler.run_once(dry_run=args.dry_run))
+    print(json.dumps(result, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
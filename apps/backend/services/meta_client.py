@@ -1,16 +1,25 @@
+import asyncio
+import hashlib
+import json
 import logging
 import time
-from typing import Any, Dict, Optional, Union
+import re
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set, Union
+from urllib.parse import urlencode
 
 import httpx  # type: ignore
 from fastapi import HTTPException, status
 
 from core.config import settings
+from services.http_client import get_http_client, request_timeout
 
 logger = logging.getLogger(__name__)
 
 META_BASE_URL = "https://graph.facebook.com/"
 
+# Champs des médias Instagram lus par l'ingestion (recent_media, /media, business_discovery)
+IG_MEDIA_FIELDS = "id,caption,media_type,media_url,permalink,timestamp,like_count,comments_count,username"
+
 
 class MetaAPIError(HTTPException):
     """Erreur normalisée pour les appels Meta Graph API."""
@@ -31,6 +40,193 @@ def _sanitize(value: Any) -> Any:
     return value
 
 
+# ---- Régulation d'après les headers d'utilisation Meta ----
+
+# Codes d'erreur Graph API de dépassement de quota (app, utilisateur, page, BUC)
+RATE_LIMIT_ERROR_CODES = {4, 17, 32, 613, *range(80001, 80015)}
+
+# Métriques d'utilisation (%) communes à X-App-Usage et X-Business-Use-Case-Usage
+_USAGE_METRICS = ("call_count", "total_cputime", "total_time")
+
+
+def token_fingerprint(token: Optional[str]) -> str:
+    """Identifiant stable et non réversible d'un token (clé de scope, métriques)"""
+    if not token:
+        return "anonymous"
+    return hashlib.sha256(token.encode()).hexdigest()[:12]
+
+
+class UsageScope:
+    """Utilisation annoncée par Meta pour un scope (app x token, ou business id)"""
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.usage: Dict[str, float] = {}
+        self.updated_at = 0.0
+        self.blocked_until = 0.0
+        self.next_slot = 0.0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.rejected = 0
+
+    def utilisation(self, now: float) -> float:
+        """Métrique la plus haute ; une mesure plus vieille que le cooldown n'est plus fiable"""
+        if not self.usage or now - self.updated_at > settings.META_THROTTLE_COOLDOWN:
+            return 0.0
+        return max(self.usage.values())
+
+    def as_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "usage": dict(self.usage),
+            "utilisation": self.utilisation(now),
+            "age_seconds": round(now - self.updated_at, 1) if self.updated_at else None,
+            "interval_seconds": round(throttle_interval(self.utilisation(now)), 3),
+            "blocked_for_seconds": round(max(self.blocked_until - now, 0.0), 1),
+            "waits": self.waits,
+            "wait_total_seconds": round(self.wait_total, 3),
+            "rejected": self.rejected,
+        }
+
+
+def throttle_interval(utilisation: float) -> float:
+    """Espacement entre deux appels d'un scope : 0 sous SLOW, croissant jusqu'à MAX_INTERVAL à STOP"""
+    slow, stop = settings.META_THROTTLE_SLOW_PERCENT, settings.META_THROTTLE_STOP_PERCENT
+    if utilisation < slow:
+        return 0.0
+    ratio = min((utilisation - slow) / max(stop - slow, 1e-9), 1.0)
+    return settings.META_THROTTLE_MAX_INTERVAL * ratio * ratio
+
+
+class MetaRateGovernor:
+    """
+    Espace les appels Meta quand l'utilisation annoncée approche la limite, au lieu de
+    découvrir le throttling par un 4xx (blocage jusqu'à une heure). Scopes suivis :
+    - token:<empreinte> : X-App-Usage (quota de l'app, par utilisateur pour un token utilisateur)
+    - business:<id> : X-Business-Use-Case-Usage, associé aux tokens qui l'ont reçu
+    Un appel attend son créneau dans chaque scope du token ; au-delà de META_THROTTLE_MAX_WAIT,
+    il échoue immédiatement en 429 plutôt que de bloquer la requête.
+    """
+
+    def __init__(self) -> None:
+        self._scopes: Dict[str, UsageScope] = {}
+        self._token_businesses: Dict[str, Set[str]] = {}
+
+    def _scope(self, key: str) -> UsageScope:
+        scope = self._scopes.get(key)
+        if scope is None:
+            scope = self._scopes[key] = UsageScope(key)
+        return scope
+
+    def _scopes_for(self, fingerprint: str) -> List[UsageScope]:
+        keys = [f"token:{fingerprint}"]
+        keys.extend(f"business:{business_id}" for business_id in self._token_businesses.get(fingerprint, ()))
+        return [self._scopes[key] for key in keys if key in self._scopes]
+
+    def reserve(self, fingerprint: str) -> float:
+        """Réserve le prochain créneau de chaque scope ; retourne l'attente en secondes"""
+        now = time.monotonic()
+        delay = 0.0
+        # Scopes qui contraignent l'appel : suspendus, ou au-delà du seuil SLOW
+        constraining = []
+        for scope in self._scopes_for(fingerprint):
+            if scope.blocked_until > now:
+                constraining.append((scope, 0.0))
+                delay = max(delay, scope.blocked_until - now)
+                continue
+            interval = throttle_interval(scope.utilisation(now))
+            if interval:
+                constraining.append((scope, interval))
+                delay = max(delay, scope.next_slot - now)
+        if delay > settings.META_THROTTLE_MAX_WAIT:
+            for scope, _ in constraining:
+                scope.rejected += 1
+            raise MetaAPIError(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail={"message": "Meta API budget exhausted", "retry_after": round(delay)},
+            )
+        for scope, interval in constraining:
+            scope.next_slot = max(scope.next_slot, now + delay) + interval
+            if delay:
+                scope.waits += 1
+                scope.wait_total += delay
+        return delay
+
+    async def acquire(self, fingerprint: str) -> None:
+        delay = self.reserve(fingerprint)
+        if delay:
+            logger.info("Meta throttle: waiting %.2fs (token %s)", delay, fingerprint)
+            await asyncio.sleep(delay)
+
+    def _update(self, scope: UsageScope, usage: Mapping[str, Any], now: float, regain_minutes: float = 0.0) -> None:
+        scope.usage = {metric: float(usage.get(metric) or 0) for metric in _USAGE_METRICS}
+        scope.updated_at = now
+        if regain_minutes:
+            scope.blocked_until = max(scope.blocked_until, now + regain_minutes * 60)
+        elif scope.utilisation(now) >= settings.META_THROTTLE_STOP_PERCENT:
+            scope.blocked_until = max(scope.blocked_until, now + settings.META_THROTTLE_COOLDOWN)
+            logger.warning("Meta usage %s at %.0f%%: calls suspended", scope.key, scope.utilisation(now))
+
+    def observe(self, fingerprint: str, headers: Mapping[str, str], error: Any = None) -> None:
+        """Met à jour les scopes depuis les headers d'une réponse (et le corps d'une erreur)"""
+        now = time.monotonic()
+        app_usage = _parse_usage_header(headers.get("x-app-usage"))
+        if isinstance(app_usage, dict):
+            self._update(self._scope(f"token:{fingerprint}"), app_usage, now)
+
+        business_usage = _parse_usage_header(headers.get("x-business-use-case-usage"))
+        if isinstance(business_usage, dict):
+            for business_id, entries in business_usage.items():
+                entries = [entry for entry in entries or [] if isinstance(entry, dict)]
+                if not entries:
+                    continue
+                # Plusieurs types (instagram, pages, ...) : le plus contraint l'emporte
+                merged = {metric: max(float(entry.get(metric) or 0) for entry in entries) for metric in _USAGE_METRICS}
+                regain = max(float(entry.get("estimated_time_to_regain_access") or 0) for entry in entries)
+                self._update(self._scope(f"business:{business_id}"), merged, now, regain)
+                self._token_businesses.setdefault(fingerprint, set()).add(str(business_id))
+
+        if _is_rate_limit_error(error):
+            scope = self._scope(f"token:{fingerprint}")
+            scope.blocked_until = max(scope.blocked_until, now + settings.META_THROTTLE_COOLDOWN)
+            logger.warning("Meta rate limit error for token %s: calls suspended %.0fs", fingerprint, settings.META_THROTTLE_COOLDOWN)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "enabled": settings.META_THROTTLE_ENABLED,
+            "slow_percent": settings.META_THROTTLE_SLOW_PERCENT,
+            "stop_percent": settings.META_THROTTLE_STOP_PERCENT,
+            "scopes": {key: scope.as_dict(now) for key, scope in self._scopes.items()},
+        }
+
+
+def _parse_usage_header(value: Optional[str]) -> Any:
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        logger.debug("Unparseable Meta usage header: %s", value[:200])
+        return None
+
+
+def _is_rate_limit_error(detail: Any) -> bool:
+    if not isinstance(detail, dict) or not isinstance(detail.get("error"), dict):
+        return False
+    return detail["error"].get("code") in RATE_LIMIT_ERROR_CODES
+
+
+meta_governor = MetaRateGovernor()
+
+
+def _fallback_token() -> Optional[str]:
+    """Token système utilisé quand l'appelant n'en fournit pas"""
+    for token in (settings.META_LONG_TOKEN, settings.IG_ACCESS_TOKEN):
+        if token:
+            return token
+    return None
+
+
 async def call_meta(
     method: str,
     endpoint: str,
@@ -52,26 +248,26 @@ async def call_meta(
 
     # Token de fallback depuis la config si disponible
     if "access_token" not in query:
-        fallback_tokens = [
-            settings.META_LONG_TOKEN,
-            settings.IG_ACCESS_TOKEN,
-        ]
-        for token in fallback_tokens:
-            if token:
-                query["access_token"] = token
-                break
+        fallback_token = _fallback_token()
+        if fallback_token:
+            query["access_token"] = fallback_token
 
     safe_params = {key: _sanitize(str(value)) for key, value in query.items()}
 
+    fingerprint = token_fingerprint(query.get("access_token"))
+    if settings.META_THROTTLE_ENABLED:
+        await meta_governor.acquire(fingerprint)
+
     start = time.perf_counter()
     try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.request(
-                method=method_upper,
-                url=url,
-                params=query,
-                json=data,
-            )
+        client = get_http_client("meta")
+        response = await client.request(
+            method=method_upper,
+            url=url,
+            params=query,
+            json=data,
+            timeout=request_timeout(timeout),
+        )
     except httpx.RequestError as exc:
         duration = time.perf_counter() - start
         logger.error(
@@ -94,6 +290,7 @@ async def call_meta(
             detail = response.json()
         except ValueError:
             detail = {"error": response.text}
+        meta_governor.observe(fingerprint, response.headers, detail)
 
         logger.error(
             "META API ERROR | %s %s | Status: %d | Duration: %.2fs | Detail: %s",
@@ -127,6 +324,8 @@ async def call_meta(
                 },
             )
 
+    meta_governor.observe(fingerprint, response.headers)
+
     # Log succès seulement si HTTP 200-399
     logger.info(
         "META API SUCCESS | %s %s | Status: %d | Duration: %.2fs | Params: %s",
@@ -143,3 +342,130 @@ async def call_meta(
         return response.text
 
 
+
+
+# ---- Batch Graph API (POST / avec jusqu'à 50 sous-requêtes) ----
+
+META_BATCH_MAX_REQUESTS = 50
+
+# Références entre sous-requêtes ({result=nom:$.jsonpath}) et caractères laissés tels quels
+# dans les paramètres (références, expansions de champs)
+_BATCH_REFERENCE_RE = re.compile(r"\{result=([^:}]+):")
+_BATCH_SAFE_CHARS = "{}=:$.*,()"
+
+
+def batch_result(name: str, path: str) -> str:
+    """Référence au résultat d'une sous-requête nommée du même batch (JSONPath)"""
+    return f"{{result={name}:{path}}}"
+
+
+class BatchRequest:
+    """
+    Sous-requête d'un batch. Une sous-requête nommée peut être référencée par les suivantes
+    via batch_result(name, "$.data.0.id") ; sa réponse est toujours renvoyée à l'appelant.
+    """
+
+    def __init__(
+        self,
+        relative_url: str,
+        params: Optional[Dict[str, Any]] = None,
+        method: str = "GET",
+        name: Optional[str] = None,
+    ) -> None:
+        self.relative_url = relative_url.lstrip("/")
+        self.params = params or {}
+        self.method = method.upper()
+        self.name = name
+
+    def references(self) -> Set[str]:
+        return set(_BATCH_REFERENCE_RE.findall(self.relative_url + urlencode(self.params, safe=_BATCH_SAFE_CHARS)))
+
+    def as_dict(self) -> Dict[str, Any]:
+        url = self.relative_url
+        if self.params:
+            url += ("&" if "?" in url else "?") + urlencode(self.params, safe=_BATCH_SAFE_CHARS)
+        operation: Dict[str, Any] = {"method": self.method, "relative_url": url}
+        if self.name:
+            operation["name"] = self.name
+            # Par défaut Meta omet la réponse d'une sous-requête référencée
+            operation["omit_response_on_success"] = False
+        return operation
+
+
+def _batch_chunks(requests: Sequence[BatchRequest]) -> List[Sequence[BatchRequest]]:
+    """Lots de META_BATCH_MAX_REQUESTS ; une référence doit viser une sous-requête antérieure du même lot"""
+    chunks = []
+    for start in range(0, len(requests), META_BATCH_MAX_REQUESTS):
+        chunk = requests[start:start + META_BATCH_MAX_REQUESTS]
+        names: Set[str] = set()
+        for request in chunk:
+            missing = request.references() - names
+            if missing:
+                raise ValueError(f"Meta batch reference to {sorted(missing)} outside of its batch of {META_BATCH_MAX_REQUESTS}")
+            if request.name:
+                names.add(request.name)
+        chunks.append(chunk)
+    return chunks
+
+
+def _demultiplex(request: BatchRequest, entry: Any, fingerprint: str) -> Any:
+    """Réponse d'une sous-requête -> corps JSON, ou MetaAPIError (retournée, pas levée)"""
+    if entry is None:
+        # Sous-requête non exécutée : la sous-requête dont elle dépend a échoué
+        return MetaAPIError(
+            status_code=status.HTTP_424_FAILED_DEPENDENCY,
+            detail={"message": "Meta batch sub-request not executed", "relative_url": request.relative_url},
+        )
+    code = int(entry.get("code") or 0)
+    body: Any = entry.get("body")
+    try:
+        body = json.loads(body) if body else None
+    except ValueError:
+        body = {"error": body}
+    if code < 400:
+        return body
+
+    meta_governor.observe(fingerprint, {}, body)
+    logger.error(
+        "META BATCH ERROR | %s %s | Status: %d | Detail: %s",
+        request.method,
+        request.relative_url,
+        code,
+        str(body)[:200],
+    )
+    return MetaAPIError(
+        status_code=code if 400 <= code < 500 else status.HTTP_502_BAD_GATEWAY,
+        detail={"message": "Meta API error", "status_code": code, "detail": body},
+    )
+
+
+async def call_meta_batch(
+    requests: Sequence[BatchRequest],
+    access_token: Optional[str] = None,
+    timeout: float = 20.0,
+) -> List[Any]:
+    """
+    Exécute les sous-requêtes en un appel POST / par lot de 50 (au lieu d'un aller-retour chacune).
+    Retourne, dans l'ordre des requêtes, le corps JSON de chaque réponse ou une MetaAPIError :
+    l'échec d'une sous-requête n'interrompt pas les autres. Une erreur de l'appel batch
+    lui-même (token, réseau, quota) est levée.
+    """
+    fingerprint = token_fingerprint(access_token or _fallback_token())
+    results: List[Any] = []
+    for chunk in _batch_chunks(requests):
+        response = await call_meta(
+            method="POST",
+            endpoint="",
+            data={"batch": json.dumps([request.as_dict() for request in chunk]), "include_headers": "false"},
+            access_token=access_token,
+            timeout=timeout,
+        )
+        if not isinstance(response, list) or len(response) != len(chunk):
+            raise MetaAPIError(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail={"message": "Unexpected Meta batch response", "requests": len(chunk)},
+            )
+        results.extend(
+            _demultiplex(request, entry, fingerprint) for request, entry in zip(chunk, response)
+        )
+    return results
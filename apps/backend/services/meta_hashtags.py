@@ -0,0 +1,236 @@
+# services/meta_hashtags.py
+# Annuaire hashtag -> id Meta (meta_hashtag_ids) consulté avant ig_hashtag_search, et quota de
+# recherches par utilisateur IG (meta_hashtag_searches).
+#
+# Meta limite chaque utilisateur IG à META_HASHTAG_SEARCH_QUOTA (30) hashtags uniques par
+# 7 jours glissants ; re-chercher un hashtag déjà compté dans la fenêtre ne consomme rien.
+# L'id d'un hashtag est stable : une fois connu, recent_media est appelé directement (un appel
+# au lieu de deux, aucun quota consommé). Un tag inconnu de Meta est mémorisé (négatif) pendant
+# META_HASHTAG_NEGATIVE_DAYS.
+# Le quota est vérifié puis réservé sous un verrou consultatif par utilisateur IG (PostgreSQL ;
+# en dev SQLite, un seul process, pas de verrou).
+
+import logging
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import status
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from db.models import MetaHashtagId, MetaHashtagSearch
+from services.advisory_locks import HASHTAG_SEARCH_LOCK
+from services.meta_client import (
+    IG_MEDIA_FIELDS,
+    BatchRequest,
+    MetaAPIError,
+    batch_result,
+    call_meta,
+    call_meta_batch,
+)
+from services.post_utils import normalize_hashtag
+from services.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Les ids ne changent pas : le cache process évite la lecture en base à chaque appel
+_ids = TTLCache("meta_hashtag_ids", max_entries=20000, default_ttl=3600)
+
+
+class HashtagSearchQuotaExceeded(MetaAPIError):
+    """Quota ig_hashtag_search de l'utilisateur IG épuisé pour un hashtag encore inconnu"""
+
+    def __init__(self, ig_user_id: str, retry_after: float) -> None:
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail={
+                "message": "Instagram hashtag search quota exhausted",
+                "ig_user_id": ig_user_id,
+                "limit": settings.META_HASHTAG_SEARCH_QUOTA,
+                "retry_after": math.ceil(retry_after),
+            },
+        )
+
+
+def _window() -> timedelta:
+    return timedelta(days=settings.META_HASHTAG_SEARCH_WINDOW_DAYS)
+
+
+def _session() -> AsyncSession:
+    from db.base import AsyncSessionLocal
+
+    return AsyncSessionLocal()
+
+
+def _insert(session: AsyncSession):
+    return postgresql.insert if session.get_bind().dialect.name == "postgresql" else sqlite.insert
+
+
+# ---- Annuaire ----
+
+async def known_hashtag_id(name: str) -> Tuple[bool, Optional[str]]:
+    """(connu, id Meta) : un résultat négatif récent compte comme connu (id None)"""
+    name = normalize_hashtag(name)
+    cached = _ids.get(name, _MISSING)
+    if cached is not _MISSING:
+        return True, cached
+
+    async with _session() as session:
+        row = (
+            await session.execute(
+                select(MetaHashtagId.meta_hashtag_id, MetaHashtagId.resolved_at).where(MetaHashtagId.name == name)
+            )
+        ).first()
+    if row is None:
+        return False, None
+    meta_hashtag_id, resolved_at = row
+    if meta_hashtag_id is None:
+        expires_at = resolved_at + timedelta(days=settings.META_HASHTAG_NEGATIVE_DAYS)
+        remaining = (expires_at - datetime.utcnow()).total_seconds()
+        if remaining <= 0:
+            return False, None
+        _ids.set(name, None, ttl=min(remaining, _ids.default_ttl), negative=True)
+        return True, None
+    _ids.set(name, meta_hashtag_id)
+    return True, meta_hashtag_id
+
+
+async def record_hashtag_id(name: str, meta_hashtag_id: Optional[str]) -> None:
+    """Mémorise le résultat d'une recherche (None : hashtag inconnu de Meta)"""
+    name = normalize_hashtag(name)
+    async with _session() as session:
+        stmt = _insert(session)(MetaHashtagId).values(
+            name=name, meta_hashtag_id=meta_hashtag_id, resolved_at=datetime.utcnow(),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MetaHashtagId.name],
+            set_={"meta_hashtag_id": stmt.excluded.meta_hashtag_id, "resolved_at": stmt.excluded.resolved_at},
+        )
+        await session.execute(stmt)
+        await session.commit()
+    if meta_hashtag_id:
+        _ids.set(name, meta_hashtag_id)
+    else:
+        _ids.delete(name)
+
+
+# ---- Quota par utilisateur IG ----
+
+async def search_quota(ig_user_id: str, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Hashtags uniques cherchés dans la fenêtre glissante et date de la prochaine place libérée"""
+    now = now or datetime.utcnow()
+    async with _session() as session:
+        used, oldest = (
+            await session.execute(
+                select(func.count(), func.min(MetaHashtagSearch.searched_at)).where(
+                    MetaHashtagSearch.ig_user_id == ig_user_id,
+                    MetaHashtagSearch.searched_at > now - _window(),
+                )
+            )
+        ).one()
+    return {
+        "ig_user_id": ig_user_id,
+        "used": used,
+        "limit": settings.META_HASHTAG_SEARCH_QUOTA,
+        "remaining": max(settings.META_HASHTAG_SEARCH_QUOTA - used, 0),
+        "next_slot_at": (oldest + _window()).isoformat() if oldest and used >= settings.META_HASHTAG_SEARCH_QUOTA else None,
+    }
+
+
+async def reserve_search(ig_user_id: str, name: str, now: Optional[datetime] = None) -> None:
+    """
+    Compte la recherche de `name` dans le quota de l'utilisateur IG (gratuit si déjà comptée
+    dans la fenêtre) ; HashtagSearchQuotaExceeded si elle dépasserait la limite.
+    """
+    now = now or datetime.utcnow()
+    name = normalize_hashtag(name)
+    window_start = now - _window()
+    async with _session() as session:
+        if session.get_bind().dialect.name == "postgresql":
+            # Compte puis insertion sous un verrou par utilisateur IG (libéré au commit) : deux
+            # recherches simultanées ne peuvent pas consommer la même dernière place du quota
+            await session.execute(
+                text("SELECT pg_advisory_xact_lock(:namespace, hashtext(:ig_user_id))"),
+                {"namespace": HASHTAG_SEARCH_LOCK, "ig_user_id": ig_user_id},
+            )
+        searched_at = await session.scalar(
+            select(MetaHashtagSearch.searched_at).where(
+                MetaHashtagSearch.ig_user_id == ig_user_id, MetaHashtagSearch.name == name,
+            )
+        )
+        if searched_at is not None and searched_at > window_start:
+            return
+
+        used, oldest = (
+            await session.execute(
+                select(func.count(), func.min(MetaHashtagSearch.searched_at)).where(
+                    MetaHashtagSearch.ig_user_id == ig_user_id,
+                    MetaHashtagSearch.searched_at > window_start,
+                )
+            )
+        ).one()
+        if used >= settings.META_HASHTAG_SEARCH_QUOTA:
+            retry_after = (oldest + _window() - now).total_seconds()
+            logger.warning(f"Hashtag search quota exhausted for IG user {ig_user_id}: #{name} not searched")
+            raise HashtagSearchQuotaExceeded(ig_user_id, retry_after)
+
+        stmt = _insert(session)(MetaHashtagSearch).values(ig_user_id=ig_user_id, name=name, searched_at=now)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MetaHashtagSearch.ig_user_id, MetaHashtagSearch.name],
+            set_={"searched_at": stmt.excluded.searched_at},
+        )
+        await session.execute(stmt)
+        await session.commit()
+
+
+# ---- Médias récents d'un hashtag ----
+
+async def fetch_hashtag_recent_media(
+    ig_user_id: str,
+    tag: str,
+    limit: int,
+    fields: str = IG_MEDIA_FIELDS,
+    access_token: Optional[str] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Médias récents d'un hashtag ; None si Meta ne connaît pas le hashtag.
+    Id connu : un seul appel recent_media. Sinon, quota réservé puis recherche + médias
+    en un batch, et l'id trouvé est mémorisé.
+    """
+    name = normalize_hashtag(tag)
+    media_params = {"user_id": ig_user_id, "fields": fields, "limit": limit}
+
+    known, meta_hashtag_id = await known_hashtag_id(name)
+    if known:
+        if meta_hashtag_id is None:
+            return None
+        media = await call_meta(
+            method="GET",
+            endpoint=f"v21.0/{meta_hashtag_id}/recent_media",
+            params=media_params,
+            access_token=access_token,
+        )
+        return media.get("data", [])
+
+    await reserve_search(ig_user_id, name)
+    search, media = await call_meta_batch(
+        [
+            BatchRequest("v21.0/ig_hashtag_search", {"user_id": ig_user_id, "q": name}, name="hashtag"),
+            BatchRequest(f"v21.0/{batch_result('hashtag', '$.data.0.id')}/recent_media", media_params),
+        ],
+        access_token=access_token,
+    )
+    if isinstance(search, MetaAPIError):
+        raise search
+    data = search.get("data", [])
+    await record_hashtag_id(name, data[0]["id"] if data else None)
+    if not data:
+        return None
+    if isinstance(media, MetaAPIError):
+        raise media
+    return media.get("data", [])
@@ -0,0 +1,275 @@
+# services/metric_snapshots.py
+# Série temporelle des compteurs des posts (post_metric_snapshots) : écriture en lot à
+# l'ingestion, lecture pour le scoring (vélocité) et les analytics (croissance)
+#
+# Politique : un relevé par heure pendant METRICS_HOURLY_RETENTION_DAYS jours, puis un par
+# jour (le dernier de la journée : les compteurs sont cumulatifs), supprimés après
+# METRICS_RETENTION_DAYS jours (DROP des partitions mensuelles expirées sous PostgreSQL).
+#
+# CLI : python -m services.metric_snapshots [--full]
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import DateTime, delete, exists, func, insert, literal, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from db.models import PostMetricSnapshot, PostReadModel
+from services.advisory_locks import METRICS_MAINTENANCE_LOCK, acquire_advisory_lock, release_advisory_lock
+
+logger = logging.getLogger(__name__)
+
+_BATCH_SIZE = 500
+_TABLE = PostMetricSnapshot.__table__
+_PARTITION_RE = re.compile(r"^post_metric_snapshots_(\d{4})_(\d{2})$")
+
+# Compteurs relevés, dans l'ordre des matrices de trend_scoring (likes, comments, shares, views)
+COUNTER_COLUMNS = ("like_count", "comment_count", "share_count", "view_count")
+
+
+# ---- Écriture ----
+
+def record_snapshots(db: Session, post_ids: Iterable[str], captured_at: Optional[datetime] = None) -> int:
+    """
+    Relève les compteurs courants des posts (lus dans post_read_models, déjà parsés) :
+    un INSERT ... SELECT par batch. À appeler après refresh_read_models.
+    """
+    post_ids = list(dict.fromkeys(post_ids))
+    if not post_ids:
+        return 0
+
+    captured_at = captured_at or datetime.utcnow()
+    dialect = db.get_bind().dialect.name
+    dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert if dialect == "sqlite" else None
+    columns = ["post_id", "captured_at", *COUNTER_COLUMNS]
+    written = 0
+    for start in range(0, len(post_ids), _BATCH_SIZE):
+        batch = post_ids[start:start + _BATCH_SIZE]
+        source = select(
+            PostReadModel.post_id,
+            literal(captured_at, DateTime()),
+            *(getattr(PostReadModel, column) for column in COUNTER_COLUMNS),
+        ).where(PostReadModel.post_id.in_(batch))
+        if dialect_insert is not None:
+            # Deux ingestions du même post dans la même microseconde : un seul relevé
+            stmt = dialect_insert(PostMetricSnapshot).from_select(columns, source).on_conflict_do_nothing()
+        else:
+            stmt = insert(PostMetricSnapshot).from_select(columns, source)
+        written += db.execute(stmt).rowcount or 0
+    return written
+
+
+# ---- Lecture ----
+
+def previous_snapshots(
+    db: Session,
+    post_ids: Sequence[str],
+    before: datetime,
+    not_before: Optional[datetime] = None,
+) -> Dict[str, Tuple[datetime, List[Optional[int]]]]:
+    """Dernier relevé de chaque post antérieur à `before` : {post_id: (captured_at, compteurs)}"""
+    result: Dict[str, Tuple[datetime, List[Optional[int]]]] = {}
+    for start in range(0, len(post_ids), _BATCH_SIZE):
+        batch = list(post_ids[start:start + _BATCH_SIZE])
+        latest = (
+            select(_TABLE.c.post_id, func.max(_TABLE.c.captured_at).label("captured_at"))
+            .where(_TABLE.c.post_id.in_(batch), _TABLE.c.captured_at <= before)
+            .group_by(_TABLE.c.post_id)
+        )
+        if not_before is not None:
+            # Borne basse : élagage des partitions plus anciennes
+            latest = latest.where(_TABLE.c.captured_at >= not_before)
+        latest = latest.subquery()
+        rows = db.execute(
+            select(_TABLE.c.post_id, _TABLE.c.captured_at, *(_TABLE.c[column] for column in COUNTER_COLUMNS))
+            .join(latest, (latest.c.post_id == _TABLE.c.post_id) & (latest.c.captured_at == _TABLE.c.captured_at))
+        ).all()
+        for post_id, captured_at, *counters in rows:
+            result[post_id] = (captured_at, counters)
+    return result
+
+
+def metric_series(db: Session, post_id: str, since: datetime) -> List[PostMetricSnapshot]:
+    """Relevés d'un post depuis `since`, du plus ancien au plus récent"""
+    return (
+        db.query(PostMetricSnapshot)
+        .filter(PostMetricSnapshot.post_id == post_id, PostMetricSnapshot.captured_at >= since)
+        .order_by(PostMetricSnapshot.captured_at)
+        .all()
+    )
+
+
+# ---- Sous-échantillonnage et rétention ----
+
+def _bucket(column, unit: str, dialect: str):
+    if dialect == "postgresql":
+        return func.date_trunc(unit, column)
+    return func.strftime("%Y-%m-%d %H" if unit == "hour" else "%Y-%m-%d", column)
+
+
+def downsample(db: Session, unit: str, start: Optional[datetime], end: datetime) -> int:
+    """Ne garde que le dernier relevé de chaque (post, heure | jour) de [start, end["""
+    dialect = db.get_bind().dialect.name
+    later = _TABLE.alias("later")
+    stmt = delete(_TABLE).where(
+        _TABLE.c.captured_at < end,
+        exists().where(
+            later.c.post_id == _TABLE.c.post_id,
+            later.c.captured_at > _TABLE.c.captured_at,
+            _bucket(later.c.captured_at, unit, dialect) == _bucket(_TABLE.c.captured_at, unit, dialect),
+        ),
+    )
+    if start is not None:
+        stmt = stmt.where(_TABLE.c.captured_at >= start)
+    return db.execute(stmt).rowcount or 0
+
+
+def _month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def _next_month(month: datetime) -> datetime:
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _is_partitioned(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return bool(db.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('post_metric_snapshots'))"
+    )).scalar())
+
+
+def ensure_partitions(db: Session, now: datetime, months_ahead: int = 2) -> List[str]:
+    """
+    Crée les partitions du mois courant et des `months_ahead` suivants (PostgreSQL).
+    Des relevés du mois tombés entre-temps dans post_metric_snapshots_default (maintenance
+    en retard, horloge en avance) empêcheraient CREATE ... PARTITION OF : la partition est
+    alors créée à part, les lignes y sont déplacées, puis elle est attachée.
+    """
+    has_default = db.execute(text("SELECT to_regclass('post_metric_snapshots_default') IS NOT NULL")).scalar()
+    created = []
+    month = _month_start(now)
+    for _ in range(months_ahead + 1):
+        name = f"post_metric_snapshots_{month:%Y_%m}"
+        bounds = f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_next_month(month):%Y-%m-%d}')"
+        exists = db.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+        if not exists and has_default:
+            db.execute(text(f"CREATE TABLE {name} (LIKE post_metric_snapshots INCLUDING DEFAULTS)"))
+            moved = db.execute(
+                text(
+                    f"WITH moved AS (DELETE FROM post_metric_snapshots_default "
+                    f"WHERE captured_at >= :start AND captured_at < :end RETURNING *) "
+                    f"INSERT INTO {name} SELECT * FROM moved"
+                ),
+                {"start": month, "end": _next_month(month)},
+            ).rowcount or 0
+            db.execute(text(f"ALTER TABLE post_metric_snapshots ATTACH PARTITION {name} {bounds}"))
+            if moved:
+                logger.info(f"Moved {moved} snapshots from post_metric_snapshots_default to {name}")
+        elif not exists:
+            db.execute(text(f"CREATE TABLE {name} PARTITION OF post_metric_snapshots {bounds}"))
+        created.append(name)
+        month = _next_month(month)
+    return created
+
+
+def drop_expired_partitions(db: Session, cutoff: datetime) -> List[str]:
+    """DROP des partitions mensuelles entièrement antérieures à `cutoff` (PostgreSQL)"""
+    names = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('post_metric_snapshots')"
+    )).scalars().all()
+    dropped = []
+    for name in names:
+        match = _PARTITION_RE.match(name)
+        if match and _next_month(datetime(int(match.group(1)), int(match.group(2)), 1)) <= cutoff:
+            db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            dropped.append(name)
+    return dropped
+
+
+def run_metrics_maintenance(db: Session, now: Optional[datetime] = None, full: bool = False) -> Dict[str, Any]:
+    """
+    Partitions à venir, sous-échantillonnage (horaire puis quotidien) et rétention.
+    Hors --full, seuls les relevés récents (METRICS_DOWNSAMPLE_LOOKBACK_DAYS) sont compactés.
+    """
+    now = now or datetime.utcnow()
+    started = time.perf_counter()
+    today = datetime(now.year, now.month, now.day)
+    hourly_cutoff = today - timedelta(days=settings.METRICS_HOURLY_RETENTION_DAYS)
+    retention_cutoff = today - timedelta(days=settings.METRICS_RETENTION_DAYS)
+    lookback = None if full else timedelta(days=settings.METRICS_DOWNSAMPLE_LOOKBACK_DAYS)
+
+    result: Dict[str, Any] = {"partitions_dropped": []}
+    partitioned = _is_partitioned(db)
+    if partitioned:
+        ensure_partitions(db, now)
+        result["partitions_dropped"] = drop_expired_partitions(db, retention_cutoff)
+
+    result["expired"] = db.execute(delete(_TABLE).where(_TABLE.c.captured_at < retention_cutoff)).rowcount or 0
+    result["hourly_compacted"] = downsample(
+        db, "hour", max(hourly_cutoff, now - lookback) if lookback else hourly_cutoff, now + timedelta(hours=1),
+    )
+    result["daily_compacted"] = downsample(
+        db, "day", max(retention_cutoff, hourly_cutoff - lookback) if lookback else retention_cutoff, hourly_cutoff,
+    )
+    db.commit()
+
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    logger.info(f"Metrics maintenance: {result}")
+    return result
+
+
+async def metrics_maintenance_loop() -> None:
+    """Tâche planifiée (démarrée par app.py) : toutes les METRICS_MAINTENANCE_INTERVAL_MINUTES"""
+    from db.base import SessionLocal
+
+    interval = settings.METRICS_MAINTENANCE_INTERVAL_MINUTES * 60
+    while True:
+        await asyncio.sleep(interval)
+        lock = None
+        db = SessionLocal()
+        try:
+            # Chaque worker démarre la boucle : une seule maintenance par intervalle
+            lock = await asyncio.to_thread(acquire_advisory_lock, METRICS_MAINTENANCE_LOCK)
+            if lock is None:
+                logger.info("Metrics maintenance skipped: another worker holds the lock")
+                continue
+            await asyncio.to_thread(run_metrics_maintenance, db)
+        except Exception as e:
+            logger.exception(f"Metrics maintenance failed: {e}")
+            db.rollback()
+        finally:
+            db.close()
+            if lock is not None:
+                await asyncio.to_thread(release_advisory_lock, lock, METRICS_MAINTENANCE_LOCK)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Sous-échantillonnage et rétention des relevés de métriques")
+    parser.add_argument("--full", action="store_true", help="Compacter tout l'historique (pas seulement les jours récents)")
+    args = parser.parse_args(argv)
+
+    from db.base import SessionLocal
+
+    db = SessionLocal()
+    try:
+        result = run_metrics_maintenance(db, full=args.full)
+    finally:
+        db.close()
+    print(json.dumps(result))
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
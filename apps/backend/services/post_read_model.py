@@ -0,0 +1,209 @@
+# services/post_read_model.py
+# Read model des posts : permalink, compteurs, médias, hashtags/mentions et author résolus
+# une fois à l'ingestion (table post_read_models) au lieu d'être recalculés à chaque liste
+
+import json
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from db.models import Platform, Post, PostReadModel
+
+logger = logging.getLogger(__name__)
+
+REFRESH_BATCH_SIZE = 500
+
+_HASHTAG_RE = re.compile(r'#\w+')
+_MENTION_RE = re.compile(r'@\w+')
+_INSTAGRAM_USER_RE = re.compile(r'instagram\.com/([^/]+)/')
+_INSTAGRAM_RESERVED_PATHS = {'p', 'reel', 'tv', 'stories'}
+
+# Ordre de priorité des clés de compteurs (metrics puis api_payload)
+_LIKE_KEYS = ('like_count', 'likes')
+_COMMENT_KEYS = ('comment_count', 'comments_count', 'comments')
+
+
+def _load_json(raw: Optional[str]) -> Dict[str, Any]:
+    if not raw:
+        return {}
+    try:
+        value = json.loads(raw)
+    except (TypeError, ValueError):
+        return {}
+    return value if isinstance(value, dict) else {}
+
+
+def _first_present(keys, *sources: Dict[str, Any]) -> Optional[int]:
+    """Première clé présente (0 compris) dans metrics puis api_payload ; None si non numérique"""
+    for source in sources:
+        for key in keys:
+            if key in source and source[key] is not None:
+                try:
+                    return int(source[key])
+                except (TypeError, ValueError):
+                    return None
+    return None
+
+
+def _first_truthy(key: str, *sources: Dict[str, Any]) -> Optional[int]:
+    for source in sources:
+        if source.get(key):
+            try:
+                return int(source[key])
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def build_read_model(
+    post_id: str,
+    external_id: Optional[str],
+    author: Optional[str],
+    caption: Optional[str],
+    media_url: Optional[str],
+    platform_name: Optional[str],
+    api_payload: Dict[str, Any],
+    metrics: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Calcule les champs dérivés d'un post (mêmes règles que l'ancien list_project_posts)"""
+    platform_name = platform_name or 'instagram'
+
+    # PRIORITÉ 1 : permalink du payload API
+    permalink = None
+    candidate = (
+        api_payload.get('permalink')
+        or api_payload.get('share_url')
+        or api_payload.get('url')
+        or (api_payload.get('media_details') or {}).get('permalink')
+    )
+    if isinstance(candidate, str) and candidate.startswith('http'):
+        permalink = candidate
+
+    # PRIORITÉ 2 : construit depuis external_id
+    if not permalink and external_id and isinstance(external_id, str):
+        if external_id.startswith('http'):
+            permalink = external_id
+        elif platform_name == 'tiktok':
+            permalink = f"https://www.tiktok.com/@{(author or 'user')}/video/{external_id}"
+        elif platform_name == 'instagram':
+            external_id_clean = external_id.strip('/')
+            # Un ID numérique ne fonctionne pas avec oEmbed : pas de permalink
+            if not external_id_clean.isdigit():
+                permalink = f"https://www.instagram.com/p/{external_id_clean}/"
+
+    # TikTok : couverture depuis le payload si media_url manquant
+    if platform_name == 'tiktok' and not media_url and api_payload:
+        media_url = (
+            api_payload.get('cover_image_url')
+            or api_payload.get('thumbnail_url')
+            or api_payload.get('media_url')
+        )
+
+    # Author depuis le payload, puis depuis le permalink Instagram
+    if not author and api_payload:
+        author = (
+            api_payload.get('username')
+            or api_payload.get('owner_username')
+            or (api_payload.get('from') or {}).get('username')
+            or (api_payload.get('creator') or {}).get('username')
+        )
+        if not author and permalink:
+            match = _INSTAGRAM_USER_RE.search(permalink)
+            if match and match.group(1) not in _INSTAGRAM_RESERVED_PATHS:
+                author = match.group(1)
+
+    return {
+        "post_id": post_id,
+        "author": author,
+        "permalink": permalink,
+        "media_url": media_url,
+        "thumbnail_url": api_payload.get('thumbnail_url'),
+        "media_type": api_payload.get('media_type'),
+        "like_count": _first_present(_LIKE_KEYS, metrics, api_payload),
+        "comment_count": _first_present(_COMMENT_KEYS, metrics, api_payload),
+        "share_count": _first_truthy('share_count', metrics, api_payload),
+        "view_count": _first_truthy('view_count', metrics, api_payload),
+        "hashtags": _HASHTAG_RE.findall(caption) if caption else [],
+        "mentions": _MENTION_RE.findall(caption) if caption else [],
+    }
+
+
+def build_read_model_for_post(post: Post) -> Dict[str, Any]:
+    """build_read_model à partir d'une instance Post (relation platform chargée)"""
+    return build_read_model(
+        post.id,
+        post.external_id,
+        post.author,
+        post.caption,
+        post.media_url,
+        post.platform.name if post.platform else None,
+        _load_json(post.api_payload),
+        _load_json(post.metrics),
+    )
+
+
+def refresh_read_models(db: Session, post_ids: Iterable[str]) -> int:
+    """
+    (Re)calcule le read model des posts donnés : une lecture et un
+    INSERT ... ON CONFLICT (post_id) DO UPDATE par batch. Retourne le nombre de lignes écrites.
+    """
+    post_ids = list(dict.fromkeys(post_ids))
+    if not post_ids:
+        return 0
+
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert if dialect == "sqlite" else None
+    now = datetime.utcnow()
+    written = 0
+    for start in range(0, len(post_ids), REFRESH_BATCH_SIZE):
+        batch = post_ids[start:start + REFRESH_BATCH_SIZE]
+        rows = (
+            db.query(
+                Post.id, Post.external_id, Post.author, Post.caption, Post.media_url,
+                Post.api_payload, Post.metrics, Platform.name,
+            )
+            .outerjoin(Platform, Platform.id == Post.platform_id)
+            .filter(Post.id.in_(batch))
+            .all()
+        )
+        models: List[Dict[str, Any]] = []
+        for post_id, external_id, author, caption, media_url, api_payload, metrics, platform_name in rows:
+            model = build_read_model(
+                post_id, external_id, author, caption, media_url, platform_name,
+                _load_json(api_payload), _load_json(metrics),
+            )
+            model["hashtags"] = json.dumps(model["hashtags"])
+            model["mentions"] = json.dumps(model["mentions"])
+            model["updated_at"] = now
+            models.append(model)
+        if not models:
+            continue
+
+        if insert is not None:
+            stmt = insert(PostReadModel).values(models)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[PostReadModel.post_id],
+                set_={key: getattr(stmt.excluded, key) for key in models[0] if key != "post_id"},
+            )
+            db.execute(stmt)
+        else:
+            for model in models:
+                db.merge(PostReadModel(**model))
+            db.flush()
+        written += len(models)
+    return written
+
+
+def read_model_list(raw: Optional[str]) -> List[str]:
+    """Décode hashtags / mentions (JSON) d'un read model"""
+    if not raw:
+        return []
+    try:
+        value = json.loads(raw)
+    except (TypeError, ValueError):
+        return []
+    return value if isinstance(value, list) else []
@@ -3,14 +3,33 @@
 
 import json
 import logging
+import re
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Any, Iterable, Optional, List, Dict, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, and_, func
-from db.models import Post, Platform
+from sqlalchemy.dialects import postgresql, sqlite
+from core.config import settings
+from db.models import Post, Platform, Hashtag, PostHashtag
+from services.reference_cache import reference_cache
+from services.search_service import hashtag_posts_filter
+from services.analytics_rollups import refresh_rollups_for_posts
+from services.metric_snapshots import record_snapshots
+from services.post_read_model import refresh_read_models
+from services.response_cache import bump_post_versions
 
 logger = logging.getLogger(__name__)
 
+# Nombre de posts par INSERT ... ON CONFLICT
+BULK_UPSERT_BATCH_SIZE = 500
+
+# Colonnes Post acceptées dans `defaults` (les clés inconnues sont ignorées)
+_POST_COLUMNS = {column.name for column in Post.__table__.columns}
+
+# Hashtags dans une caption (lettres/chiffres/_ unicode, comme Instagram et TikTok)
+HASHTAG_PATTERN = re.compile(r"#(\w+)")
+_HASHTAG_MAX_LENGTH = Hashtag.__table__.c.name.type.length
+
 
 def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
     """Parse timestamp ISO 8601 (utilisé par Meta et TikTok)"""
@@ -32,9 +51,25 @@ def ensure_platform(db: Session, name: str) -> Platform:
         platform = Platform(name=name)
         db.add(platform)
         db.flush()
+        reference_cache.remember_on_commit(db, "platform", name, platform.id)
+    else:
+        reference_cache.remember_platform(name, platform.id)
     return platform
 
 
+def get_platform_id(db: Session, name: str) -> Optional[int]:
+    """Résout Platform.name -> id via le cache de référence (None si inconnue)"""
+    return reference_cache.platform_id(db, name)
+
+
+def ensure_platform_id(db: Session, name: str) -> int:
+    """Comme ensure_platform, mais sans requête quand l'id est déjà en cache"""
+    platform_id = reference_cache.platform_id(db, name)
+    if platform_id is None:
+        platform_id = ensure_platform(db, name).id
+    return platform_id
+
+
 def upsert_post(
     db: Session,
     platform_name: str,
@@ -44,7 +79,7 @@ def upsert_post(
     defaults: dict,
 ) -> Post:
     """Upsert un post dans la DB (pattern commun Meta/TikTok)"""
-    platform = ensure_platform(db, platform_name)
+    platform_id = ensure_platform_id(db, platform_name)
     post = (
         db.query(Post)
         .filter(or_(Post.id == external_id, Post.external_id == external_id))
@@ -55,12 +90,12 @@ def upsert_post(
         post = Post(
             id=external_id,
             external_id=external_id,
-            platform_id=platform.id,
+            platform_id=platform_id,
             source=source,
         )
         db.add(post)
 
-    post.platform_id = platform.id
+    post.platform_id = platform_id
     post.external_id = external_id
     post.source = source
     for key, value in defaults.items():
@@ -69,9 +104,296 @@ def upsert_post(
 
     post.api_payload = json.dumps(payload)
     post.last_fetch_at = datetime.utcnow()
+    db.flush()  # SessionLocal est sans autoflush : le post doit être visible pour bump_post_versions
+    bump_post_versions(db, [post.id])
     return post
 
 
+def _legacy_external_ids(db: Session, external_ids: List[str]) -> List[str]:
+    """
+    external_ids dont le post existant n'est connu que par son id (external_id NULL ou
+    différent) : ON CONFLICT (external_id) ne les voit pas et l'INSERT heurterait la clé primaire
+    """
+    legacy: List[str] = []
+    for start in range(0, len(external_ids), BULK_UPSERT_BATCH_SIZE):
+        batch = external_ids[start:start + BULK_UPSERT_BATCH_SIZE]
+        by_id = {
+            post_id
+            for post_id, external_id in db.query(Post.id, Post.external_id).filter(Post.id.in_(batch)).all()
+            if external_id != post_id
+        }
+        if not by_id:
+            continue
+        by_external_id = {
+            external_id
+            for (external_id,) in db.query(Post.external_id).filter(Post.external_id.in_(list(by_id))).all()
+        }
+        legacy.extend(by_id - by_external_id)
+    return legacy
+
+
+def upsert_posts(
+    db: Session,
+    platform_name: str,
+    items: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    Upsert ensembliste d'un lot de posts : un seul INSERT ... ON CONFLICT (external_id)
+    DO UPDATE ... RETURNING par batch de BULK_UPSERT_BATCH_SIZE, au lieu d'un SELECT
+    + add() ORM par post.
+
+    Chaque item : {"external_id": str, "payload": dict, "source": str, "defaults": dict}
+    (mêmes arguments que upsert_post). Comme upsert_post, une valeur None dans
+    defaults ne remplace pas la valeur existante, et un post existant est retrouvé par
+    id ou par external_id (les lignes connues par leur seul id passent par upsert_post).
+
+    Retourne {external_id: row} où row expose id, external_id, author, caption, media_url.
+    Ne touche qu'à posts : ingest_posts y ajoute hashtags, read models, relevés, rollups et ETags.
+    """
+    if not items:
+        return {}
+
+    dialect = db.get_bind().dialect.name
+    if dialect not in ("postgresql", "sqlite"):
+        # Pas d'ON CONFLICT portable : repli sur l'upsert ORM unitaire
+        return {
+            item["external_id"]: upsert_post(
+                db, platform_name, item["external_id"], item.get("payload") or {},
+                item["source"], item.get("defaults") or {},
+            )
+            for item in items
+        }
+
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    platform_id = ensure_platform_id(db, platform_name)
+    now = datetime.utcnow()
+
+    # Dédupliquer par external_id (ON CONFLICT ne peut pas toucher deux fois la même ligne)
+    items_by_external_id: Dict[str, Dict[str, Any]] = {str(item["external_id"]): item for item in items}
+
+    results: Dict[str, Any] = {}
+    for external_id in _legacy_external_ids(db, list(items_by_external_id)):
+        item = items_by_external_id.pop(external_id)
+        results[external_id] = upsert_post(
+            db, platform_name, external_id, item.get("payload") or {}, item["source"], item.get("defaults") or {},
+        )
+    if not items_by_external_id:
+        return results
+
+    rows_by_external_id: Dict[str, Dict[str, Any]] = {}
+    provided_columns = set()
+    for external_id, item in items_by_external_id.items():
+        row = {
+            key: value
+            for key, value in (item.get("defaults") or {}).items()
+            if key in _POST_COLUMNS and key not in ("id", "external_id", "platform_id")
+        }
+        provided_columns.update(row.keys())
+        row.update(
+            id=external_id,
+            external_id=external_id,
+            platform_id=platform_id,
+            source=item["source"],
+            api_payload=json.dumps(item.get("payload") or {}),
+            last_fetch_at=now,
+        )
+        rows_by_external_id[external_id] = row
+
+    # Toutes les lignes d'un VALUES multi-lignes doivent avoir les mêmes colonnes
+    value_columns = provided_columns | {"id", "external_id", "platform_id", "source", "api_payload", "last_fetch_at", "fetched_at"}
+    rows = []
+    for row in rows_by_external_id.values():
+        values = {column: row.get(column) for column in value_columns}
+        if values["fetched_at"] is None:
+            values["fetched_at"] = now
+        rows.append(values)
+
+    for start in range(0, len(rows), BULK_UPSERT_BATCH_SIZE):
+        batch = rows[start:start + BULK_UPSERT_BATCH_SIZE]
+        stmt = insert(Post).values(batch)
+        excluded = stmt.excluded
+        update_set = {
+            "platform_id": excluded.platform_id,
+            "source": excluded.source,
+            "api_payload": excluded.api_payload,
+            "last_fetch_at": excluded.last_fetch_at,
+        }
+        for column in provided_columns:
+            update_set[column] = func.coalesce(getattr(excluded, column), getattr(Post.__table__.c, column))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Post.external_id],
+            set_=update_set,
+        ).returning(Post.id, Post.external_id, Post.author, Post.caption, Post.media_url)
+        for returned in db.execute(stmt).all():
+            results[returned.external_id] = returned
+
+    logger.info(f"Bulk upserted {len(rows)} {platform_name} posts in {(len(rows) - 1) // BULK_UPSERT_BATCH_SIZE + 1} statement(s)")
+    return results
+
+
+def ingest_posts(
+    db: Session,
+    platform_name: str,
+    items: List[Dict[str, Any]],
+    link_hashtags: bool = True,
+    bump_global: bool = True,
+) -> Dict[str, Any]:
+    """
+    Ingestion d'un lot (endpoints live, ingestion planifiée) : upsert_posts puis, dans la même
+    transaction, liens post_hashtags des captions (si link_hashtags), read models, relevés de
+    compteurs, rollups analytics et invalidation des ETags des listes concernées.
+
+    bump_global=False : la liste /posts n'est pas invalidée ici (l'appelant le fait une fois
+    pour tous ses lots, cf. record_round).
+    """
+    results = upsert_posts(db, platform_name, items)
+    if not results:
+        return results
+    db.flush()
+    post_ids = [row.id for row in results.values()]
+    if link_hashtags:
+        link_post_hashtags(
+            db,
+            ensure_platform_id(db, platform_name),
+            {row.id: extract_hashtags(row.caption) for row in results.values()},
+        )
+    refresh_read_models(db, post_ids)
+    if settings.METRICS_SNAPSHOTS_ENABLED:
+        record_snapshots(db, post_ids)
+    if settings.ANALYTICS_ROLLUPS_ON_INGEST:
+        refresh_rollups_for_posts(db, post_ids)
+    bump_post_versions(db, post_ids, include_global=bump_global)
+    return results
+
+
+def extract_hashtags(caption: Optional[str]) -> List[str]:
+    """Hashtags normalisés d'une caption, sans doublon, dans l'ordre d'apparition"""
+    if not caption:
+        return []
+    names: Dict[str, None] = {}
+    for match in HASHTAG_PATTERN.findall(caption):
+        name = normalize_hashtag(match)
+        if name and len(name) <= _HASHTAG_MAX_LENGTH:
+            names[name] = None
+    return list(names)
+
+
+def _conflict_insert(db: Session):
+    """insert() du dialecte supportant ON CONFLICT, ou None"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    return None
+
+
+def ensure_hashtag_ids(db: Session, platform_id: int, names: Iterable[str]) -> Dict[str, int]:
+    """
+    Résout des noms de hashtags (normalisés) en ids, en créant les manquants.
+    Cache de référence d'abord, puis un INSERT ... ON CONFLICT DO NOTHING et un
+    SELECT pour l'ensemble des miss (au lieu d'une requête par nom).
+    """
+    resolved: Dict[str, int] = {}
+    missing: List[str] = []
+    for name in dict.fromkeys(names):
+        hashtag_id = reference_cache.peek_hashtag_id(db, name)
+        if hashtag_id is None:
+            missing.append(name)
+        else:
+            resolved[name] = hashtag_id
+    if not missing:
+        return resolved
+
+    insert = _conflict_insert(db)
+    for start in range(0, len(missing), BULK_UPSERT_BATCH_SIZE):
+        batch = missing[start:start + BULK_UPSERT_BATCH_SIZE]
+        if insert is not None:
+            db.execute(
+                insert(Hashtag)
+                .values([{"name": name, "platform_id": platform_id} for name in batch])
+                .on_conflict_do_nothing(index_elements=[Hashtag.name])
+            )
+        else:
+            existing = {name for (name,) in db.query(Hashtag.name).filter(Hashtag.name.in_(batch))}
+            db.add_all(Hashtag(name=name, platform_id=platform_id) for name in batch if name not in existing)
+            db.flush()
+        rows = db.query(Hashtag.id, Hashtag.name, Hashtag.platform_id).filter(Hashtag.name.in_(batch)).all()
+        for hashtag_id, name, hashtag_platform_id in rows:
+            resolved[name] = hashtag_id
+            reference_cache.remember_on_commit(db, "hashtag", name, hashtag_id, hashtag_platform_id)
+    return resolved
+
+
+def insert_post_hashtag_links(db: Session, pairs: Iterable[Tuple[str, int]]) -> int:
+    """
+    Insère des liens (post_id, hashtag_id) en lot, les liens existants sont ignorés
+    (ON CONFLICT DO NOTHING). Retourne le nombre de liens créés.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    if not pairs:
+        return 0
+
+    insert = _conflict_insert(db)
+    created = 0
+    for start in range(0, len(pairs), BULK_UPSERT_BATCH_SIZE):
+        batch = pairs[start:start + BULK_UPSERT_BATCH_SIZE]
+        if insert is not None:
+            stmt = (
+                insert(PostHashtag)
+                .values([{"post_id": post_id, "hashtag_id": hashtag_id} for post_id, hashtag_id in batch])
+                .on_conflict_do_nothing(index_elements=[PostHashtag.post_id, PostHashtag.hashtag_id])
+                .returning(PostHashtag.id)
+            )
+            created += len(db.execute(stmt).all())
+        else:
+            post_ids = {post_id for post_id, _ in batch}
+            existing = set(
+                db.query(PostHashtag.post_id, PostHashtag.hashtag_id)
+                .filter(PostHashtag.post_id.in_(post_ids))
+                .all()
+            )
+            new_links = [PostHashtag(post_id=p, hashtag_id=h) for p, h in batch if (p, h) not in existing]
+            db.add_all(new_links)
+            db.flush()
+            created += len(new_links)
+    return created
+
+
+def link_post_hashtags(db: Session, platform_id: int, hashtags_by_post: Dict[str, List[str]]) -> int:
+    """Lie chaque post à ses hashtags ({post_id: [noms normalisés]}), crée les hashtags manquants"""
+    names = [name for tags in hashtags_by_post.values() for name in tags]
+    if not names:
+        return 0
+    hashtag_ids = ensure_hashtag_ids(db, platform_id, names)
+    created = insert_post_hashtag_links(
+        db,
+        (
+            (post_id, hashtag_ids[name])
+            for post_id, tags in hashtags_by_post.items()
+            for name in tags
+            if name in hashtag_ids
+        ),
+    )
+    if created:
+        logger.info(f"Linked {created} post/hashtag pairs ({len(set(names))} hashtags)")
+    return created
+
+
+def record_hashtag_scrape(db: Session, platform_id: int, name: str, post_ids: Iterable[str], scraped_at: datetime) -> int:
+    """
+    Lie au hashtag les posts renvoyés par une recherche sur ce hashtag (même si leur caption
+    ne le contient pas) et date son rafraîchissement (Hashtag.last_scraped).
+    Retourne l'id du hashtag.
+    """
+    hashtag_id = ensure_hashtag_ids(db, platform_id, [name])[name]
+    insert_post_hashtag_links(db, ((post_id, hashtag_id) for post_id in post_ids))
+    db.query(Hashtag).filter(Hashtag.id == hashtag_id).update(
+        {Hashtag.last_scraped: scraped_at}, synchronize_session=False,
+    )
+    return hashtag_id
+
+
 def search_posts_by_hashtag(
     db: Session,
     hashtag_name: str,
@@ -94,6 +416,33 @@ def search_posts_by_hashtag(
     
     logger.debug(f"Searching posts with #{normalized_name} (caption + hashtags array)...")
     
+    # Index plein texte (caption + hashtags) si la migration posts_search est appliquée
+    combined_filter = hashtag_posts_filter(db, normalized_name)
+    if combined_filter is None:
+        combined_filter = _hashtag_ilike_filter(normalized_name)
+    
+    query = (
+        db.query(Post)
+        .filter(combined_filter)
+    )
+    
+    # Filtrer par plateforme si spécifié
+    if platform_ids:
+        query = query.filter(Post.platform_id.in_(platform_ids))
+    
+    posts = (
+        query
+        .order_by(Post.posted_at.desc().nullslast(), Post.fetched_at.desc().nullslast())
+        .limit(limit)
+        .all()
+    )
+    
+    logger.info(f"Found {len(posts)} posts matching #{normalized_name}")
+    return posts
+
+
+def _hashtag_ilike_filter(normalized_name: str):
+    """Filtre ILIKE historique (scan séquentiel) utilisé sans index plein texte"""
     # Patterns de recherche flexibles
     search_patterns = [
         f'%#{normalized_name}%',
@@ -123,28 +472,8 @@ def search_posts_by_hashtag(
     # Combiner les deux recherches
     if hashtags_filters:
         hashtags_filter = or_(*hashtags_filters)
-        combined_filter = or_(caption_filter, hashtags_filter)
-    else:
-        combined_filter = caption_filter
-    
-    query = (
-        db.query(Post)
-        .filter(combined_filter)
-    )
-    
-    # Filtrer par plateforme si spécifié
-    if platform_ids:
-        query = query.filter(Post.platform_id.in_(platform_ids))
-    
-    posts = (
-        query
-        .order_by(Post.posted_at.desc().nullslast(), Post.fetched_at.desc().nullslast())
-        .limit(limit)
-        .all()
-    )
-    
-    logger.info(f"Found {len(posts)} posts matching #{normalized_name}")
-    return posts
+        return or_(caption_filter, hashtags_filter)
+    return caption_filter
 
 
 def normalize_hashtag(value: str) -> str:
@@ -157,6 +486,70 @@ def normalize_creator(value: str) -> str:
     return value.strip().lstrip("@").lower()
 
 
+# Segments de permalink Instagram qui ne sont pas un username
+_INSTAGRAM_PATH_KEYWORDS = ("p", "reel", "tv", "stories")
+
+
+def instagram_author(media: Dict[str, Any]) -> Optional[str]:
+    """Auteur d'un média Instagram : username de l'API, sinon extrait du permalink"""
+    author = media.get("username")
+    if not author:
+        permalink = media.get("permalink")
+        if permalink:
+            # Format: https://www.instagram.com/p/{code}/ ou https://www.instagram.com/{username}/p/{code}/
+            permalink_match = re.search(r'instagram\.com/([^/]+)/', permalink)
+            if permalink_match and permalink_match.group(1) not in _INSTAGRAM_PATH_KEYWORDS:
+                author = permalink_match.group(1)
+    return author
+
+
+def instagram_media_item(media: Dict[str, Any], source: str) -> Dict[str, Any]:
+    """Média de la Graph API Instagram -> item de upsert_posts"""
+    return {
+        "external_id": media["id"],
+        "payload": media,
+        "source": source,
+        "defaults": {
+            "author": instagram_author(media),
+            "caption": media.get("caption", ""),
+            "media_url": media.get("media_url"),
+            "posted_at": parse_timestamp(media.get("timestamp")),
+            "metrics": json.dumps({
+                "likes": media.get("like_count", 0),
+                "comments": media.get("comments_count", 0),
+                "like_count": media.get("like_count", 0),  # Ajouter aussi pour compatibilité
+                "comment_count": media.get("comments_count", 0),  # Ajouter aussi pour compatibilité
+            }),
+        },
+    }
+
+
+def tiktok_video_item(video: Dict[str, Any], source: str, owner_id: Optional[str] = None) -> Dict[str, Any]:
+    """Vidéo de l'API TikTok (video/list) -> item de upsert_posts ; owner_id : open_id du compte connecté"""
+    video_id = video["id"]
+    metrics = {
+        "like_count": video.get("like_count"),
+        "comment_count": video.get("comment_count"),
+        "share_count": video.get("share_count"),
+        "view_count": video.get("view_count"),
+    }
+    return {
+        "external_id": str(video_id),
+        "payload": video,
+        "source": source,
+        "defaults": {
+            "author": video.get("creator_username") or video.get("creator_display_name"),
+            "caption": video.get("title") or video.get("video_description"),
+            "media_url": video.get("cover_image_url") or video.get("thumbnail_url"),
+            "permalink": video.get("share_url") or f"https://www.tiktok.com/@{(video.get('creator_username') or 'user')}/video/{video_id}",
+            "posted_at": parse_timestamp(video.get("create_time")),
+            "metrics": json.dumps(metrics),
+            "fetched_at": datetime.utcnow(),
+            "owner_id": owner_id,
+        },
+    }
+
+
 def load_post_payload(post: Post) -> Dict[str, dict]:
     """
     Charge et parse api_payload et metrics depuis un Post.
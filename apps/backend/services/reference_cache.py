@@ -0,0 +1,202 @@
+# services/reference_cache.py
+# Cache mémoire des données de référence (Platform.name -> id, Hashtag.name -> id)
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from db.models import Hashtag, Platform
+from services.response_cache import REFERENCE_SCOPE, bump_content_versions, content_versions
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "reference_cache_pending"
+
+
+class ReferenceCache:
+    """
+    Résolution nom -> id des plateformes et hashtags sans requête SQL.
+
+    - chargé au démarrage (load), puis complété à la demande sur un miss
+    - write-through : les créations passent par remember_on_commit (appliqué au commit)
+    - copie par process : un renommage ou une suppression appelle publish_change, qui
+      incrémente la version partagée (content_versions, périmètre REFERENCE_SCOPE) ;
+      les autres workers la relisent au plus toutes les REFERENCE_CACHE_CHECK_SECONDS
+      et se vident s'ils ne sont plus à jour
+
+    Les absences ne sont pas mémorisées : une ligne créée par un autre worker
+    sera trouvée au prochain lookup.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._platforms: Dict[str, int] = {}
+        self._hashtags: Dict[str, Tuple[int, int]] = {}  # name -> (id, platform_id)
+        self.version = 0  # version partagée du contenu en cache
+        self._checked_at = 0.0
+        self.loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, db: Session) -> None:
+        """Charge toutes les plateformes et tous les hashtags (tables petites et quasi statiques)"""
+        version = content_versions(db, [REFERENCE_SCOPE])[REFERENCE_SCOPE]
+        platforms = {name: platform_id for platform_id, name in db.query(Platform.id, Platform.name).all()}
+        hashtags = {
+            name: (hashtag_id, platform_id)
+            for hashtag_id, name, platform_id in db.query(Hashtag.id, Hashtag.name, Hashtag.platform_id).all()
+        }
+        with self._lock:
+            self._platforms = platforms
+            self._hashtags = hashtags
+            self.version = version
+            self._checked_at = time.monotonic()
+            self.loaded = True
+        logger.info(f"Reference cache loaded: {len(platforms)} platforms, {len(hashtags)} hashtags (v{version})")
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._platforms.clear()
+            self._hashtags.clear()
+            self.loaded = False
+        logger.info(f"Reference cache invalidated (v{self.version})")
+
+    def publish_change(self, db: Session) -> None:
+        """Renommage / suppression : version partagée incrémentée dans la transaction courante"""
+        bump_content_versions(db, [REFERENCE_SCOPE])
+
+    def _check_version(self, db: Session) -> None:
+        """Vide la copie locale si un autre worker a publié une modification depuis"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < settings.REFERENCE_CACHE_CHECK_SECONDS:
+                return
+            self._checked_at = now
+        version = content_versions(db, [REFERENCE_SCOPE])[REFERENCE_SCOPE]
+        with self._lock:
+            if version == self.version:
+                return
+            self._platforms.clear()
+            self._hashtags.clear()
+            self.version = version
+            self.loaded = False
+        logger.info(f"Reference cache cleared: shared version is now v{version}")
+
+    def _lookup(self, mapping: Dict[str, Any], name: str) -> Any:
+        with self._lock:
+            value = mapping.get(name)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    # ---- Platforms ----
+
+    def platform_id(self, db: Session, name: str) -> Optional[int]:
+        self._check_version(db)
+        platform_id = self._lookup(self._platforms, name)
+        if platform_id is not None:
+            return platform_id
+        row = db.query(Platform.id).filter(Platform.name == name).first()
+        if row is None:
+            return None
+        self.remember_platform(name, row[0])
+        return row[0]
+
+    def platform_ids(self, db: Session, names: Iterable[str]) -> List[int]:
+        ids = []
+        for name in names:
+            platform_id = self.platform_id(db, name)
+            if platform_id is not None:
+                ids.append(platform_id)
+        return ids
+
+    def remember_platform(self, name: str, platform_id: int) -> None:
+        with self._lock:
+            self._platforms[name] = platform_id
+
+    def forget_platform(self, platform_id: int) -> None:
+        with self._lock:
+            for name in [n for n, pid in self._platforms.items() if pid == platform_id]:
+                del self._platforms[name]
+
+    # ---- Hashtags ----
+
+    def hashtag(self, db: Session, name: str) -> Optional[Tuple[int, int]]:
+        """Retourne (hashtag_id, platform_id) ou None"""
+        self._check_version(db)
+        entry = self._lookup(self._hashtags, name)
+        if entry is not None:
+            return entry
+        row = db.query(Hashtag.id, Hashtag.platform_id).filter(Hashtag.name == name).first()
+        if row is None:
+            return None
+        self.remember_hashtag(name, row[0], row[1])
+        return row[0], row[1]
+
+    def peek_hashtag_id(self, db: Session, name: str) -> Optional[int]:
+        """Lookup sans repli DB (les lots résolvent leurs miss en une seule requête)"""
+        self._check_version(db)
+        entry = self._lookup(self._hashtags, name)
+        return entry[0] if entry is not None else None
+
+    def hashtag_id(self, db: Session, name: str) -> Optional[int]:
+        entry = self.hashtag(db, name)
+        return entry[0] if entry else None
+
+    def remember_hashtag(self, name: str, hashtag_id: int, platform_id: int) -> None:
+        with self._lock:
+            self._hashtags[name] = (hashtag_id, platform_id)
+
+    def forget_hashtag(self, hashtag_id: int) -> None:
+        with self._lock:
+            for name in [n for n, (hid, _) in self._hashtags.items() if hid == hashtag_id]:
+                del self._hashtags[name]
+
+    # ---- Write-through transactionnel ----
+
+    def remember_on_commit(self, db: Session, kind: str, name: str, *ids: int) -> None:
+        """
+        Enregistre une création faite dans la transaction courante : appliquée
+        au cache seulement après commit (un rollback ne laisse pas d'id fantôme).
+        """
+        db.info.setdefault(_PENDING_KEY, []).append((kind, name, ids))
+
+    def _apply_pending(self, db: Session) -> None:
+        for kind, name, ids in db.info.pop(_PENDING_KEY, []):
+            if kind == "platform":
+                self.remember_platform(name, *ids)
+            elif kind == "hashtag":
+                self.remember_hashtag(name, *ids)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "version": self.version,
+                "loaded": self.loaded,
+                "platforms": len(self._platforms),
+                "hashtags": len(self._hashtags),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Instance globale (chargée au démarrage par app.py)
+reference_cache = ReferenceCache()
+
+
+@event.listens_for(Session, "after_commit")
+def _reference_cache_after_commit(session: Session) -> None:
+    if session.info.get(_PENDING_KEY):
+        reference_cache._apply_pending(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _reference_cache_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,209 @@
+# services/response_cache.py
+# Cache des réponses des dashboards : ETag fort dérivé de versions de contenu (table
+# content_versions) + LRU optionnel des réponses sérialisées
+#
+# Les versions sont incrémentées dans la transaction qui modifie les données (ingestion,
+# CRUD des posts, hashtags / créateurs d'un projet, scoring) : un 304 reste exact entre workers.
+
+import hashlib
+import logging
+from datetime import datetime
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.responses import dumps
+from db.models import ContentVersion, Post, PostHashtag, ProjectCreator, ProjectHashtag
+from services.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Périmètres versionnés
+POSTS_SCOPE = "posts"  # liste globale /posts
+TREND_SCOPE = "trend_scores"  # recalcul des score_trend (tous les posts)
+REFERENCE_SCOPE = "reference"  # plateformes / hashtags renommés ou supprimés (cache de référence)
+USERS_SCOPE = "users"  # email / rôle / activation modifiés ou utilisateur supprimé (cache d'auth)
+
+# Nombre de post_ids par requête de résolution des projets impactés
+_BUMP_BATCH_SIZE = 500
+
+# Les navigateurs revalident à chaque poll (If-None-Match) ; jamais de cache partagé
+_CACHE_CONTROL = "private, no-cache"
+
+response_cache: Optional[TTLCache] = (
+    TTLCache("responses", max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES, default_ttl=settings.RESPONSE_CACHE_TTL)
+    if settings.RESPONSE_CACHE_MAX_ENTRIES > 0
+    else None
+)
+not_modified_count = 0
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+def project_scope(project_id: Any) -> str:
+    return f"project:{project_id}"
+
+
+# ---- Versions ----
+
+def bump_content_versions(db: Session, scopes: Iterable[str]) -> None:
+    """Incrémente les versions (créées à 1 si absentes), dans la transaction courante"""
+    scopes = sorted(set(scopes))  # ordre fixe : pas d'interblocage entre transactions concurrentes
+    if not scopes:
+        return
+
+    now = datetime.utcnow()
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert if dialect == "sqlite" else None
+    if insert is not None:
+        stmt = insert(ContentVersion).values([{"scope": scope, "version": 1, "updated_at": now} for scope in scopes])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ContentVersion.scope],
+            set_={"version": ContentVersion.version + 1, "updated_at": stmt.excluded.updated_at},
+        )
+        db.execute(stmt)
+        return
+
+    for scope in scopes:
+        row = db.get(ContentVersion, scope)
+        if row is None:
+            db.add(ContentVersion(scope=scope, version=1, updated_at=now))
+        else:
+            row.version = ContentVersion.version + 1
+            row.updated_at = now
+    db.flush()
+
+
+def bump_post_versions(db: Session, post_ids: Iterable[str], include_global: bool = True) -> None:
+    """
+    Invalide la liste /posts et les projets contenant ces posts (via leurs hashtags
+    ou leur author). À appeler après l'écriture des posts et de leurs post_hashtags.
+
+    include_global=False : projets seulement. La ligne POSTS_SCOPE est unique : l'ingestion
+    planifiée l'incrémente une fois par passe (record_round) au lieu de sérialiser ses jobs dessus.
+    """
+    post_ids = list(dict.fromkeys(post_ids))
+    if not post_ids:
+        return
+
+    project_ids = set()
+    for start in range(0, len(post_ids), _BUMP_BATCH_SIZE):
+        batch = post_ids[start:start + _BUMP_BATCH_SIZE]
+        by_hashtag = (
+            db.query(ProjectHashtag.project_id)
+            .join(PostHashtag, PostHashtag.hashtag_id == ProjectHashtag.hashtag_id)
+            .filter(PostHashtag.post_id.in_(batch))
+        )
+        by_creator = (
+            db.query(ProjectCreator.project_id)
+            .join(Post, Post.author == ProjectCreator.creator_username)
+            .filter(Post.id.in_(batch))
+        )
+        project_ids.update(project_id for (project_id,) in by_hashtag.union(by_creator).all())
+
+    scopes = [project_scope(project_id) for project_id in project_ids]
+    bump_content_versions(db, [POSTS_SCOPE, *scopes] if include_global else scopes)
+
+
+def bump_hashtag_versions(db: Session, hashtag_ids: Iterable[int]) -> None:
+    """Invalide les projets qui suivent ces hashtags (suppression / fusion d'un hashtag)"""
+    hashtag_ids = list(hashtag_ids)
+    if not hashtag_ids:
+        return
+    project_ids = [
+        project_id
+        for (project_id,) in db.query(ProjectHashtag.project_id)
+        .filter(ProjectHashtag.hashtag_id.in_(hashtag_ids))
+        .distinct()
+        .all()
+    ]
+    bump_content_versions(db, [POSTS_SCOPE, *(project_scope(project_id) for project_id in project_ids)])
+
+
+def content_versions(db: Session, scopes: List[str]) -> Dict[str, int]:
+    """Versions courantes (0 pour un périmètre jamais modifié), en une requête"""
+    rows = db.query(ContentVersion.scope, ContentVersion.version).filter(ContentVersion.scope.in_(scopes)).all()
+    versions = {scope: 0 for scope in scopes}
+    versions.update({scope: int(version) for scope, version in rows})
+    return versions
+
+
+def make_etag(*parts: Any) -> str:
+    """ETag fort : empreinte des versions et des paramètres qui déterminent la réponse"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def scopes_etag(db: Session, scopes: List[str], *params: Any) -> str:
+    versions = content_versions(db, scopes)
+    return make_etag(*(f"{scope}={versions[scope]}" for scope in scopes), *params)
+
+
+# ---- Réponses conditionnelles ----
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def cached_response(request: Request, cache_key: Hashable, etag: str) -> Optional[Response]:
+    """
+    304 si le client a déjà cette version, sinon la réponse sérialisée du LRU si
+    elle correspond à l'ETag courant. None = la réponse doit être recalculée.
+    """
+    global not_modified_count
+
+    if _etag_matches(request, etag):
+        not_modified_count += 1
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": _CACHE_CONTROL})
+    if response_cache is None:
+        return None
+    entry = response_cache.get(cache_key)
+    if entry is None or entry[0] != etag:
+        return None
+    _, body, headers = entry
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def etag_json_response(
+    cache_key: Hashable,
+    etag: str,
+    response_model: Any,
+    content: Any,
+    headers: Optional[Dict[str, str]] = None,
+    prevalidated: bool = False,
+) -> Response:
+    """
+    Valide et sérialise `content` selon response_model, met le corps en cache et pose l'ETag.
+    prevalidated : `content` est déjà projeté sur le schéma (core.responses.SchemaRows),
+    sérialisé directement par orjson sans construire les modèles.
+    """
+    if prevalidated:
+        body = dumps(content)
+    else:
+        adapter = _adapters.get(response_model)
+        if adapter is None:
+            adapter = _adapters[response_model] = TypeAdapter(response_model)
+        body = adapter.dump_json(adapter.validate_python(content, from_attributes=True), by_alias=True)
+
+    headers = {**(headers or {}), "ETag": etag, "Cache-Control": _CACHE_CONTROL}
+    if response_cache is not None:
+        response_cache.set(cache_key, (etag, body, headers))
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        "not_modified": not_modified_count,
+        "lru": response_cache.stats() if response_cache is not None else None,
+    }
@@ -0,0 +1,134 @@
+# services/search_service.py
+# Recherche plein texte des posts et hashtags (PostgreSQL tsvector + pg_trgm, repli ILIKE)
+
+import logging
+import re
+from typing import List, Optional
+
+from sqlalchemy import func, inspect, literal, literal_column, or_
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from db.models import Hashtag, Post
+
+logger = logging.getLogger(__name__)
+
+# Colonne posts.search_vector (créée par la migration posts_search, absente du modèle
+# pour que create_all reste compatible SQLite)
+search_vector = literal_column("posts.search_vector", TSVECTOR)
+
+# pg_trgm n'indexe pas les motifs de moins de 3 caractères
+TRIGRAM_MIN_LENGTH = 3
+
+_search_index_available: Optional[bool] = None
+
+
+def search_index_available(db: Session) -> bool:
+    """True si la base est PostgreSQL et que la migration posts_search est appliquée (résultat mémorisé)"""
+    global _search_index_available
+    if _search_index_available is None:
+        bind = db.get_bind()
+        if bind.dialect.name != "postgresql":
+            _search_index_available = False
+        else:
+            columns = {col["name"] for col in inspect(bind).get_columns("posts")}
+            _search_index_available = "search_vector" in columns
+            if not _search_index_available:
+                logger.warning("posts.search_vector absent (migration posts_search non appliquée) - recherche en ILIKE")
+    return _search_index_available
+
+
+def build_prefix_tsquery(text_query: str) -> Optional[str]:
+    """
+    Construit une requête to_tsquery préfixée à partir d'une saisie libre :
+    "street fash" -> "street:* & fash:*". Retourne None si aucun mot exploitable.
+    """
+    terms = re.findall(r"\w+", text_query.lower())
+    if not terms:
+        return None
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def search_posts(
+    db: Session,
+    q: str,
+    platform_id: Optional[int] = None,
+    min_score: Optional[float] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> List[Post]:
+    """
+    Recherche de posts classée par pertinence.
+
+    - PostgreSQL : search_vector @@ tsquery préfixée (index GIN) OU caption ILIKE
+      (index trigramme) pour les sous-chaînes ; score = ts_rank pondéré par score_trend
+    - Autres bases / migration absente : caption ILIKE, tri par score_trend
+    """
+    query = db.query(Post)
+    if platform_id is not None:
+        query = query.filter(Post.platform_id == platform_id)
+    if min_score is not None:
+        query = query.filter(Post.score >= min_score)
+
+    tsquery_text = build_prefix_tsquery(q)
+    if not search_index_available(db) or tsquery_text is None:
+        return (
+            query.filter(Post.caption.ilike(f"%{q}%"))
+            .order_by(Post.score_trend.desc(), Post.posted_at.desc())
+            .offset(offset)
+            .limit(limit)
+            .all()
+        )
+
+    tsquery = func.to_tsquery("simple", tsquery_text)
+    match = search_vector.op("@@")(tsquery)
+    if len(q.strip()) >= TRIGRAM_MIN_LENGTH:
+        match = or_(match, Post.caption.ilike(f"%{q.strip()}%"))
+
+    # ts_rank (normalisé par la longueur du document) x bonus de tendance logarithmique
+    relevance = func.ts_rank(search_vector, tsquery, 1) * (
+        1 + settings.SEARCH_TREND_WEIGHT * func.ln(1 + func.greatest(func.coalesce(Post.score_trend, 0), 0))
+    )
+    return (
+        query.filter(match)
+        .order_by(relevance.desc(), Post.posted_at.desc().nullslast())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+
+
+def hashtag_posts_filter(db: Session, normalized_name: str):
+    """
+    Filtre SQL "le post contient ce hashtag" (caption ou colonne hashtags) via l'index
+    plein texte, ou None si indisponible (l'appelant garde son filtre ILIKE).
+    """
+    if not search_index_available(db):
+        return None
+    tsquery_text = build_prefix_tsquery(normalized_name)
+    if tsquery_text is None:
+        return None
+    return search_vector.op("@@")(func.to_tsquery("simple", tsquery_text))
+
+
+def search_hashtags(
+    db: Session,
+    q: str,
+    platform_id: Optional[int] = None,
+    limit: int = 20,
+) -> List[Hashtag]:
+    """Recherche de hashtags par préfixe / sous-chaîne, classée par similarité trigramme"""
+    term = q.strip().lstrip("#").lower()
+    query = db.query(Hashtag)
+    if platform_id is not None:
+        query = query.filter(Hashtag.platform_id == platform_id)
+    query = query.filter(Hashtag.name.ilike(f"%{term}%"))
+
+    if search_index_available(db):
+        # Préfixe exact d'abord, puis similarité (index ix_hashtags_name_trgm)
+        is_prefix = Hashtag.name.ilike(f"{term}%")
+        query = query.order_by(is_prefix.desc(), func.similarity(Hashtag.name, literal(term)).desc(), Hashtag.name)
+    else:
+        query = query.order_by(Hashtag.name)
+    return query.limit(limit).all()
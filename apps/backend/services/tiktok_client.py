@@ -6,6 +6,7 @@ import httpx  # type: ignore
 from fastapi import HTTPException, status
 
 from core.config import settings
+from services.http_client import get_http_client, request_timeout
 
 logger = logging.getLogger(__name__)
 
@@ -74,14 +75,15 @@ async def call_tiktok(
 
     start = time.perf_counter()
     try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.request(
-                method=method_upper,
-                url=url,
-                params=query,
-                json=data,
-                headers=headers,
-            )
+        client = get_http_client("tiktok")
+        response = await client.request(
+            method=method_upper,
+            url=url,
+            params=query,
+            json=data,
+            headers=headers,
+            timeout=request_timeout(timeout),
+        )
     except httpx.RequestError as exc:
         duration = time.perf_counter() - start
         logger.error(
@@ -0,0 +1,285 @@
+# services/trend_scoring.py
+# Moteur de scoring des tendances : calcule Post.score_trend en lot (NumPy vectorisé)
+#
+# CLI : python -m services.trend_scoring [--window-days 7] [--batch-size 5000]
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import Float, Text, bindparam, column, func, or_, update, values
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from db.models import Post
+from services.advisory_locks import TREND_SCORING_LOCK, acquire_advisory_lock, release_advisory_lock
+from services.analytics_rollups import refresh_recent_rollups
+from services.metric_snapshots import previous_snapshots
+from services.response_cache import TREND_SCOPE, bump_content_versions
+
+logger = logging.getLogger(__name__)
+
+# Poids de l'engagement (un partage vaut plus qu'un like)
+LIKE_WEIGHT = 1.0
+COMMENT_WEIGHT = 2.0
+SHARE_WEIGHT = 3.0
+VIEW_WEIGHT = 0.01
+
+ENGAGEMENT_WEIGHTS = np.array([LIKE_WEIGHT, COMMENT_WEIGHT, SHARE_WEIGHT, VIEW_WEIGHT])
+
+# Âge minimum pris en compte (évite l'explosion de la vélocité des posts très récents)
+MIN_AGE_HOURS = 1.0
+
+# Clés de metrics selon la source (Meta : likes/comments, TikTok : *_count)
+_METRIC_KEYS = {
+    "likes": ("like_count", "likes"),
+    "comments": ("comment_count", "comments_count", "comments"),
+    "shares": ("share_count", "shares"),
+    "views": ("view_count", "views", "play_count"),
+}
+
+
+def _metric_value(metrics: Dict[str, Any], keys: Sequence[str]) -> float:
+    for key in keys:
+        value = metrics.get(key)
+        if value is not None:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return 0.0
+    return 0.0
+
+
+def metrics_matrix(raw_metrics: Sequence[Optional[str]]) -> np.ndarray:
+    """Parse les snapshots JSON (colonne metrics) en matrice (n, 4) : likes, comments, shares, views"""
+    matrix = np.zeros((len(raw_metrics), 4), dtype=np.float64)
+    for row, raw in enumerate(raw_metrics):
+        if not raw:
+            continue
+        try:
+            metrics = json.loads(raw)
+        except (TypeError, ValueError):
+            continue
+        if not isinstance(metrics, dict):
+            continue
+        for col, keys in enumerate(_METRIC_KEYS.values()):
+            matrix[row, col] = _metric_value(metrics, keys)
+    return matrix
+
+
+def compute_trend_scores(
+    metrics: np.ndarray,
+    age_hours: np.ndarray,
+    half_life_hours: float,
+    previous_engagement: Optional[np.ndarray] = None,
+    previous_age_hours: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Scores de tendance vectorisés.
+
+    - engagement pondéré = likes + 2·comments + 3·shares + 0.01·views
+    - vélocité = engagement / âge (h), ou delta d'engagement / delta de temps si un
+      snapshot précédent est fourni (NaN = pas de snapshot précédent pour ce post)
+    - score = log1p(vélocité) · 2^(-âge / demi-vie) · 10
+    """
+    engagement = np.clip(metrics, 0, None) @ ENGAGEMENT_WEIGHTS
+    age = np.maximum(age_hours, MIN_AGE_HOURS)
+
+    velocity = engagement / age
+    if previous_engagement is not None and previous_age_hours is not None:
+        elapsed = age - previous_age_hours
+        has_previous = ~np.isnan(previous_engagement) & (elapsed > 0)
+        delta = np.clip(engagement - np.nan_to_num(previous_engagement), 0, None)
+        velocity = np.where(has_previous, delta / np.where(elapsed > 0, elapsed, 1.0), velocity)
+
+    decay = np.exp2(-age / half_life_hours)
+    return np.round(np.log1p(velocity) * decay * 10.0, 4)
+
+
+def _epoch(value: datetime) -> float:
+    """Timestamp POSIX ; les datetimes naïfs de la DB sont en UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _previous_engagement(
+    db: Session,
+    ids: List[str],
+    timestamps: np.ndarray,
+    now: datetime,
+    cutoff: datetime,
+):
+    """
+    Engagement pondéré et âge (h) de chaque post à son dernier relevé vieux d'au moins
+    TREND_VELOCITY_LOOKBACK_HOURS (post_metric_snapshots) ; NaN sans relevé.
+    """
+    lookback_hours = settings.TREND_VELOCITY_LOOKBACK_HOURS
+    if lookback_hours <= 0 or not settings.METRICS_SNAPSHOTS_ENABLED:
+        return None, None
+
+    snapshots = previous_snapshots(db, ids, before=now - timedelta(hours=lookback_hours), not_before=cutoff)
+    previous_engagement = np.full(len(ids), np.nan)
+    previous_age_hours = np.zeros(len(ids))
+    positions = {post_id: index for index, post_id in enumerate(ids)}
+    found = [(positions[post_id], *snapshot) for post_id, snapshot in snapshots.items() if post_id in positions]
+    if not found:
+        return previous_engagement, previous_age_hours
+
+    indexes, captured_at, counters = zip(*found)
+    indexes = np.asarray(indexes, dtype=np.intp)
+    # Matrice (n, 4) des compteurs (None -> 0) et vecteur des dates de relevé (UTC naïf, en s)
+    counter_matrix = np.nan_to_num(np.array(counters, dtype=np.float64))
+    captured_epoch = np.array(captured_at, dtype="datetime64[us]").astype(np.int64) / 1e6
+    previous_engagement[indexes] = counter_matrix @ ENGAGEMENT_WEIGHTS
+    previous_age_hours[indexes] = (captured_epoch - timestamps[indexes]) / 3600.0
+    return previous_engagement, previous_age_hours
+
+
+def _write_scores(db: Session, ids: List[str], scores: np.ndarray) -> None:
+    """UPDATE ... FROM (VALUES ...) en une requête par chunk (executemany hors PostgreSQL)"""
+    rows = list(zip(ids, scores.tolist()))
+    if db.get_bind().dialect.name == "postgresql":
+        scored = values(column("id", Text), column("score", Float), name="scored").data(rows)
+        db.execute(
+            update(Post)
+            .where(Post.id == scored.c.id)
+            .values(score_trend=scored.c.score),
+            execution_options={"synchronize_session": False},
+        )
+    else:
+        db.execute(
+            update(Post.__table__)
+            .where(Post.__table__.c.id == bindparam("post_id"))
+            .values(score_trend=bindparam("new_score")),
+            [{"post_id": post_id, "new_score": score} for post_id, score in rows],
+        )
+
+
+def run_trend_scoring(
+    db: Session,
+    window_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    half_life_hours: Optional[float] = None,
+    now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Recalcule score_trend des posts récents (fenêtre window_days) par chunks de batch_size,
+    puis remet à 0 les posts sortis de la fenêtre. Commit par chunk. La vélocité est le delta
+    depuis le relevé précédent (post_metric_snapshots) quand il existe.
+    """
+    window_days = window_days or settings.TREND_WINDOW_DAYS
+    batch_size = batch_size or settings.TREND_BATCH_SIZE
+    half_life_hours = half_life_hours or settings.TREND_HALF_LIFE_HOURS
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=window_days)
+    reference_time = func.coalesce(Post.posted_at, Post.fetched_at)
+
+    started = time.perf_counter()
+    scored = 0
+    last_id: Optional[str] = None
+    while True:
+        # Pagination par clé sur id (clé primaire) : chaque chunk reprend après le dernier id au lieu
+        # d'un OFFSET ; le filtre sur coalesce(posted_at, fetched_at) n'a pas d'index et s'évalue ligne à ligne
+        query = (
+            db.query(Post.id, Post.posted_at, Post.fetched_at, Post.metrics)
+            .filter(reference_time >= cutoff)
+            .order_by(Post.id)
+        )
+        if last_id is not None:
+            query = query.filter(Post.id > last_id)
+        rows = query.limit(batch_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        ids = [row.id for row in rows]
+        timestamps = np.array(
+            [_epoch(row.posted_at or row.fetched_at or now) for row in rows],
+            dtype=np.float64,
+        )
+        age_hours = (_epoch(now) - timestamps) / 3600.0
+        previous_engagement, previous_age_hours = _previous_engagement(db, ids, timestamps, now, cutoff)
+        scores = compute_trend_scores(
+            metrics_matrix([row.metrics for row in rows]), age_hours, half_life_hours,
+            previous_engagement, previous_age_hours,
+        )
+
+        _write_scores(db, ids, scores)
+        db.commit()
+        scored += len(rows)
+
+    # Les posts sortis de la fenêtre ne sont plus tendance
+    expired = db.execute(
+        update(Post.__table__)
+        .where(or_(reference_time < cutoff, reference_time.is_(None)))
+        .where(Post.__table__.c.score_trend != 0)
+        .values(score_trend=0)
+    ).rowcount
+    # Les scores ont changé : rollups analytics de la fenêtre et ETags de /posts et des projets
+    refresh_recent_rollups(db, window_days, today=now.date())
+    bump_content_versions(db, [TREND_SCOPE])
+    db.commit()
+
+    elapsed = time.perf_counter() - started
+    result = {
+        "scored": scored,
+        "expired": expired,
+        "seconds": round(elapsed, 3),
+        "posts_per_second": round(scored / elapsed, 1) if elapsed > 0 else None,
+    }
+    logger.info(f"Trend scoring: {result}")
+    return result
+
+
+async def trend_scoring_loop() -> None:
+    """Tâche planifiée (démarrée par app.py) : recalcul toutes les TREND_SCORING_INTERVAL_MINUTES"""
+    from db.base import SessionLocal
+
+    interval = settings.TREND_SCORING_INTERVAL_MINUTES * 60
+    while True:
+        await asyncio.sleep(interval)
+        lock = None
+        db = SessionLocal()
+        try:
+            # Chaque worker démarre la boucle : un seul recalcul par intervalle
+            lock = await asyncio.to_thread(acquire_advisory_lock, TREND_SCORING_LOCK)
+            if lock is None:
+                logger.info("Trend scoring skipped: another worker holds the lock")
+                continue
+            await asyncio.to_thread(run_trend_scoring, db)
+        except Exception as e:
+            logger.exception(f"Trend scoring failed: {e}")
+            db.rollback()
+        finally:
+            db.close()
+            if lock is not None:
+                await asyncio.to_thread(release_advisory_lock, lock, TREND_SCORING_LOCK)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Recalcule Post.score_trend pour les posts récents")
+    parser.add_argument("--window-days", type=int, default=None, help="Fenêtre des posts scorés (jours)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Posts par chunk")
+    parser.add_argument("--half-life-hours", type=float, default=None, help="Demi-vie de la décroissance")
+    args = parser.parse_args(argv)
+
+    from db.base import SessionLocal
+
+    db = SessionLocal()
+    try:
+        result = run_trend_scoring(db, args.window_days, args.batch_size, args.half_life_hours)
+    finally:
+        db.close()
+    print(json.dumps(result))
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
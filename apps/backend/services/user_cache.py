@@ -0,0 +1,166 @@
+# services/user_cache.py
+# Cache des utilisateurs authentifiés : token JWT -> snapshot des colonnes d'identité du User
+# (évite jwt.decode + SELECT users sur chaque requête authentifiée)
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from core.config import settings
+from db.models import User
+from services.response_cache import USERS_SCOPE, bump_content_versions, content_versions
+from services.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "user_cache_pending"
+_PUBLISH_KEY = "user_cache_publish"
+
+# Colonnes mises en cache : identité et droits (jamais password_hash)
+_CACHED_COLUMNS = ("id", "email", "name", "role", "is_active", "created_at")
+# Modifications à propager aux autres workers (version partagée)
+_SHARED_COLUMNS = ("email", "role", "is_active")
+
+
+class UserCache:
+    """
+    Snapshots d'utilisateurs par token, TTL court (borné par l'expiration du token).
+
+    - un snapshot ne contient que _CACHED_COLUMNS ; get le rattache à la session de la
+      requête (merge load=False, sans SELECT) : relations et autres colonnes se chargent
+      à la demande, les modifications sont persistées au commit de la requête
+    - invalidation par utilisateur dans le process (update, suppression) via un compteur
+      de génération : une entrée lue avant l'invalidation n'est plus servie, même si
+      elle est écrite après
+    - entre workers : un changement d'email, de rôle, d'activation ou une suppression
+      incrémente la version partagée (content_versions, périmètre USERS_SCOPE), relue au
+      plus toutes les AUTH_USER_CACHE_CHECK_SECONDS ; les autres modifications restent
+      servies au plus TTL secondes par les autres workers
+    """
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self.ttl = ttl
+        self._entries = TTLCache("auth_users", max_entries=max_entries, default_ttl=ttl)
+        self._generations: Dict[Any, int] = {}
+        self._lock = threading.Lock()
+        self.version = 0  # version partagée du contenu en cache
+        self._checked_at = 0.0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def generation(self, user_id: Any) -> int:
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def _check_version(self, db: Session) -> None:
+        """Vide le cache si un autre worker a publié une modification depuis"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < settings.AUTH_USER_CACHE_CHECK_SECONDS:
+                return
+            self._checked_at = now
+        version = content_versions(db, [USERS_SCOPE])[USERS_SCOPE]
+        with self._lock:
+            if version == self.version:
+                return
+            self.version = version
+        self._entries.clear()
+        logger.info(f"User cache cleared: shared version is now v{version}")
+
+    def get(self, db: Session, token: Hashable) -> Optional[User]:
+        self._check_version(db)
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        user_id, generation, snapshot = entry
+        if generation != self.generation(user_id):
+            self._entries.delete(token)
+            return None
+        user = User(**snapshot)
+        make_transient_to_detached(user)  # colonnes absentes du snapshot : chargées à l'accès
+        return db.merge(user, load=False)
+
+    def set(self, token: Hashable, user: User, generation: int, expires_at: Optional[float] = None) -> None:
+        """generation : valeur lue AVANT le SELECT de l'utilisateur"""
+        ttl = self.ttl
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        if ttl <= 0:
+            return
+        snapshot = {key: getattr(user, key) for key in _CACHED_COLUMNS}
+        self._entries.set(token, (user.id, generation, snapshot), ttl=ttl)
+
+    def invalidate_user(self, user_id: Any) -> None:
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._entries.stats(),
+            "ttl": self.ttl,
+            "version": self.version,
+            "invalidations": self.invalidations,
+        }
+
+
+user_cache = UserCache(
+    max_entries=settings.AUTH_USER_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_USER_CACHE_TTL,
+)
+
+
+# Toute modification / suppression d'un User invalide ses snapshots au commit
+
+def _mark_user_changed(mapper, connection, target: User) -> None:
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(target.id)
+
+
+def _mark_user_updated(mapper, connection, target: User) -> None:
+    _mark_user_changed(mapper, connection, target)
+    state = inspect(target)
+    session = Session.object_session(target)
+    if session is not None and any(state.attrs[key].history.has_changes() for key in _SHARED_COLUMNS):
+        session.info[_PUBLISH_KEY] = True
+
+
+def _mark_user_deleted(mapper, connection, target: User) -> None:
+    _mark_user_changed(mapper, connection, target)
+    session = Session.object_session(target)
+    if session is not None:
+        session.info[_PUBLISH_KEY] = True
+
+
+event.listen(User, "after_update", _mark_user_updated)
+event.listen(User, "after_delete", _mark_user_deleted)
+
+
+@event.listens_for(Session, "after_flush")
+def _user_cache_after_flush(session: Session, flush_context) -> None:
+    """Version partagée incrémentée dans la transaction qui modifie l'utilisateur"""
+    if session.info.pop(_PUBLISH_KEY, False):
+        bump_content_versions(session, [USERS_SCOPE])
+
+
+@event.listens_for(Session, "after_commit")
+def _user_cache_after_commit(session: Session) -> None:
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        user_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _user_cache_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_PUBLISH_KEY, None)
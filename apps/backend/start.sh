@@ -3,26 +3,28 @@ set -e
 
 echo "Vérification des migrations Alembic..."
 cd /app/apps/backend
-# Vérifier si la table alembic_version existe
-if alembic current 2>/dev/null | grep -q "initial_schema"; then
-  echo "Migration déjà appliquée (initial_schema)"
-elif alembic current 2>/dev/null | grep -q "head"; then
+# Vérifier si la base est déjà à la dernière révision
+if alembic current 2>/dev/null | grep -q "(head)"; then
   echo "Base de données à jour"
 else
-  echo "Application de la migration initial_schema..."
+  echo "Application des migrations..."
+  # Jamais de stamp sur échec : le schéma ne correspondrait plus à la révision enregistrée
   if ! alembic upgrade head; then
-    echo "Alembic upgrade a échoué, marquage de la base comme à jour..."
-    alembic stamp initial_schema || echo "Stamp échoué, continuons quand même..."
+    echo "ERREUR : alembic upgrade head a échoué, démarrage interrompu" >&2
+    exit 1
   fi
 fi
 
+echo "Remplissage initial des rollups analytics..."
+python -m services.analytics_rollups --full --if-empty || echo "Remplissage des rollups échoué, continuons quand même..."
+
 echo "Démarrage du serveur..."
 
 PORT=${PORT:-8000}
 exec gunicorn app:app \
   -k uvicorn.workers.UvicornWorker \
   --bind 0.0.0.0:${PORT} \
-  --workers 1 \
+  --workers ${WEB_CONCURRENCY:-1} \
   --timeout 120 \
   --access-logfile - \
   --error-logfile -
@@ -0,0 +1,56 @@
+"""
+Configuration pytest du backend : variables minimales pour importer core.config et base
+SQLite jetable (fichier, partagé par les moteurs sync et async de db.base)
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="backend-tests-"), "test.db")
+
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("OAUTH_STATE_SECRET", "test-state-secret")
+os.environ.setdefault("WEBHOOK_VERIFY_TOKEN", "test-verify-token")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DB_PATH}")
+
+
+@pytest.fixture(scope="session")
+def _schema():
+    from db.base import Base, engine
+    import db.models  # noqa: F401  (enregistre les tables)
+
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def db(_schema):
+    """Session sur la base de test, vidée après chaque test"""
+    from db.base import Base, SessionLocal, engine
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+        with engine.begin() as connection:
+            for table in reversed(Base.metadata.sorted_tables):
+                connection.execute(table.delete())
+
+
+@pytest.fixture
+def platform_id(db):
+    from services.post_utils import ensure_platform_id
+    from services.reference_cache import reference_cache
+
+    platform_id = ensure_platform_id(db, "instagram")
+    db.commit()
+    yield platform_id
+    reference_cache.invalidate()
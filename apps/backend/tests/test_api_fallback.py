@@ -0,0 +1,193 @@
+"""
+Tests unitaires du disjoncteur et du mode stale-while-revalidate (services/api_fallback.py)
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from core.config import settings
+from services import api_fallback
+from services.api_fallback import CircuitBreaker, CircuitOpenError, call_with_breaker, serve_api_or_db
+
+
+class FakeClock:
+    """time.monotonic contrôlé par le test"""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(api_fallback.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture(autouse=True)
+def _reset_state():
+    api_fallback._breakers.clear()
+    api_fallback._counters.clear()
+    yield
+    api_fallback._breakers.clear()
+    api_fallback._counters.clear()
+
+
+@pytest.fixture
+def swr(monkeypatch, _schema):
+    monkeypatch.setattr(settings, "API_FALLBACK_MODE", "swr")
+    monkeypatch.setattr(settings, "API_SWR_REVALIDATE_AFTER_SECONDS", 300)
+    monkeypatch.setattr(settings, "API_SWR_MAX_STALE_SECONDS", 3600)
+    monkeypatch.setattr(settings, "API_SWR_WAIT_SECONDS", 0.05)
+
+
+def upstream_error(status_code=503):
+    return HTTPException(status_code=502, detail={"status_code": status_code})
+
+
+def db_result(response, age_seconds):
+    async def load_db():
+        return response, datetime.utcnow() - timedelta(seconds=age_seconds)
+
+    return load_db
+
+
+@pytest.mark.unit
+class TestCircuitBreaker:
+    """Tests des transitions fermé -> ouvert -> demi-ouvert"""
+
+    def test_opens_after_threshold(self, clock):
+        """N échecs consécutifs ouvrent le disjoncteur ; un succès intermédiaire remet à zéro"""
+        breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow_request()
+        assert breaker.retry_after() == 60
+
+    def test_half_open_single_probe(self, clock):
+        """Après reset_timeout, un seul appel d'essai ; son succès referme le disjoncteur"""
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60)
+        breaker.record_failure()
+        clock.now += 61
+
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_failed_probe_reopens(self, clock):
+        """L'échec de l'appel d'essai rouvre pour un nouveau reset_timeout"""
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60)
+        breaker.record_failure()
+        clock.now += 61
+        assert breaker.allow_request()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.times_opened == 1
+
+    def test_short_circuit_and_neutral_errors(self, clock, monkeypatch):
+        """Erreurs client ignorées ; disjoncteur ouvert -> CircuitOpenError (503) sans appel"""
+        monkeypatch.setattr(settings, "API_BREAKER_FAILURE_THRESHOLD", 2)
+        calls = []
+
+        async def call(exc):
+            async def fn():
+                calls.append(exc)
+                raise exc
+            return await call_with_breaker("test/endpoint", fn)
+
+        async def main():
+            for exc in (HTTPException(status_code=404), HTTPException(status_code=404), upstream_error(), upstream_error()):
+                with pytest.raises(HTTPException):
+                    await call(exc)
+            with pytest.raises(CircuitOpenError) as excinfo:
+                await call(upstream_error())
+            return excinfo.value
+
+        error = asyncio.run(main())
+        assert error.status_code == 503
+        assert len(calls) == 4
+        assert api_fallback._counters["test/endpoint"]["short_circuited"] == 1
+
+
+@pytest.mark.unit
+class TestServeApiOrDb:
+    """Tests du mode swr de serve_api_or_db"""
+
+    def test_fresh_db_answer_skips_api(self, swr):
+        """Réponse en base récente : servie sans appel live"""
+        calls = []
+
+        async def fetch_api(session):
+            calls.append(1)
+            return "live"
+
+        result = asyncio.run(serve_api_or_db("test/fresh", "k", fetch_api, db_result("db", 10)))
+        assert result == "db"
+        assert calls == []
+        assert api_fallback._counters["test/fresh"]["served_db_fresh"] == 1
+
+    def test_aging_db_answer_revalidated_in_background(self, swr):
+        """Au-delà de API_SWR_REVALIDATE_AFTER_SECONDS : la base répond, l'API est rappelée en fond"""
+        calls = []
+
+        async def fetch_api(session):
+            calls.append(1)
+            return "live"
+
+        async def main():
+            result = await serve_api_or_db("test/aging", "k", fetch_api, db_result("db", 600))
+            await asyncio.gather(*api_fallback._background)
+            return result
+
+        assert asyncio.run(main()) == "db"
+        assert calls == [1]
+        assert api_fallback._counters["test/aging"]["revalidations"] == 1
+
+    def test_too_stale_waits_for_api(self, swr):
+        """Au-delà de API_SWR_MAX_STALE_SECONDS : la réponse live est attendue"""
+
+        async def fetch_api(session):
+            return "live"
+
+        assert asyncio.run(serve_api_or_db("test/stale", "k", fetch_api, db_result("db", 7200))) == "live"
+
+    def test_stale_served_when_api_fails(self, swr):
+        """Échec de l'API : la réponse ancienne de la base plutôt qu'une erreur"""
+
+        async def fetch_api(session):
+            raise upstream_error()
+
+        result = asyncio.run(serve_api_or_db("test/failing", "k", fetch_api, db_result("db", 7200), on_error=lambda e: None))
+        assert result == "db"
+        assert api_fallback._counters["test/failing"]["served_db_stale"] == 1
+
+    def test_slow_api_bounded_by_wait(self, swr):
+        """API plus lente que API_SWR_WAIT_SECONDS : la base répond sans attendre la fin de l'appel"""
+
+        async def fetch_api(session):
+            await asyncio.sleep(0.5)
+            return "live"
+
+        async def main():
+            result = await serve_api_or_db("test/slow", "k", fetch_api, db_result("db", 7200))
+            for task in asyncio.all_tasks() - {asyncio.current_task()}:
+                task.cancel()
+            return result
+
+        assert asyncio.run(main()) == "db"
+        assert api_fallback._counters["test/slow"]["api_wait_timeouts"] == 1
@@ -0,0 +1,77 @@
+"""
+Tests unitaires du découpage et du démultiplexage des batchs Graph API (services/meta_client.py)
+"""
+
+import json
+
+import pytest
+
+from services.meta_client import (
+    META_BATCH_MAX_REQUESTS,
+    BatchRequest,
+    MetaAPIError,
+    _batch_chunks,
+    _demultiplex,
+    batch_result,
+)
+
+
+@pytest.mark.unit
+class TestBatchChunks:
+    """Tests du découpage en lots de META_BATCH_MAX_REQUESTS"""
+
+    def test_split_in_order(self):
+        """120 sous-requêtes -> lots de 50, 50 et 20, ordre conservé"""
+        requests = [BatchRequest(f"media_{i}") for i in range(120)]
+        chunks = _batch_chunks(requests)
+
+        assert [len(chunk) for chunk in chunks] == [META_BATCH_MAX_REQUESTS, META_BATCH_MAX_REQUESTS, 20]
+        assert [request for chunk in chunks for request in chunk] == requests
+
+    def test_reference_inside_batch(self):
+        """Une référence à une sous-requête antérieure du même lot est acceptée"""
+        requests = [
+            BatchRequest("ig_hashtag_search", {"q": "food"}, name="search"),
+            BatchRequest(f"{batch_result('search', '$.data.0.id')}/recent_media"),
+        ]
+        assert _batch_chunks(requests) == [requests]
+
+    def test_reference_across_batches_rejected(self):
+        """Une référence vers le lot précédent ne peut pas être résolue par Meta"""
+        requests = [BatchRequest("ig_hashtag_search", name="search")]
+        requests += [BatchRequest(f"media_{i}") for i in range(META_BATCH_MAX_REQUESTS - 1)]
+        requests.append(BatchRequest(f"{batch_result('search', '$.data.0.id')}/recent_media"))
+
+        with pytest.raises(ValueError):
+            _batch_chunks(requests)
+
+
+@pytest.mark.unit
+class TestDemultiplex:
+    """Tests de la conversion des réponses de sous-requêtes"""
+
+    def test_success_body_decoded(self):
+        """Code < 400 : corps JSON décodé"""
+        entry = {"code": 200, "body": json.dumps({"id": "17841", "name": "food"})}
+        assert _demultiplex(BatchRequest("17841"), entry, "fp") == {"id": "17841", "name": "food"}
+
+    def test_not_executed_is_failed_dependency(self):
+        """Entrée null : sous-requête non exécutée (dépendance en échec) -> 424 retournée"""
+        result = _demultiplex(BatchRequest("17841/recent_media"), None, "fp")
+        assert isinstance(result, MetaAPIError)
+        assert result.status_code == 424
+
+    def test_client_error_kept(self):
+        """Erreur 4xx : MetaAPIError retournée (pas levée) avec le même code"""
+        entry = {"code": 400, "body": json.dumps({"error": {"message": "Invalid parameter", "code": 100}})}
+        result = _demultiplex(BatchRequest("17841"), entry, "fp")
+        assert isinstance(result, MetaAPIError)
+        assert result.status_code == 400
+        assert result.detail["detail"]["error"]["code"] == 100
+
+    def test_server_error_is_bad_gateway(self):
+        """Erreur 5xx de Meta (corps non JSON) -> 502"""
+        result = _demultiplex(BatchRequest("17841"), {"code": 500, "body": "oops"}, "fp")
+        assert isinstance(result, MetaAPIError)
+        assert result.status_code == 502
+        assert result.detail["detail"] == {"error": "oops"}
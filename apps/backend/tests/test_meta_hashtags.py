@@ -0,0 +1,67 @@
+"""
+Tests unitaires du quota ig_hashtag_search par utilisateur IG (services/meta_hashtags.py)
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.config import settings
+from db.models import MetaHashtagSearch
+from services.meta_hashtags import HashtagSearchQuotaExceeded, reserve_search, search_quota
+
+
+@pytest.fixture
+def quota(monkeypatch, db):
+    monkeypatch.setattr(settings, "META_HASHTAG_SEARCH_QUOTA", 2)
+    monkeypatch.setattr(settings, "META_HASHTAG_SEARCH_WINDOW_DAYS", 7)
+    return db
+
+
+def reserve(ig_user_id, name, now):
+    asyncio.run(reserve_search(ig_user_id, name, now=now))
+
+
+@pytest.mark.unit
+class TestReserveSearch:
+    """Tests de la réservation des recherches de hashtags"""
+
+    now = datetime(2026, 10, 17, 12, 0)
+
+    def test_new_hashtags_consume_quota(self, quota):
+        """Chaque hashtag nouveau consomme une place ; au-delà de la limite -> 429"""
+        reserve("ig_1", "food", self.now)
+        reserve("ig_1", "travel", self.now)
+
+        with pytest.raises(HashtagSearchQuotaExceeded) as excinfo:
+            reserve("ig_1", "style", self.now)
+        assert excinfo.value.status_code == 429
+        assert excinfo.value.detail["retry_after"] == 7 * 24 * 3600
+
+    def test_repeat_search_is_free(self, quota):
+        """Re-chercher un hashtag déjà compté dans la fenêtre ne consomme rien (nom normalisé)"""
+        reserve("ig_1", "food", self.now)
+        reserve("ig_1", "travel", self.now)
+        reserve("ig_1", "#Food", self.now + timedelta(days=1))
+
+        assert quota.query(MetaHashtagSearch).count() == 2
+
+    def test_quota_is_per_ig_user(self, quota):
+        """Le quota d'un utilisateur IG n'entame pas celui d'un autre"""
+        reserve("ig_1", "food", self.now)
+        reserve("ig_1", "travel", self.now)
+        reserve("ig_2", "style", self.now)
+
+        assert asyncio.run(search_quota("ig_1", self.now))["remaining"] == 0
+        assert asyncio.run(search_quota("ig_2", self.now))["remaining"] == 1
+
+    def test_sliding_window_frees_slots(self, quota):
+        """Une recherche sortie de la fenêtre glissante libère sa place"""
+        reserve("ig_1", "food", self.now)
+        reserve("ig_1", "travel", self.now + timedelta(days=3))
+        later = self.now + timedelta(days=7, minutes=1)
+
+        reserve("ig_1", "style", later)
+        with pytest.raises(HashtagSearchQuotaExceeded):
+            reserve("ig_1", "beauty", later)
@@ -0,0 +1,117 @@
+"""
+Tests unitaires de la pagination keyset (core/pagination.py)
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql
+
+from core.pagination import decode_cursor, encode_cursor, keyset_sections, paginate
+from db.models import Post
+
+
+def add_posts(db, platform_id, count, null_every=3):
+    """Posts dont un sur `null_every` n'a pas de posted_at, avec des dates en double"""
+    start = datetime(2026, 1, 1)
+    for i in range(count):
+        posted_at = None if i % null_every == 0 else start + timedelta(hours=i // 2)
+        db.add(Post(id=f"ig_{i:03d}", external_id=f"{i:03d}", platform_id=platform_id, posted_at=posted_at))
+    db.commit()
+
+
+def all_pages(db, limit):
+    seen, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = paginate(db.query(Post), "posted_at", Post.posted_at, Post.id, limit, cursor)
+        seen.extend(row.id for row in rows)
+        pages += 1
+        if cursor is None:
+            return seen, pages
+
+
+@pytest.mark.unit
+class TestCursor:
+    """Tests de l'encodage des curseurs"""
+
+    def test_round_trip_datetime(self):
+        """La valeur datetime et l'id survivent à l'aller-retour"""
+        value = datetime(2026, 3, 4, 5, 6, 7)
+        assert decode_cursor(encode_cursor("posted_at", value, "ig_1"), "posted_at") == (value, "ig_1")
+
+    def test_round_trip_null_value(self):
+        """Un curseur dans la section NULL garde une valeur None"""
+        assert decode_cursor(encode_cursor("score_trend", None, "ig_2"), "score_trend") == (None, "ig_2")
+
+    def test_other_sort_rejected(self):
+        """Un curseur émis pour un autre tri est refusé (400)"""
+        with pytest.raises(HTTPException) as excinfo:
+            decode_cursor(encode_cursor("posted_at", None, "ig_1"), "score_trend")
+        assert excinfo.value.status_code == 400
+
+    def test_garbage_rejected(self):
+        """Un curseur illisible est refusé (400)"""
+        with pytest.raises(HTTPException) as excinfo:
+            decode_cursor("not-a-cursor", "posted_at")
+        assert excinfo.value.status_code == 400
+
+
+@pytest.mark.unit
+class TestPaginate:
+    """Parcours complet par curseurs"""
+
+    def test_pages_cover_every_row_once_in_order(self, db, platform_id):
+        """Les pages enchaînées = la liste complète triée, sections non nulle puis NULL comprises"""
+        add_posts(db, platform_id, 20)
+        expected = [
+            post.id
+            for post in db.query(Post).order_by(Post.posted_at.desc().nullslast(), Post.id.desc()).all()
+        ]
+
+        seen, pages = all_pages(db, limit=3)
+
+        assert seen == expected
+        assert pages == 7
+
+    def test_page_boundary_on_last_non_null_row(self, db, platform_id):
+        """Une page qui se termine sur la dernière clé non nulle enchaîne sur la section NULL"""
+        add_posts(db, platform_id, 6, null_every=2)  # 3 datés, 3 sans date
+
+        first, cursor = paginate(db.query(Post), "posted_at", Post.posted_at, Post.id, 3)
+        second, end = paginate(db.query(Post), "posted_at", Post.posted_at, Post.id, 3, cursor)
+
+        assert all(post.posted_at is not None for post in first)
+        assert [post.id for post in second] == ["ig_004", "ig_002", "ig_000"]
+        assert end is None
+
+    def test_sections_have_no_or(self):
+        """Chaque section est une borne d'index simple (pas d'OR avec IS NULL)"""
+        sections = keyset_sections(Post.posted_at, Post.id, datetime(2026, 1, 1), "ig_1")
+
+        compiled = [str(section.compile(dialect=postgresql.dialect())) for section in sections]
+
+        assert len(compiled) == 2
+        assert all(" OR " not in sql for sql in compiled)
+        assert "(posts.posted_at, posts.id) < (" in compiled[0]
+
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL (base migrée) non défini")
+def test_explain_uses_index_range_on_postgres():
+    """Sur PostgreSQL migré : la première section part de ix_posts_posted_at_id, sans tri"""
+    engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    with engine.connect() as connection:
+        plan = "\n".join(
+            row[0]
+            for row in connection.execute(
+                text(
+                    "EXPLAIN SELECT id FROM posts WHERE (posted_at, id) < (:value, :id) "
+                    "ORDER BY posted_at DESC NULLS LAST, id DESC LIMIT 100"
+                ),
+                {"value": datetime(2026, 1, 1), "id": "ig_1"},
+            )
+        )
+    assert "ix_posts_posted_at_id" in plan
+    assert "Sort" not in plan
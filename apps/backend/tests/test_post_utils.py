@@ -0,0 +1,48 @@
+"""
+Tests unitaires de l'upsert ensembliste des posts (services/post_utils.py)
+"""
+
+import pytest
+
+from db.models import Post, PostHashtag
+from services.post_utils import ingest_posts, upsert_posts
+
+
+def item(external_id, caption):
+    return {"external_id": external_id, "source": "test", "payload": {"id": external_id}, "defaults": {"caption": caption}}
+
+
+@pytest.mark.unit
+class TestUpsertPosts:
+    """Tests de upsert_posts / ingest_posts"""
+
+    def test_legacy_row_matched_by_id_is_updated(self, db, platform_id):
+        """Un post connu par son seul id (external_id NULL) est mis à jour, le lot n'échoue pas"""
+        db.add(Post(id="111", external_id=None, platform_id=platform_id, caption="old"))
+        db.commit()
+
+        results = upsert_posts(db, "instagram", [item("111", "new"), item("222", "other")])
+        db.commit()
+
+        assert sorted(results) == ["111", "222"]
+        legacy = db.get(Post, "111")
+        assert (legacy.external_id, legacy.caption) == ("111", "new")
+        assert db.query(Post).count() == 2
+
+    def test_none_default_keeps_existing_value(self, db, platform_id):
+        """Une valeur None dans defaults ne remplace pas la valeur existante"""
+        upsert_posts(db, "instagram", [item("333", "kept")])
+        upsert_posts(db, "instagram", [item("333", None)])
+        db.commit()
+
+        assert db.get(Post, "333").caption == "kept"
+
+    def test_upsert_posts_only_writes_posts(self, db, platform_id):
+        """upsert_posts ne lie pas les hashtags ; ingest_posts compose le reste"""
+        upsert_posts(db, "instagram", [item("444", "#summer")])
+        db.commit()
+        assert db.query(PostHashtag).count() == 0
+
+        ingest_posts(db, "instagram", [item("444", "#summer")])
+        db.commit()
+        assert db.query(PostHashtag).count() == 1
@@ -0,0 +1,92 @@
+"""
+Tests unitaires des ETags et réponses 304 (services/response_cache.py)
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from db.models import Post
+from services.response_cache import (
+    POSTS_SCOPE,
+    TREND_SCOPE,
+    bump_content_versions,
+    cached_response,
+    etag_json_response,
+    scopes_etag,
+)
+
+
+def make_request(if_none_match=None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": b""})
+
+
+@pytest.fixture
+def client(db):
+    from app import app
+    from auth_unified.auth_endpoints import get_current_user
+
+    app.dependency_overrides[get_current_user] = lambda: None
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+@pytest.mark.unit
+class TestEtag:
+    """Tests des ETags dérivés des versions de contenu"""
+
+    def test_etag_follows_versions(self, db):
+        """Même version et mêmes paramètres : même ETag ; un bump ou un autre paramètre le change"""
+        first = scopes_etag(db, [POSTS_SCOPE], 100)
+        assert scopes_etag(db, [POSTS_SCOPE], 100) == first
+        assert scopes_etag(db, [POSTS_SCOPE], 50) != first
+
+        bump_content_versions(db, [POSTS_SCOPE])
+        db.commit()
+        assert scopes_etag(db, [POSTS_SCOPE], 100) != first
+
+    def test_other_scope_keeps_etag(self, db):
+        """Un bump d'un autre périmètre ne change pas l'ETag"""
+        first = scopes_etag(db, [POSTS_SCOPE])
+        bump_content_versions(db, [TREND_SCOPE])
+        db.commit()
+        assert scopes_etag(db, [POSTS_SCOPE]) == first
+
+    @pytest.mark.parametrize("header", ['"{etag}"', 'W/"{etag}"', '"other", "{etag}"', "*"])
+    def test_not_modified(self, header):
+        """If-None-Match correspondant (faible, liste, *) -> 304 avec l'ETag"""
+        etag = '"abc"'
+        response = cached_response(make_request(header.format(etag=etag.strip('"'))), "key", etag)
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+
+    def test_lru_serves_only_current_etag(self):
+        """Le corps mis en cache n'est resservi que pour l'ETag sous lequel il a été stocké"""
+        etag_json_response(("test", 1), '"v1"', dict, {"items": [1]})
+
+        cached = cached_response(make_request(), ("test", 1), '"v1"')
+        assert cached is not None and cached.body == b'{"items":[1]}'
+        assert cached_response(make_request(), ("test", 1), '"v2"') is None
+
+
+@pytest.mark.unit
+class TestPostsEndpoint:
+    """Tests du GET /api/v1/posts/ conditionnel"""
+
+    def test_poll_without_change_is_304(self, client, db, platform_id):
+        """Un second poll avec l'ETag reçu -> 304 ; après un bump -> 200 et nouvel ETag"""
+        db.add(Post(id="ig_1", external_id="1", platform_id=platform_id))
+        db.commit()
+
+        first = client.get("/api/v1/posts/")
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+
+        assert client.get("/api/v1/posts/", headers={"If-None-Match": etag}).status_code == 304
+
+        bump_content_versions(db, [POSTS_SCOPE])
+        db.commit()
+        refreshed = client.get("/api/v1/posts/", headers={"If-None-Match": etag})
+        assert refreshed.status_code == 200
+        assert refreshed.headers["etag"] != etag
@@ -0,0 +1,82 @@
+"""
+Tests unitaires de la projection schema_rows (core/responses.py)
+"""
+
+import json
+from datetime import datetime
+from typing import List
+
+import orjson
+import pytest
+from pydantic import TypeAdapter
+
+from core.responses import dumps, schema_rows
+from db.models import Post
+from posts.schemas import POST_JSON_FIELDS, PostResponse
+
+
+def make_post(**overrides) -> Post:
+    """Post tel que lu en base : hashtags et metrics stockés en texte JSON"""
+    values = dict(
+        id="ig_1",
+        external_id="1",
+        platform_id=1,
+        author="creator",
+        caption="Summer #style #food",
+        hashtags=json.dumps(["style", "food"]),
+        metrics=json.dumps({"like_count": 12, "comments_count": 3, "engagement_rate": 0.25}),
+        posted_at=datetime(2024, 6, 1, 12, 30),
+        fetched_at=datetime(2024, 6, 1, 13, 0),
+        language="fr",
+        media_url="https://example.com/1.jpg",
+        sentiment=0.5,
+        score=42.0,
+        score_trend=1.5,
+    )
+    values.update(overrides)
+    return Post(**values)
+
+
+def pydantic_json(posts: List[Post]) -> bytes:
+    """Sérialisation de référence : validation Pydantic des colonnes décodées"""
+    decoded = [
+        {
+            **{name: getattr(post, name) for name in PostResponse.model_fields},
+            **{name: json.loads(getattr(post, name)) if getattr(post, name) else None for name in POST_JSON_FIELDS},
+        }
+        for post in posts
+    ]
+    adapter = TypeAdapter(List[PostResponse])
+    return adapter.dump_json(adapter.validate_python(decoded))
+
+
+@pytest.mark.unit
+class TestSchemaRows:
+    """Tests de la projection sans instance Pydantic"""
+
+    def test_json_columns_match_pydantic_serialization(self):
+        """Même JSON que Pydantic sur une ligne avec hashtags et metrics non nuls"""
+        posts = [make_post(), make_post(id="ig_2", external_id="2", hashtags=None, metrics=None)]
+
+        projected = dumps(schema_rows(PostResponse, POST_JSON_FIELDS).many(posts))
+
+        assert orjson.loads(projected) == orjson.loads(pydantic_json(posts))
+        first = orjson.loads(projected)[0]
+        assert first["hashtags"] == ["style", "food"]
+        assert first["metrics"]["like_count"] == 12
+
+    def test_mapping_rows_are_decoded(self):
+        """Les lignes dict passent par le même décodage"""
+        row = {"id": "ig_1", "platform_id": 1, "hashtags": '["style"]', "metrics": '{"like_count": 1}'}
+
+        projected = schema_rows(PostResponse, POST_JSON_FIELDS).many([row])[0]
+
+        assert projected["hashtags"] == ["style"]
+        assert projected["metrics"] == {"like_count": 1}
+
+    def test_invalid_json_becomes_none(self):
+        """Texte JSON illisible : None plutôt qu'une chaîne brute"""
+        projected = schema_rows(PostResponse, POST_JSON_FIELDS).from_attributes(make_post(metrics="{not json"))
+
+        assert projected["metrics"] is None
+        assert projected["hashtags"] == ["style", "food"]
@@ -0,0 +1,129 @@
+"""
+Tests unitaires du cache TTL et de la coalescence des appels (services/ttl_cache.py)
+"""
+
+import asyncio
+
+import pytest
+
+from services import ttl_cache
+from services.ttl_cache import SingleFlight, TTLCache
+
+
+class FakeClock:
+    """time.monotonic contrôlé par le test"""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ttl_cache.time, "monotonic", clock)
+    return clock
+
+
+@pytest.mark.unit
+class TestTTLCache:
+    """Tests des entrées positives, négatives et de l'expiration"""
+
+    def test_negative_entry_is_a_hit(self, clock):
+        """Une absence mémorisée (None) est servie et comptée à part des hits"""
+        cache = TTLCache("test_negative", default_ttl=60)
+        cache.set("unknown", None, ttl=10, negative=True)
+
+        assert cache.get("unknown", "missing") is None
+        stats = cache.stats()
+        assert (stats["hits"], stats["negative_hits"], stats["misses"]) == (0, 1, 0)
+
+    def test_negative_entry_expires_on_its_own_ttl(self, clock):
+        """Le TTL court d'une entrée négative n'est pas remplacé par default_ttl"""
+        cache = TTLCache("test_negative_ttl", default_ttl=3600)
+        cache.set("unknown", None, ttl=10, negative=True)
+
+        clock.now += 11
+        assert cache.get("unknown", "missing") == "missing"
+        assert cache.stats()["expirations"] == 1
+
+    def test_positive_entry_replaces_negative(self, clock):
+        """Une valeur trouvée ensuite remplace l'absence mémorisée"""
+        cache = TTLCache("test_replace", default_ttl=60)
+        cache.set("tag", None, negative=True)
+        cache.set("tag", "17841")
+
+        assert cache.get("tag") == "17841"
+        assert cache.stats()["hits"] == 1
+
+    def test_lru_eviction(self, clock):
+        """Au-delà de max_entries, l'entrée la moins récemment lue est évincée"""
+        cache = TTLCache("test_lru", max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert (cache.get("a"), cache.get("c")) == (1, 3)
+        assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.unit
+class TestSingleFlight:
+    """Tests de la coalescence des appels concurrents"""
+
+    def test_concurrent_calls_share_one_load(self):
+        """Trois appelants simultanés : un seul chargement, le même résultat"""
+        flight = SingleFlight()
+        calls = []
+
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "value"
+
+        async def main():
+            return await asyncio.gather(*(flight.do("key", load) for _ in range(3)))
+
+        assert asyncio.run(main()) == ["value"] * 3
+        assert len(calls) == 1
+        assert flight.stats() == {"in_flight": 0, "coalesced": 2}
+
+    def test_error_is_shared_then_not_cached(self):
+        """L'erreur est propagée à tous les appelants ; l'appel suivant recharge"""
+        flight = SingleFlight()
+        calls = []
+
+        async def failing():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream down")
+
+        async def main():
+            results = await asyncio.gather(flight.do("key", failing), flight.do("key", failing), return_exceptions=True)
+            assert all(isinstance(result, ValueError) for result in results)
+            with pytest.raises(ValueError):
+                await flight.do("key", failing)
+
+        asyncio.run(main())
+        assert len(calls) == 2
+
+    def test_cancelled_caller_does_not_cancel_load(self):
+        """Un appelant annulé (client déconnecté) n'interrompt pas le chargement des autres"""
+        flight = SingleFlight()
+
+        async def load():
+            await asyncio.sleep(0.02)
+            return "value"
+
+        async def main():
+            first = asyncio.ensure_future(flight.do("key", load))
+            second = asyncio.ensure_future(flight.do("key", load))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(main()) == "value"
@@ -1,17 +1,18 @@
 import json
 import logging
 from datetime import datetime
-from typing import Optional, Callable, Any, Dict
+from typing import Optional, Callable, Any, Dict, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import or_
-from sqlalchemy.orm import Session
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth_unified.auth_endpoints import get_optional_user
-from db.base import get_db
-from db.models import Post, Platform, User, OAuthAccount
+from db.base import get_async_db
+from db.models import Post, User, OAuthAccount
+from services.api_fallback import serve_api_or_db
 from services.tiktok_client import call_tiktok
-from services.post_utils import parse_timestamp, ensure_platform, upsert_post, load_post_payload
+from services.post_utils import ensure_platform_id, upsert_post, ingest_posts, load_post_payload, tiktok_video_item
 
 router = APIRouter(prefix="/api/v1/tiktok", tags=["tiktok"])
 logger = logging.getLogger(__name__)
@@ -33,36 +34,66 @@ def _get_post_share_url(post: Post, api_payload: dict) -> Optional[str]:
     return None
 
 
-def _get_tiktok_token(db: Session, current_user: Optional[User]) -> str:
-    """Récupère le token TikTok depuis OAuthAccount pour l'utilisateur courant"""
+async def _get_tiktok_account(db: AsyncSession, current_user: Optional[User]) -> Optional[Tuple[str, str]]:
+    """
+    Compte TikTok de l'utilisateur courant : (access_token, open_id), None si aucun compte lié.
+    L'open_id (OAuthAccount.provider_user_id) borne les réponses servies depuis la DB à ce compte.
+    """
+    columns = (OAuthAccount.access_token, OAuthAccount.provider_user_id)
     if current_user:
-        oauth_account = (
-            db.query(OAuthAccount)
-            .filter(
-                OAuthAccount.user_id == current_user.id,
-                OAuthAccount.provider == "tiktok",
+        account = (
+            await db.execute(
+                select(*columns)
+                .where(
+                    OAuthAccount.user_id == current_user.id,
+                    OAuthAccount.provider == "tiktok",
+                    OAuthAccount.access_token.isnot(None),
+                )
+                .limit(1)
             )
-            .first()
-        )
-        if oauth_account and oauth_account.access_token:
-            return oauth_account.access_token
+        ).first()
+        if account:
+            return account.access_token, account.provider_user_id
     
-    # Fallback: chercher n'importe quel token TikTok (pour tests/public access)
-    oauth_account = (
-        db.query(OAuthAccount)
-        .filter(
-            OAuthAccount.provider == "tiktok",
-            OAuthAccount.access_token.isnot(None),
+    # Fallback: chercher n'importe quel compte TikTok (pour tests/public access)
+    account = (
+        await db.execute(
+            select(*columns)
+            .where(
+                OAuthAccount.provider == "tiktok",
+                OAuthAccount.access_token.isnot(None),
+            )
+            .limit(1)
         )
-        .first()
-    )
-    if oauth_account and oauth_account.access_token:
+    ).first()
+    if account:
         logger.warning("Using fallback TikTok token (no user-specific token found)")
-        return oauth_account.access_token
-    
-    raise HTTPException(
-        status_code=401,
-        detail="TikTok access token not found. Please connect your TikTok account via OAuth.",
+        return account.access_token, account.provider_user_id
+    return None
+
+
+async def _serve(
+    endpoint: str,
+    key: Any,
+    account: Optional[Tuple[str, str]],
+    fetch_api: Callable[[AsyncSession], Any],
+    load_db: Callable[[], Any],
+    context: str,
+    swr: bool = True,
+) -> Optional[Dict]:
+    """
+    API d'abord / SWR (serve_api_or_db) si un compte TikTok est lié ; sinon la DB seule,
+    comme un échec d'authentification API (déploiements sans OAuth TikTok)
+    """
+    if account is None:
+        _handle_api_error(
+            HTTPException(status_code=401, detail="TikTok access token not found. Please connect your TikTok account via OAuth."),
+            context,
+        )
+        result, _ = await load_db()
+        return result
+    return await serve_api_or_db(
+        endpoint, key, fetch_api, load_db, on_error=lambda e: _handle_api_error(e, context), swr=swr,
     )
 
 
@@ -98,23 +129,28 @@ def _build_api_response(data: Any, source: str, **meta) -> Dict:
 
 @router.get("/profile")
 async def get_tiktok_profile(
-    user_id: Optional[str] = Query(None, description="TikTok user ID (open_id or union_id)"),
-    db: Session = Depends(get_db),
+    user_id: Optional[str] = Query(None, description="TikTok user ID (open_id) lu en base ; par défaut le compte TikTok connecté"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Optional[User] = Depends(get_optional_user),
 ):
     """
     Récupère le profil TikTok d'un utilisateur.
     Utilise les scopes: user.info.basic, user.info.profile
     
-    STRATÉGIE: 1. Essayer API TikTok d'abord → 2. Fallback DB si échec
+    STRATÉGIE (API_FALLBACK_MODE) : api_first = API TikTok d'abord, DB si échec ;
+    swr = DB si assez fraîche (TikTok rafraîchit en tâche de fond), sinon API TikTok
     """
-    tiktok_platform = ensure_platform(db, "tiktok")
+    tiktok_platform_id = await db.run_sync(ensure_platform_id, "tiktok")
+    # Compte TikTok du demandeur : l'API répond pour ce compte ; la DB pour user_id s'il est
+    # fourni, sinon pour ce compte (ou le dernier relevé si aucun compte n'est lié)
+    account = await _get_tiktok_account(db, current_user)
+    await db.commit()  # plateforme éventuellement créée : ne pas bloquer l'écriture de l'appel live
+    access_token, open_id = account or (None, None)
+    owner_id = user_id or open_id
+    if user_id and user_id != open_id:
+        account = None  # l'API ne renvoie que le compte du token : user_id d'un autre compte = DB seule
     
-    # 1️⃣ ESSAYER L'API TIKTOK D'ABORD
-    try:
-        access_token = _get_tiktok_token(db, current_user)
-        if not user_id:
-            user_id = "me"
+    async def fetch_api(session: AsyncSession) -> Optional[Dict]:
         
         fields = "open_id,union_id,avatar_url,display_name,profile_web_link,profile_deep_link,bio_description,is_verified"
         logger.info("Trying TikTok API first (user/info)...")
@@ -126,87 +162,85 @@ async def get_tiktok_profile(
         )
         
         user_data = response.get("data", {}).get("user", {})
-        if user_data:
-            # Stocker le profil dans Post pour traçabilité
-            if user_data.get("open_id") or user_data.get("union_id"):
-                external_id = user_data.get("open_id") or user_data.get("union_id")
-                defaults = {
-                    "author": user_data.get("display_name"),
-                    "caption": f"TikTok profile: {user_data.get('bio_description', '')}",
-                    "media_url": user_data.get("avatar_url"),
-                    "fetched_at": datetime.utcnow(),
-                }
-                upsert_post(
-                    db=db,
-                    platform_name="tiktok",
-                    external_id=f"profile:{external_id}",
-                    payload=user_data,
-                    source="tiktok_profile_api",
-                    defaults=defaults,
-                )
-                db.commit()
-            
-            return _build_api_response(user_data, "tiktok_profile_api")
-        else:
+        if not user_data:
             logger.warning("API returned empty profile, falling back to DB")
-            raise HTTPException(status_code=404, detail="Profile not found")
-            
-    except Exception as e:
-        _handle_api_error(e, "(profile)")
+            return None
+        
+        # Stocker le profil dans Post pour traçabilité
+        if user_data.get("open_id") or user_data.get("union_id"):
+            external_id = user_data.get("open_id") or user_data.get("union_id")
+            defaults = {
+                "author": user_data.get("display_name"),
+                "caption": f"TikTok profile: {user_data.get('bio_description', '')}",
+                "media_url": user_data.get("avatar_url"),
+                "fetched_at": datetime.utcnow(),
+            }
+            await session.run_sync(
+                upsert_post,
+                platform_name="tiktok",
+                external_id=f"profile:{external_id}",
+                payload=user_data,
+                source="tiktok_profile_api",
+                defaults=defaults,
+            )
+            await session.commit()
+        
+        return _build_api_response(user_data, "tiktok_profile_api")
     
-    # 2️⃣ FALLBACK: CHARGER DEPUIS DB
-    logger.info("Loading profile from database (fallback)...")
-    external_id_pattern = f"profile:%{user_id}%" if user_id and user_id != "me" else "profile:%"
-    posts = (
-        db.query(Post)
-        .filter(
-            Post.platform_id == tiktok_platform.id,
-            Post.external_id.like(external_id_pattern),
-            Post.source == "tiktok_profile_api"
-        )
-        .order_by(Post.fetched_at.desc().nullslast())
-        .limit(1)
-        .all()
-    )
+    async def load_db() -> Tuple[Optional[Dict], Optional[datetime]]:
+        logger.info("Loading profile from database...")
+        statement = select(Post).where(Post.platform_id == tiktok_platform_id, Post.source == "tiktok_profile_api")
+        if owner_id:
+            statement = statement.where(Post.external_id == f"profile:{owner_id}")
+        else:
+            statement = statement.order_by(Post.fetched_at.desc().nullslast()).limit(1)
+        post = await db.scalar(statement)
+        if post is None:
+            return None, None
+        
+        payload_data = load_post_payload(post)
+        api_payload = payload_data["api_payload"]
+        
+        user_data = {
+            "open_id": api_payload.get("open_id"),
+            "union_id": api_payload.get("union_id"),
+            "display_name": post.author or api_payload.get("display_name"),
+            "avatar_url": post.media_url or api_payload.get("avatar_url"),
+            "bio_description": api_payload.get("bio_description"),
+            "is_verified": api_payload.get("is_verified", False),
+        }
+        return _build_api_response(user_data, "database_fallback"), post.fetched_at
     
-    if not posts:
+    result = await _serve("tiktok.profile", owner_id, account, fetch_api, load_db, "(profile)")
+    if result is None:
         raise HTTPException(status_code=404, detail="TikTok profile not found in database")
-    
-    post = posts[0]
-    payload_data = _load_post_payload(post)
-    api_payload = payload_data["api_payload"]
-    
-    user_data = {
-        "open_id": api_payload.get("open_id"),
-        "union_id": api_payload.get("union_id"),
-        "display_name": post.author or api_payload.get("display_name"),
-        "avatar_url": post.media_url or api_payload.get("avatar_url"),
-        "bio_description": api_payload.get("bio_description"),
-        "is_verified": api_payload.get("is_verified", False),
-    }
-    
-    return _build_api_response(user_data, "database_fallback")
+    return result
 
 
 @router.get("/stats")
 async def get_tiktok_stats(
-    user_id: Optional[str] = Query(None, description="TikTok user ID (open_id or union_id)"),
-    db: Session = Depends(get_db),
+    user_id: Optional[str] = Query(None, description="TikTok user ID (open_id) lu en base ; par défaut le compte TikTok connecté"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Optional[User] = Depends(get_optional_user),
 ):
     """
     Récupère les statistiques TikTok d'un utilisateur.
     Utilise le scope: user.info.stats
     
-    STRATÉGIE: 1. Essayer API TikTok d'abord → 2. Fallback DB si échec
+    STRATÉGIE (API_FALLBACK_MODE) : api_first = API TikTok d'abord, DB si échec ;
+    swr = DB si assez fraîche (TikTok rafraîchit en tâche de fond), sinon API TikTok
     """
-    tiktok_platform = ensure_platform(db, "tiktok")
+    tiktok_platform_id = await db.run_sync(ensure_platform_id, "tiktok")
+    # Compte TikTok du demandeur : l'API répond pour ce compte ; la DB pour user_id s'il est
+    # fourni, sinon pour ce compte (ou le dernier relevé si aucun compte n'est lié)
+    account = await _get_tiktok_account(db, current_user)
+    await db.commit()  # plateforme éventuellement créée : ne pas bloquer l'écriture de l'appel live
+    access_token, open_id = account or (None, None)
+    owner_id = user_id or open_id
+    if user_id and user_id != open_id:
+        account = None  # l'API ne renvoie que le compte du token : user_id d'un autre compte = DB seule
     
-    # 1️⃣ ESSAYER L'API TIKTOK D'ABORD
-    try:
-        access_token = _get_tiktok_token(db, current_user)
-        if not user_id:
-            user_id = "me"
+    async def fetch_api(session: AsyncSession) -> Optional[Dict]:
         
         fields = "open_id,follower_count,following_count,likes_count,video_count"
         logger.info("Trying TikTok API first (user/info for stats)...")
@@ -218,73 +252,66 @@ async def get_tiktok_stats(
         )
         
         user_data = response.get("data", {}).get("user", {})
-        if user_data:
-            # Stocker les stats dans Post pour analytics
-            if user_data.get("open_id") or user_data.get("union_id"):
-                external_id = user_data.get("open_id") or user_data.get("union_id")
-                metrics = {
-                    "follower_count": user_data.get("follower_count"),
-                    "following_count": user_data.get("following_count"),
-                    "likes_count": user_data.get("likes_count"),
-                    "video_count": user_data.get("video_count"),
-                }
-                defaults = {
-                    "author": user_data.get("display_name") or f"TikTok User {external_id[:8]}",
-                    "caption": f"TikTok stats for {external_id}",
-                    "metrics": json.dumps(metrics),
-                    "fetched_at": datetime.utcnow(),
-                }
-                upsert_post(
-                    db=db,
-                    platform_name="tiktok",
-                    external_id=f"stats:{external_id}",
-                    payload=user_data,
-                    source="tiktok_stats_api",
-                    defaults=defaults,
-                )
-                db.commit()
-            
-            return _build_api_response(user_data, "tiktok_stats_api")
-        else:
+        if not user_data:
             logger.warning("API returned empty stats, falling back to DB")
-            raise HTTPException(status_code=404, detail="Stats not found")
-            
-    except Exception as e:
-        _handle_api_error(e, "(stats)")
+            return None
+        
+        # Stocker les stats dans Post pour analytics
+        if user_data.get("open_id") or user_data.get("union_id"):
+            external_id = user_data.get("open_id") or user_data.get("union_id")
+            metrics = {
+                "follower_count": user_data.get("follower_count"),
+                "following_count": user_data.get("following_count"),
+                "likes_count": user_data.get("likes_count"),
+                "video_count": user_data.get("video_count"),
+            }
+            defaults = {
+                "author": user_data.get("display_name") or f"TikTok User {external_id[:8]}",
+                "caption": f"TikTok stats for {external_id}",
+                "metrics": json.dumps(metrics),
+                "fetched_at": datetime.utcnow(),
+            }
+            await session.run_sync(
+                upsert_post,
+                platform_name="tiktok",
+                external_id=f"stats:{external_id}",
+                payload=user_data,
+                source="tiktok_stats_api",
+                defaults=defaults,
+            )
+            await session.commit()
+        
+        return _build_api_response(user_data, "tiktok_stats_api")
     
-    # 2️⃣ FALLBACK: CHARGER DEPUIS DB
-    logger.info("Loading stats from database (fallback)...")
-    external_id_pattern = f"stats:%{user_id}%" if user_id and user_id != "me" else "stats:%"
-    posts = (
-        db.query(Post)
-        .filter(
-            Post.platform_id == tiktok_platform.id,
-            Post.external_id.like(external_id_pattern),
-            Post.source == "tiktok_stats_api"
-        )
-        .order_by(Post.fetched_at.desc().nullslast())
-        .limit(1)
-        .all()
-    )
+    async def load_db() -> Tuple[Optional[Dict], Optional[datetime]]:
+        logger.info("Loading stats from database...")
+        statement = select(Post).where(Post.platform_id == tiktok_platform_id, Post.source == "tiktok_stats_api")
+        if owner_id:
+            statement = statement.where(Post.external_id == f"stats:{owner_id}")
+        else:
+            statement = statement.order_by(Post.fetched_at.desc().nullslast()).limit(1)
+        post = await db.scalar(statement)
+        if post is None:
+            return None, None
+        
+        payload_data = load_post_payload(post)
+        api_payload = payload_data["api_payload"]
+        metrics = payload_data["metrics"]
+        
+        user_data = {
+            "open_id": api_payload.get("open_id"),
+            "union_id": api_payload.get("union_id"),
+            "follower_count": metrics.get("follower_count") or api_payload.get("follower_count"),
+            "following_count": metrics.get("following_count") or api_payload.get("following_count"),
+            "likes_count": metrics.get("likes_count") or api_payload.get("likes_count"),
+            "video_count": metrics.get("video_count") or api_payload.get("video_count"),
+        }
+        return _build_api_response(user_data, "database_fallback"), post.fetched_at
     
-    if not posts:
+    result = await _serve("tiktok.stats", owner_id, account, fetch_api, load_db, "(stats)")
+    if result is None:
         raise HTTPException(status_code=404, detail="TikTok stats not found in database")
-    
-    post = posts[0]
-    payload_data = load_post_payload(post)
-    api_payload = payload_data["api_payload"]
-    metrics = payload_data["metrics"]
-    
-    user_data = {
-        "open_id": api_payload.get("open_id"),
-        "union_id": api_payload.get("union_id"),
-        "follower_count": metrics.get("follower_count") or api_payload.get("follower_count"),
-        "following_count": metrics.get("following_count") or api_payload.get("following_count"),
-        "likes_count": metrics.get("likes_count") or api_payload.get("likes_count"),
-        "video_count": metrics.get("video_count") or api_payload.get("video_count"),
-    }
-    
-    return _build_api_response(user_data, "database_fallback")
+    return result
 
 
 @router.get("/videos")
@@ -292,20 +319,25 @@ async def get_tiktok_videos(
     query: Optional[str] = Query(None, description="Search query (hashtag or keyword)"),
     limit: int = Query(10, ge=1, le=50, description="Number of videos to fetch"),
     cursor: Optional[str] = Query(None, description="Pagination cursor"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Optional[User] = Depends(get_optional_user),
 ):
     """
     Récupère les vidéos TikTok publiques d'un utilisateur ou par recherche.
     Utilise le scope: video.list
     
-    STRATÉGIE: 1. Essayer API TikTok d'abord → 2. Fallback DB si échec
+    STRATÉGIE (API_FALLBACK_MODE) : api_first = API TikTok d'abord, DB si échec ;
+    swr = DB si assez fraîche (TikTok rafraîchit en tâche de fond), sinon API TikTok.
+    Une page suivante (cursor) n'existe qu'en live : toujours api_first.
     """
-    tiktok_platform = ensure_platform(db, "tiktok")
+    tiktok_platform_id = await db.run_sync(ensure_platform_id, "tiktok")
+    # Compte TikTok du demandeur : l'API et la DB répondent pour ce compte (toutes les vidéos
+    # video/list en base si aucun compte n'est lié)
+    account = await _get_tiktok_account(db, current_user)
+    await db.commit()  # plateforme éventuellement créée : ne pas bloquer l'écriture de l'appel live
+    access_token, open_id = account or (None, None)
     
-    # 1️⃣ ESSAYER L'API TIKTOK D'ABORD
-    try:
-        access_token = _get_tiktok_token(db, current_user)
+    async def fetch_api(session: AsyncSession) -> Optional[Dict]:
         logger.info("Trying TikTok API first (video/list)...")
         params: dict = {"max_count": limit}
         if cursor:
@@ -330,115 +362,88 @@ async def get_tiktok_videos(
             ]
             logger.info(f"Filtered {len(videos)} videos matching query: {query}")
         
-        if videos:
-            # Stocker chaque vidéo dans Post
-            for video in videos:
-                video_id = video.get("id")
-                if not video_id:
-                    continue
-                
-                metrics = {
-                    "like_count": video.get("like_count"),
-                    "comment_count": video.get("comment_count"),
-                    "share_count": video.get("share_count"),
-                    "view_count": video.get("view_count"),
-                }
-                
-                defaults = {
-                    "author": video.get("creator_username") or video.get("creator_display_name"),
-                    "caption": video.get("title") or video.get("video_description"),
-                    "media_url": video.get("cover_image_url") or video.get("thumbnail_url"),
-                    "permalink": video.get("share_url") or f"https://www.tiktok.com/@{(video.get('creator_username') or 'user')}/video/{video_id}",
-                    "posted_at": parse_timestamp(video.get("create_time")),
-                    "metrics": json.dumps(metrics),
-                    "fetched_at": datetime.utcnow(),
-                }
-                
-                upsert_post(
-                    db=db,
-                    platform_name="tiktok",
-                    external_id=str(video_id),
-                    payload=video,
-                    source="tiktok_video_list_api",
-                    defaults=defaults,
-                )
-            
-            db.commit()
-            
-            return _build_api_response(
-                videos,
-                "tiktok_video_list_api",
-                count=len(videos),
-                cursor=response.get("data", {}).get("cursor"),
-                has_more=response.get("data", {}).get("has_more", False),
-            )
-        else:
+        if not videos:
             if query:
                 logger.info(f"API returned 0 videos matching query '{query}', falling back to DB")
             else:
                 logger.info("API returned 0 videos, falling back to DB")
-            raise HTTPException(status_code=404, detail="No videos found")
+            return None
+        
+        # Stocker les vidéos dans Post (un seul INSERT ... ON CONFLICT pour le lot)
+        items = [tiktok_video_item(video, "tiktok_video_list_api", open_id) for video in videos if video.get("id")]
+        
+        await session.run_sync(ingest_posts, "tiktok", items)
+        await session.commit()
         
-    except Exception as e:
-        _handle_api_error(e, "(videos)")
+        return _build_api_response(
+            videos,
+            "tiktok_video_list_api",
+            count=len(videos),
+            cursor=response.get("data", {}).get("cursor"),
+            has_more=response.get("data", {}).get("has_more", False),
+        )
     
-    # 2️⃣ FALLBACK: CHARGER DEPUIS DB
-    logger.info("Loading from database (fallback)...")
-    if query:
-        posts = (
-            db.query(Post)
-            .filter(
-                Post.platform_id == tiktok_platform.id,
-                or_(
-                    Post.caption.ilike(f'%{query}%'),
-                    Post.caption.ilike(f'%#{query}%'),
+    async def load_db() -> Tuple[Dict, Optional[datetime]]:
+        logger.info("Loading videos from database...")
+        # Vidéos du compte (video/list), pas les profils / stats ni les vidéos des autres comptes
+        owned = [Post.platform_id == tiktok_platform_id, Post.source == "tiktok_video_list_api"]
+        if open_id:
+            owned.append(Post.owner_id == open_id)
+        statement = select(Post).where(*owned)
+        if query:
+            statement = (
+                statement
+                .where(
+                    or_(
+                        Post.caption.ilike(f'%{query}%'),
+                        Post.caption.ilike(f'%#{query}%'),
+                    )
                 )
+                .order_by(Post.posted_at.desc().nullslast(), Post.fetched_at.desc().nullslast())
             )
-            .order_by(Post.posted_at.desc().nullslast(), Post.fetched_at.desc().nullslast())
-            .limit(limit)
-            .all()
-        )
-    else:
-        posts = (
-            db.query(Post)
-            .filter(Post.platform_id == tiktok_platform.id)
-            .order_by(Post.fetched_at.desc().nullslast())
-            .limit(limit)
-            .all()
-        )
-    
-    # Convertir Post en format API
-    videos = []
-    for post in posts:
-        payload_data = load_post_payload(post)
-        api_payload = payload_data["api_payload"]
-        metrics = payload_data["metrics"]
+        else:
+            statement = statement.order_by(Post.fetched_at.desc().nullslast())
+        posts = (await db.scalars(statement.limit(limit))).all()
+        # Fraîcheur : dernier video/list de ce compte (pas seulement des vidéos filtrées)
+        fetched_at = await db.scalar(select(func.max(Post.fetched_at)).where(*owned))
         
-        cover_image = (
-            post.media_url 
-            or api_payload.get("cover_image_url") 
-            or api_payload.get("thumbnail_url")
-        )
+        # Convertir Post en format API
+        videos = []
+        for post in posts:
+            payload_data = load_post_payload(post)
+            api_payload = payload_data["api_payload"]
+            metrics = payload_data["metrics"]
+            
+            cover_image = (
+                post.media_url 
+                or api_payload.get("cover_image_url") 
+                or api_payload.get("thumbnail_url")
+            )
+            
+            videos.append({
+                "id": post.id,
+                "creator_username": post.author,
+                "title": post.caption,
+                "video_description": post.caption,
+                "cover_image_url": cover_image,
+                "thumbnail_url": cover_image,
+                "share_url": _get_post_share_url(post, api_payload),
+                "create_time": post.posted_at.isoformat() if post.posted_at else None,
+                "like_count": metrics.get("like_count", 0),
+                "comment_count": metrics.get("comment_count", 0),
+                "share_count": metrics.get("share_count", 0),
+                "view_count": metrics.get("view_count", 0),
+            })
         
-        videos.append({
-            "id": post.id,
-            "creator_username": post.author,
-            "title": post.caption,
-            "video_description": post.caption,
-            "cover_image_url": cover_image,
-            "thumbnail_url": cover_image,
-            "share_url": _get_post_share_url(post, api_payload),
-            "create_time": post.posted_at.isoformat() if post.posted_at else None,
-            "like_count": metrics.get("like_count", 0),
-            "comment_count": metrics.get("comment_count", 0),
-            "share_count": metrics.get("share_count", 0),
-            "view_count": metrics.get("view_count", 0),
-        })
+        response = _build_api_response(
+            videos,
+            "database_fallback",
+            count=len(videos),
+            cursor=None,
+            has_more=False,
+        )
+        return response, fetched_at
     
-    return _build_api_response(
-        videos,
-        "database_fallback",
-        count=len(videos),
-        cursor=None,
-        has_more=False,
+    return await _serve(
+        "tiktok.videos", (open_id, query, limit, cursor), account, fetch_api, load_db, "(videos)", swr=cursor is None,
     )